@@ -1,26 +1,60 @@
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+import time
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from os.path import abspath, join, dirname
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 
 import panel as pn
-from atap_corpus._types import TCorpora
-from atap_corpus_loader import CorpusLoader
+from panel.param import ParamFunction
 
-from atap_annotator.annotator.Annotator import Annotator
+from atap_annotator.annotator.AnnotationHistory import AnnotationHistory
+from atap_annotator.annotator.DiagnosticsPanel import DiagnosticsPanel
+from atap_annotator.annotator.LatencyTracker import LatencyTracker
 
-pn.extension("plotly", notifications=True)
+if TYPE_CHECKING:
+    from atap_corpus._types import TCorpora
+    from atap_corpus_loader import CorpusLoader
+
+    from atap_annotator.annotator.Annotator import Annotator
+
+pn.extension(notifications=True)
 
 
 class CorpusAnnotator(pn.viewable.Viewer):
+    """
+    Adds the Corpus Annotator tab to a CorpusLoader.
+    The Annotator behind the tab is only built when the tab is first shown or annotator_panel is first accessed, so
+    creating a session does not construct the annotation widgets or import the annotation modules. The time taken by
+    each stage of startup is available from get_startup_report().
+    """
     LOGGER_NAME: str = "corpus-annotator"
+    DEFAULT_JOURNAL_DIR: str = ".annotator_journal"
+    DEFAULT_CACHE_DIR: str = ".annotator_cache"
+
+    # Writes the queued log records to the log file, keyed by logger name
+    _log_listeners: dict[str, QueueListener] = {}
+
+    @staticmethod
+    def _stop_log_listener(logger_name: str):
+        listener: Optional[QueueListener] = CorpusAnnotator._log_listeners.pop(logger_name, None)
+        if listener is not None:
+            listener.stop()
+            for handler in listener.handlers:
+                handler.close()
 
     @staticmethod
     def setup_logger(logger_name: str, run_logger: bool):
+        """
+        Log records are put on a queue and written to the log file by a listener thread, so logging does not block
+        the interaction that emits it.
+        """
         logger = logging.getLogger(logger_name)
         logger.propagate = False
         for handler in logger.handlers[:]:
             logger.removeHandler(handler)
+        CorpusAnnotator._stop_log_listener(logger_name)
         if not run_logger:
             logger.addHandler(logging.NullHandler())
             return
@@ -35,35 +69,127 @@ class CorpusAnnotator(pn.viewable.Viewer):
         file_handler.setLevel(logging.DEBUG)
         file_handler.setFormatter(formatter)
 
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+        listener.start()
+        if not CorpusAnnotator._log_listeners:
+            atexit.register(CorpusAnnotator._stop_log_listeners)
+        CorpusAnnotator._log_listeners[logger_name] = listener
+
         logger.setLevel(logging.DEBUG)
-        logger.addHandler(file_handler)
+        logger.addHandler(QueueHandler(log_queue))
 
         logger.info('Logger started')
 
+    @staticmethod
+    def _stop_log_listeners():
+        for logger_name in list(CorpusAnnotator._log_listeners):
+            CorpusAnnotator._stop_log_listener(logger_name)
+
     @staticmethod
     def log(msg: str, level: int):
         logger = logging.getLogger(CorpusAnnotator.LOGGER_NAME)
         logger.log(level, msg)
 
-    def __init__(self, corpus_loader: Optional[CorpusLoader] = None, run_logger: bool = False, **params):
+    def __init__(self, corpus_loader: Optional['CorpusLoader'] = None, run_logger: bool = False,
+                 prefetch_next: int = 5, prefetch_prev: int = 2,
+                 journal_dir: Optional[str] = DEFAULT_JOURNAL_DIR, cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+                 history_size: int = AnnotationHistory.DEFAULT_MAX_SIZE, show_diagnostics: bool = False, **params):
+        init_start: float = time.perf_counter()
         super().__init__(**params)
 
         self.setup_logger(self.LOGGER_NAME, run_logger)
+        self.latency = LatencyTracker()
+        # Durations in seconds of the stages of startup, None until the stage has happened
+        self.startup_timings: dict[str, Optional[float]] = {
+            'import_s': self._get_import_duration(),
+            'init_s': None,
+            'annotator_build_s': None,
+            'first_render_s': None
+        }
 
         if corpus_loader:
-            self.corpus_loader: CorpusLoader = corpus_loader
+            self.corpus_loader: 'CorpusLoader' = corpus_loader
         else:
-            self.corpus_loader: CorpusLoader = CorpusLoader(root_directory='.', run_logger=run_logger)
-        self.corpora: TCorpora = self.corpus_loader.get_mutable_corpora()
-
-        self.annotator_panel: Annotator = Annotator(corpus_loader, self.LOGGER_NAME)
-        self.corpus_loader.add_tab("Corpus Annotator", self.annotator_panel.panel)
+            from atap_corpus_loader import CorpusLoader
+
+            self.corpus_loader: 'CorpusLoader' = CorpusLoader(root_directory='.', run_logger=run_logger)
+        self.corpora: 'TCorpora' = self.corpus_loader.get_mutable_corpora()
+
+        self.annotator_params: dict = {
+            'prefetch_next': prefetch_next,
+            'prefetch_prev': prefetch_prev,
+            'journal_dir': journal_dir,
+            'cache_dir': cache_dir,
+            'history_size': history_size
+        }
+        self._annotator_panel: Optional['Annotator'] = None
+        # The tabs of the loader only render the active tab, so the function is called when the tab is first shown
+        self.corpus_loader.add_tab("Corpus Annotator", ParamFunction(lambda: self.annotator_panel.panel, lazy=True))
+        if show_diagnostics:
+            self.diagnostics_panel = DiagnosticsPanel(self)
+            self.corpus_loader.add_tab("Diagnostics", self.diagnostics_panel.panel)
+
+        self._record_startup('init_s', time.perf_counter() - init_start)
+        doc = pn.state.curdoc
+        if (doc is not None) and (doc.session_context is not None):
+            pn.state.onload(lambda: self._record_startup('first_render_s', time.perf_counter() - init_start))
 
     def __panel__(self):
         return self.corpus_loader.servable()
 
-    def get_corpus_loader(self) -> CorpusLoader:
+    @property
+    def annotator_panel(self) -> 'Annotator':
+        if self._annotator_panel is None:
+            build_start: float = time.perf_counter()
+            from atap_annotator.annotator.Annotator import Annotator
+
+            self._annotator_panel = Annotator(self.corpus_loader, self.LOGGER_NAME, latency=self.latency,
+                                              **self.annotator_params)
+            self._record_startup('annotator_build_s', time.perf_counter() - build_start)
+        return self._annotator_panel
+
+    def close(self):
+        """
+        Releases the workers, journal and worker process held by the annotator, if it was built
+        """
+        if self._annotator_panel is not None:
+            self._annotator_panel.close()
+
+    @staticmethod
+    def _get_import_duration() -> Optional[float]:
+        import atap_annotator
+
+        return atap_annotator.get_import_duration(__name__)
+
+    def _record_startup(self, stage: str, duration: float):
+        self.startup_timings[stage] = duration
+        self.latency.record(f"startup.{stage.removesuffix('_s')}", duration)
+        self.log(f"Startup stage {stage} took {duration:.3f}s", logging.DEBUG)
+
+    def get_startup_report(self) -> dict[str, Optional[float]]:
+        """
+        :return: the seconds taken to import this module through the atap_annotator package, to construct this
+        CorpusAnnotator, to build the annotator when its tab was first shown, and from construction until the page
+        loaded when served. A stage that has not happened, or was not measured, is None
+        """
+        return dict(self.startup_timings)
+
+    def get_corpus_loader(self) -> 'CorpusLoader':
         return self.corpus_loader
 
-    def get_mutable_corpora(self) -> TCorpora:
+    def get_mutable_corpora(self) -> 'TCorpora':
         return self.corpora
+
+    def get_latency_stats(self) -> dict[str, dict[str, float]]:
+        """
+        :return: for each instrumented operation, its call count and the percentiles, maximum and total of its recent
+        durations in milliseconds
+        """
+        return self.latency.get_stats()
+
+    def dump_latency_stats(self, file_path: str):
+        """
+        Writes the latency statistics to file_path as JSON
+        """
+        self.latency.dump(file_path)
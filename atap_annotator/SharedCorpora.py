@@ -0,0 +1,203 @@
+import os
+import re
+import threading
+import uuid
+from os.path import basename, splitext, join
+from typing import Optional, Callable, TextIO
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows, where the journal directories are only locked within the server process
+    fcntl = None
+
+import pandas as pd
+import panel as pn
+import pyarrow as pa
+import pyarrow.parquet as pq
+from atap_corpus.corpus.corpus import DataFrameCorpus
+from atap_corpus_loader import CorpusLoader
+
+from atap_annotator.CorpusAnnotator import CorpusAnnotator
+
+
+class SharedCorpora:
+    """
+    Loads corpora once per server process and shares them read-only between all Panel sessions.
+    Each session builds its own lightweight CorpusLoader and CorpusAnnotator holding only its annotation state and
+    current document, while the corpus dataframes are shared.
+    Arrow IPC (Feather) files are memory-mapped, so their columns are not held in process memory. Parquet files are
+    decoded once and then shared.
+
+    Sessions must treat the shared corpora as read-only. Annotations are always saved to a copy of the corpus, but
+    renaming a shared corpus or adding a meta to it through the corpus loader affects every session.
+    """
+    DOC_COL: str = 'document'
+    ANNOTATOR_ARG: str = 'annotator'
+    JOURNAL_LOCK_FILE: str = '.lock'
+
+    _corpora: dict[str, DataFrameCorpus] = {}
+    _locked_journal_dirs: set[str] = set()
+    _lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str, col_doc: str = DOC_COL, name: Optional[str] = None) -> DataFrameCorpus:
+        """
+        Loads the corpus at the given Arrow IPC, Feather, or Parquet path, or returns it if it was already loaded.
+        :param path: the path of the corpus file
+        :param col_doc: the column containing the documents
+        :param name: the name of the corpus. Defaults to the file name without its extension
+        """
+        with cls._lock:
+            corpus: Optional[DataFrameCorpus] = cls._corpora.get(path)
+            if corpus is not None:
+                return corpus
+            if name is None:
+                name = splitext(basename(path))[0]
+            table: pa.Table = cls._read_table(path)
+            if col_doc not in table.column_names:
+                raise ValueError(f"Column {col_doc} not found in {path}. Available columns: {table.column_names}")
+            doc_type: pa.DataType = table.schema.field(col_doc).type
+            if not (pa.types.is_string(doc_type) or pa.types.is_large_string(doc_type)):
+                raise ValueError(f"Column {col_doc} in {path} must contain strings. Found type: {doc_type}")
+            corpus_df: pd.DataFrame = table.to_pandas(types_mapper=cls._map_arrow_type)
+            corpus_df = corpus_df.rename(columns={col_doc: DataFrameCorpus._COL_DOC})
+            # DataFrameCorpus converts every document to a Python string to validate them, which would materialise the
+            # whole document column in process memory. The column type was already checked above, so the corpus is
+            # constructed without rows and the memory-mapped dataframe is then used as its root dataframe
+            corpus = DataFrameCorpus(corpus_df.iloc[:0], name=name)
+            corpus._df = corpus_df
+            cls._corpora[path] = corpus
+
+            return corpus
+
+    @staticmethod
+    def _read_table(path: str) -> pa.Table:
+        if path.endswith('.parquet'):
+            return pq.read_table(path, memory_map=True)
+        with pa.memory_map(path, 'r') as source:
+            return pa.ipc.open_file(source).read_all()
+
+    @staticmethod
+    def _map_arrow_type(arrow_type: pa.DataType) -> Optional[pd.ArrowDtype]:
+        # Columns remain backed by the Arrow buffers. Dictionary columns become pandas categoricals so they can be
+        # selected as annotated metas
+        if pa.types.is_dictionary(arrow_type):
+            return None
+        return pd.ArrowDtype(arrow_type)
+
+    @classmethod
+    def get_corpora(cls) -> list[DataFrameCorpus]:
+        with cls._lock:
+            return list(cls._corpora.values())
+
+    @staticmethod
+    def _get_session_id() -> Optional[str]:
+        session_context = getattr(pn.state.curdoc, 'session_context', None)
+        return getattr(session_context, 'id', None)
+
+    @classmethod
+    def get_session_annotator_name(cls) -> str:
+        """
+        :return: the name identifying the journals of the session's annotator. This is the authenticated user if
+        present, otherwise the 'annotator' URL query argument, otherwise the session id
+        """
+        annotator_name: Optional[str] = pn.state.user
+        if not annotator_name:
+            annotator_arg: list[bytes] = pn.state.session_args.get(cls.ANNOTATOR_ARG, [])
+            if len(annotator_arg):
+                annotator_name = annotator_arg[0].decode('utf-8')
+        if not annotator_name:
+            annotator_name = cls._get_session_id() or 'default'
+        return re.sub(r'[^\w.-]', '_', annotator_name)
+
+    @classmethod
+    def _lock_journal_dir(cls, journal_dir: str) -> Optional[TextIO]:
+        """
+        Takes an exclusive lock on the journal directory, which is held until it is released by
+        _release_journal_dir() or the process exits.
+        :return: the open lock file, or None if the directory is locked by another session
+        """
+        with cls._lock:
+            if journal_dir in cls._locked_journal_dirs:
+                return None
+            os.makedirs(journal_dir, exist_ok=True)
+            lock_file: TextIO = open(join(journal_dir, cls.JOURNAL_LOCK_FILE), 'a')
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    lock_file.close()
+                    return None
+            cls._locked_journal_dirs.add(journal_dir)
+            return lock_file
+
+    @classmethod
+    def _release_journal_dir(cls, journal_dir: str, lock_file: TextIO):
+        with cls._lock:
+            cls._locked_journal_dirs.discard(journal_dir)
+            # Closing the file releases the lock held on it
+            lock_file.close()
+
+    @classmethod
+    def _claim_journal_dir(cls, journal_dir: str, annotator_name: str) -> tuple[str, TextIO]:
+        """
+        Locks the annotator's subdirectory of journal_dir so that concurrent sessions of the same annotator do not
+        overwrite each other's journals. If another session holds it, a subdirectory specific to this session is
+        used instead, whose journals are not restored by later sessions of the annotator.
+        :return: the locked directory and its lock file
+        """
+        session_id: str = cls._get_session_id() or uuid.uuid4().hex
+        candidates: list[str] = [annotator_name, f"{annotator_name}-{session_id}",
+                                 f"{annotator_name}-{uuid.uuid4().hex}"]
+        for candidate in candidates:
+            annotator_dir: str = join(journal_dir, re.sub(r'[^\w.-]', '_', candidate))
+            lock_file: Optional[TextIO] = cls._lock_journal_dir(annotator_dir)
+            if lock_file is not None:
+                return annotator_dir, lock_file
+        raise ValueError(f"Could not lock a journal directory in {journal_dir}")
+
+    @classmethod
+    def create_annotator(cls, root_directory: str = '.',
+                         journal_dir: Optional[str] = CorpusAnnotator.DEFAULT_JOURNAL_DIR,
+                         **annotator_params) -> CorpusAnnotator:
+        """
+        Creates a CorpusAnnotator for the current session with the shared corpora loaded.
+        Each annotator journals to its own locked subdirectory of journal_dir, and is closed when its session is
+        destroyed.
+        :param root_directory: the root directory of the session's CorpusLoader
+        :param journal_dir: the directory containing the journals of all sessions. None disables journalling
+        :param annotator_params: passed on to the CorpusAnnotator
+        """
+        lock_file: Optional[TextIO] = None
+        if journal_dir is not None:
+            journal_dir, lock_file = cls._claim_journal_dir(journal_dir, cls.get_session_annotator_name())
+        corpus_loader = CorpusLoader(root_directory=root_directory)
+        corpora = corpus_loader.get_mutable_corpora()
+        for corpus in cls.get_corpora():
+            corpora.add(corpus)
+        corpus_annotator = CorpusAnnotator(corpus_loader, journal_dir=journal_dir, **annotator_params)
+        corpus_loader.trigger_event("update")
+        doc = pn.state.curdoc
+        # Outside a server session Panel would keep the callback and register it with every later session
+        if (doc is not None) and (doc.session_context is not None):
+            def on_session_destroyed(session_context):
+                corpus_annotator.close()
+                if lock_file is not None:
+                    cls._release_journal_dir(journal_dir, lock_file)
+
+            pn.state.on_session_destroyed(on_session_destroyed)
+
+        return corpus_annotator
+
+    @classmethod
+    def serve(cls, paths: list[str], col_doc: str = DOC_COL, root_directory: str = '.', port: int = 5006,
+              journal_dir: Optional[str] = CorpusAnnotator.DEFAULT_JOURNAL_DIR, **serve_params):
+        """
+        Loads the corpora at the given paths once and serves a CorpusAnnotator to each connecting session.
+        :param serve_params: passed on to panel.serve
+        """
+        for path in paths:
+            cls.load(path, col_doc)
+        create_session: Callable[[], CorpusAnnotator] = lambda: cls.create_annotator(root_directory, journal_dir)
+        return pn.serve({'annotator': create_session}, port=port, **serve_params)
@@ -1,3 +1,51 @@
-__all__ = ['CorpusAnnotator']
+__all__ = ['CorpusAnnotator', 'SharedCorpora', 'AnnotationSession', 'get_import_duration']
 
-from .CorpusAnnotator import CorpusAnnotator
+import sys
+import time
+from types import ModuleType
+from typing import Optional
+
+# Classes are imported on first access, so importing the package is cheap and the headless AnnotationSession can be
+# used without importing Panel
+_LAZY_IMPORTS: dict[str, str] = {
+    'CorpusAnnotator': 'atap_annotator.CorpusAnnotator',
+    'SharedCorpora': 'atap_annotator.SharedCorpora',
+    'AnnotationSession': 'atap_annotator.annotator.AnnotationSession'
+}
+# Seconds taken by each lazily imported module, including the modules it imports that were not yet imported
+_import_durations: dict[str, float] = {}
+
+
+def get_import_duration(module_name: str) -> Optional[float]:
+    """
+    :return: the seconds taken to import the module on first access through this package, or None if it was imported
+    directly
+    """
+    return _import_durations.get(module_name)
+
+
+class _LazyExportPackage(ModuleType):
+    def __setattr__(self, name: str, value):
+        # Importing a submodule binds it to this package under its own name, which would hide the class of the same
+        # name exported by this package, so the class is bound in its place
+        if (name in _LAZY_IMPORTS) and isinstance(value, ModuleType) and (value.__name__ == _LAZY_IMPORTS[name]):
+            value = getattr(value, name)
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _LazyExportPackage
+
+
+def __getattr__(name: str):
+    if name in _LAZY_IMPORTS:
+        from importlib import import_module
+
+        module_name: str = _LAZY_IMPORTS[name]
+        import_start: float = time.perf_counter()
+        already_imported: bool = module_name in sys.modules
+        attribute = getattr(import_module(module_name), name)
+        if not already_imported:
+            _import_durations[module_name] = time.perf_counter() - import_start
+        globals()[name] = attribute
+        return attribute
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+from pandas import Series, DataFrame
+
+from atap_annotator.annotator.AnnotationStore import AnnotationStore
+
+
+class Agreement:
+    """
+    Measures the agreement between annotation columns, such as the categorical metas saved by different annotators.
+    Each column covers the whole corpus in the same order. Empty strings, which mark the default category, and missing
+    values are treated as not annotated and are excluded from every measure.
+    All measures are computed from integer category codes with np.bincount rather than by iterating over documents.
+    """
+    MIN_DOCUMENT_IDX: int = 1
+    DEFAULT_LABEL: str = AnnotationStore.DEFAULT_LABEL
+    MISSING_CODE: int = -1
+
+    @classmethod
+    def get_code_matrix(cls, cols: list[Series]) -> tuple[np.ndarray, pd.Index]:
+        """
+        Encodes the columns with a shared set of categories.
+        :return: an array of shape (len(cols), number of documents) holding the category code of each document in each
+        column, or MISSING_CODE if it is not annotated, and the categories indexed by code
+        :raises ValueError: if the columns differ in length
+        """
+        num_documents: int = len(cols[0]) if len(cols) else 0
+        if any(len(col) != num_documents for col in cols):
+            raise ValueError("The annotation columns must all have the same number of documents")
+        categorical_cols: list[Series] = []
+        for col in cols:
+            col = Series(col).reset_index(drop=True)
+            if not isinstance(col.dtype, pd.CategoricalDtype):
+                col = col.astype('category')
+            categorical_cols.append(col)
+        col_categories: list[pd.Index] = [pd.Index(col.cat.categories.astype(str), dtype=object)
+                                          for col in categorical_cols]
+        categories: pd.Index = pd.Index([], dtype=object)
+        for col_category in col_categories:
+            categories = categories.union(col_category)
+        categories = categories.drop(cls.DEFAULT_LABEL, errors='ignore')
+
+        codes: np.ndarray = np.empty((len(cols), num_documents), dtype=np.int32)
+        for i, (col, col_category) in enumerate(zip(categorical_cols, col_categories)):
+            # Maps the codes of the column to the shared codes. The final entry is selected by the NaN code of -1
+            lookup: np.ndarray = np.append(categories.get_indexer(col_category), cls.MISSING_CODE).astype(np.int32)
+            codes[i] = lookup[col.cat.codes.to_numpy()]
+        return codes, categories
+
+    @classmethod
+    def _confusion_counts(cls, codes_a: np.ndarray, codes_b: np.ndarray, num_categories: int) -> np.ndarray:
+        both_annotated: np.ndarray = (codes_a != cls.MISSING_CODE) & (codes_b != cls.MISSING_CODE)
+        flat_codes: np.ndarray = codes_a[both_annotated].astype(np.int64) * num_categories + codes_b[both_annotated]
+        counts: np.ndarray = np.bincount(flat_codes, minlength=num_categories * num_categories)
+        return counts.reshape(num_categories, num_categories)
+
+    @classmethod
+    def confusion_matrix(cls, col_a: Series, col_b: Series) -> DataFrame:
+        """
+        :return: the number of documents annotated in both columns with each pair of categories, with the categories
+        of col_a as rows and those of col_b as columns
+        """
+        codes, categories = cls.get_code_matrix([col_a, col_b])
+        counts: np.ndarray = cls._confusion_counts(codes[0], codes[1], len(categories))
+        return DataFrame(counts, index=categories, columns=categories)
+
+    @classmethod
+    def _cohen_kappa_from_counts(cls, counts: np.ndarray) -> float:
+        total: int = int(counts.sum())
+        if total == 0:
+            return np.nan
+        observed: float = np.trace(counts) / total
+        expected: float = float(np.dot(counts.sum(axis=1), counts.sum(axis=0))) / (total * total)
+        if expected == 1:
+            return 1.0 if observed == 1 else np.nan
+        return (observed - expected) / (1 - expected)
+
+    @classmethod
+    def cohen_kappa(cls, col_a: Series, col_b: Series) -> float:
+        """
+        :return: Cohen's kappa over the documents annotated in both columns, or NaN if there are none
+        """
+        codes, categories = cls.get_code_matrix([col_a, col_b])
+        return cls._cohen_kappa_from_counts(cls._confusion_counts(codes[0], codes[1], len(categories)))
+
+    @classmethod
+    def pairwise_cohen_kappa(cls, cols: dict[str, Series]) -> DataFrame:
+        """
+        :return: Cohen's kappa for every pair of columns, indexed by column name on both axes
+        """
+        names: list[str] = list(cols.keys())
+        codes, categories = cls.get_code_matrix(list(cols.values()))
+        kappas: np.ndarray = np.eye(len(names))
+        for i in range(len(names)):
+            for j in range(i + 1, len(names)):
+                counts: np.ndarray = cls._confusion_counts(codes[i], codes[j], len(categories))
+                kappas[i, j] = kappas[j, i] = cls._cohen_kappa_from_counts(counts)
+        return DataFrame(kappas, index=names, columns=names)
+
+    @classmethod
+    def fleiss_kappa(cls, cols: list[Series]) -> float:
+        """
+        Computes Fleiss' kappa over the documents annotated in at least two columns. Documents may be annotated in
+        a different number of columns, in which case the agreement of each document is computed over its own
+        annotations.
+        :return: Fleiss' kappa, or NaN if no document is annotated in two columns
+        """
+        codes, categories = cls.get_code_matrix(cols)
+        num_categories: int = len(categories)
+        num_documents: int = codes.shape[1]
+        annotated: np.ndarray = codes != cls.MISSING_CODE
+        document_ids: np.ndarray = np.broadcast_to(np.arange(num_documents), codes.shape)
+        flat_codes: np.ndarray = document_ids[annotated].astype(np.int64) * num_categories + codes[annotated]
+        # Number of annotations of each category for each document
+        category_counts: np.ndarray = np.bincount(flat_codes, minlength=num_documents * num_categories)
+        category_counts = category_counts.reshape(num_documents, num_categories)
+
+        raters: np.ndarray = category_counts.sum(axis=1)
+        rated: np.ndarray = raters >= 2
+        if not rated.any():
+            return np.nan
+        category_counts = category_counts[rated]
+        raters = raters[rated]
+        document_agreement: np.ndarray = ((category_counts ** 2).sum(axis=1) - raters) / (raters * (raters - 1))
+        observed: float = float(document_agreement.mean())
+        category_shares: np.ndarray = category_counts.sum(axis=0) / raters.sum()
+        expected: float = float((category_shares ** 2).sum())
+        if expected == 1:
+            return 1.0 if observed == 1 else np.nan
+        return (observed - expected) / (1 - expected)
+
+    @classmethod
+    def disagreements(cls, cols: list[Series]) -> np.ndarray:
+        """
+        :return: the ascending one-based indices of the documents annotated in at least two columns with different
+        categories
+        """
+        codes, categories = cls.get_code_matrix(cols)
+        annotated: np.ndarray = codes != cls.MISSING_CODE
+        max_codes: np.ndarray = codes.max(axis=0)
+        min_codes: np.ndarray = np.where(annotated, codes, len(categories)).min(axis=0)
+        disagreeing: np.ndarray = annotated.any(axis=0) & (min_codes != max_codes)
+        return np.flatnonzero(disagreeing) + cls.MIN_DOCUMENT_IDX
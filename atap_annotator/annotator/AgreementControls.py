@@ -0,0 +1,71 @@
+from typing import Optional
+
+from pandas import DataFrame
+from panel import Row, Column
+from panel.pane import Str, DataFrame as DataFramePane
+from panel.widgets import Button, MultiChoice
+
+
+class AgreementControls:
+    """
+    Measures the agreement between categorical metas of the selected corpus and restricts navigation to the documents
+    they disagree on so they can be adjudicated.
+    The confusion matrix is shown for the first two selected metas.
+    """
+    STANDARD_WIDTH: int = 150
+    KAPPA_DECIMALS: int = 3
+
+    def __init__(self, controller):
+        self.controller = controller
+
+        self.meta_selector = MultiChoice(name='Annotation metadata to compare', width=2 * self.STANDARD_WIDTH)
+        self.measure_button = Button(name='Measure agreement', button_type='primary', button_style='outline')
+        self.disagreements_button = Button(name='Navigate disagreements', button_type='primary',
+                                           button_style='outline')
+        self.fleiss_kappa = Str()
+        self.cohen_kappa_table = DataFramePane(visible=False)
+        self.confusion_table = DataFramePane(visible=False)
+
+        self.panel = Column(
+            Row(self.meta_selector),
+            Row(self.measure_button, self.disagreements_button, self.fleiss_kappa),
+            Row(self.cohen_kappa_table, self.confusion_table)
+        )
+
+        self.measure_button.on_click(self._measure_agreement)
+        self.disagreements_button.on_click(self._navigate_disagreements)
+
+    def __panel__(self):
+        return self.panel
+
+    def update_display(self):
+        categorical_metas: list[str] = self.controller.get_categorical_metas()
+        if self.meta_selector.options != categorical_metas:
+            self.meta_selector.value = [m for m in self.meta_selector.value if m in categorical_metas]
+            self.meta_selector.options = categorical_metas
+            self._clear_results()
+
+    def _clear_results(self):
+        self.fleiss_kappa.object = ''
+        self.cohen_kappa_table.visible = False
+        self.confusion_table.visible = False
+
+    def _measure_agreement(self, *_):
+        metas: list[str] = self.meta_selector.value
+        agreement: Optional[tuple[float, DataFrame]] = self.controller.get_agreement(metas)
+        if agreement is None:
+            self._clear_results()
+            return
+        fleiss_kappa, cohen_kappas = agreement
+        self.fleiss_kappa.object = f"Fleiss' kappa: {fleiss_kappa:.{self.KAPPA_DECIMALS}f}"
+        self.cohen_kappa_table.object = cohen_kappas.round(self.KAPPA_DECIMALS)
+        self.cohen_kappa_table.visible = True
+
+        confusion_matrix: Optional[DataFrame] = self.controller.get_confusion_matrix(metas[0], metas[1])
+        self.confusion_table.visible = confusion_matrix is not None
+        if confusion_matrix is not None:
+            confusion_matrix.index.name = f"{metas[0]} \N{DOWNWARDS ARROW} / {metas[1]} \N{RIGHTWARDS ARROW}"
+            self.confusion_table.object = confusion_matrix
+
+    def _navigate_disagreements(self, *_):
+        self.controller.navigate_disagreements(self.meta_selector.value)
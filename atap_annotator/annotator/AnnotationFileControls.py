@@ -0,0 +1,53 @@
+from typing import Optional
+
+from panel import Row, Column
+from panel.widgets import Button, Select, TextInput
+
+
+class AnnotationFileControls:
+    """
+    Exports the annotations of the selected corpus to a compact annotations file, without the documents, and imports
+    them into the same or another version of the corpus.
+    """
+    STANDARD_WIDTH: int = 150
+    DOCUMENT_TEXT: str = 'Document text'
+
+    def __init__(self, controller):
+        self.controller = controller
+
+        self.file_input = TextInput(name='Annotations file', width=2 * self.STANDARD_WIDTH)
+        self.key_selector = Select(name='Match documents by', width=self.STANDARD_WIDTH,
+                                   options={self.DOCUMENT_TEXT: None})
+        self.export_button = Button(name='Export annotations', button_type='primary', button_style='outline')
+        self.import_button = Button(name='Import annotations', button_type='warning', button_style='solid')
+
+        self.panel = Column(
+            Row(self.file_input, self.key_selector),
+            Row(self.export_button, self.import_button)
+        )
+
+        self.export_button.on_click(self._export)
+        self.import_button.on_click(self._import)
+
+    def __panel__(self):
+        return self.panel
+
+    def update_display(self):
+        self.file_input.placeholder = self.controller.get_default_annotations_path()
+        key_options: dict[str, Optional[str]] = {self.DOCUMENT_TEXT: None}
+        for meta in self.controller.get_all_metas():
+            if meta != self.controller.DOC_COL:
+                key_options[meta] = meta
+        if self.key_selector.options != key_options:
+            selected_key: Optional[str] = self.key_selector.value
+            self.key_selector.options = key_options
+            self.key_selector.value = selected_key if selected_key in key_options.values() else None
+
+    def _get_file_path(self) -> str:
+        return self.file_input.value or self.file_input.placeholder
+
+    def _export(self, *_):
+        self.controller.export_annotations(self._get_file_path(), self.key_selector.value)
+
+    def _import(self, *_):
+        self.controller.import_annotations(self._get_file_path())
@@ -0,0 +1,81 @@
+from collections import deque
+from typing import Optional, Union
+
+import numpy as np
+
+
+class AnnotationHistory:
+    """
+    Undo and redo stacks of the changes made to an AnnotationStore.
+    Each change is a compact tuple of category codes rather than a copy of the annotations. A change to a single
+    document takes constant memory, and a bulk change stores the positions and previous codes of the documents it
+    changed. Changes of the default category are stored by name. The undo stack is capped at max_size changes, with
+    the oldest changes discarded first, and any new change clears the redo stack.
+    """
+    SET_OP: int = 1
+    BULK_OP: int = 2
+    DEFAULT_OP: int = 3
+    DEFAULT_MAX_SIZE: int = 1000
+
+    # (SET_OP, position, old code, new code)
+    # (BULK_OP, positions, old codes, new code)
+    # (DEFAULT_OP, None, old default category, new default category)
+    Change = tuple[int, Union[int, np.ndarray, None], Union[int, np.ndarray, str, None], Union[int, str, None]]
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE):
+        self.max_size: int = max_size
+        self.undo_stack: deque = deque(maxlen=max_size)
+        self.redo_stack: deque = deque(maxlen=max_size)
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+
+    def _push(self, change: Change):
+        if self.max_size <= 0:
+            return
+        self.undo_stack.append(change)
+        self.redo_stack.clear()
+
+    def record_set(self, position: int, old_code: int, new_code: int):
+        if old_code != new_code:
+            self._push((self.SET_OP, position, old_code, new_code))
+
+    def record_bulk(self, positions: np.ndarray, old_codes: np.ndarray, new_code: int):
+        changed: np.ndarray = old_codes != new_code
+        if not changed.any():
+            return
+        # The smallest integer types holding the changed documents are stored to limit the memory of large changes
+        self._push((self.BULK_OP, positions[changed].astype(np.min_scalar_type(positions.max())),
+                    old_codes[changed].copy(), new_code))
+
+    def record_default(self, old_default: Optional[str], new_default: Optional[str]):
+        if old_default != new_default:
+            self._push((self.DEFAULT_OP, None, old_default, new_default))
+
+    def can_undo(self) -> bool:
+        return len(self.undo_stack) > 0
+
+    def can_redo(self) -> bool:
+        return len(self.redo_stack) > 0
+
+    def pop_undo(self) -> Optional[Change]:
+        """
+        :return: the most recent change, which is moved to the redo stack, or None if there is nothing to undo
+        """
+        if not self.can_undo():
+            return None
+        change: AnnotationHistory.Change = self.undo_stack.pop()
+        self.redo_stack.append(change)
+        return change
+
+    def pop_redo(self) -> Optional[Change]:
+        """
+        :return: the most recently undone change, which is moved back to the undo stack, or None if there is nothing
+        to redo
+        """
+        if not self.can_redo():
+            return None
+        change: AnnotationHistory.Change = self.redo_stack.pop()
+        self.undo_stack.append(change)
+        return change
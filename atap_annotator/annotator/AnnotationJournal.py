@@ -0,0 +1,315 @@
+import atexit
+import logging
+import os
+import re
+import struct
+import threading
+import time
+import traceback
+from concurrent.futures import Future
+from os.path import join, exists
+from queue import SimpleQueue, Empty
+from typing import Optional, Union
+
+import numpy as np
+
+from atap_annotator.annotator.AnnotationStore import AnnotationStore
+
+
+class AnnotationJournal:
+    """
+    Persists the annotations of the selected corpus to local disk so they survive a restart of the kernel or server.
+    Each change is appended to a journal file as a fixed size binary record and a snapshot of the whole
+    AnnotationStore is written whenever a store is attached or the journal grows past COMPACT_THRESHOLD records.
+    Records are encoded on the calling thread and written by a background thread, which batches the fsync calls.
+
+    The journal file begins with a generation number matching the snapshot it follows. If the process stops between
+    writing a snapshot and resetting the journal, the stale journal is ignored on restore.
+    The files of each corpus are kept in a directory named by the corpus name, size and document fingerprint, so a
+    different corpus or version of a corpus with the same name and size does not restore the annotations of another.
+    """
+    SNAPSHOT_FILE: str = 'snapshot.npz'
+    JOURNAL_FILE: str = 'journal.bin'
+    FSYNC_INTERVAL: float = 1.0
+    COMPACT_THRESHOLD: int = 100000
+
+    HEADER = struct.Struct('<4sI')
+    MAGIC: bytes = b'ANJ1'
+    # Every record is an operation, a position or length, and a category code
+    RECORD = struct.Struct('<BIi')
+    SET_OP: int = 1
+    DEFAULT_OP: int = 2
+    CATEGORY_OP: int = 3
+
+    def __init__(self, journal_dir: str, logger_name: str):
+        self.journal_dir: str = journal_dir
+        self.logger_name: str = logger_name
+        self.store: Optional[AnnotationStore] = None
+        self.default_category: Optional[str] = None
+        self.journaled_category_count: int = 0
+
+        self.queue: SimpleQueue = SimpleQueue()
+        self.writer: Optional[threading.Thread] = None
+
+    def log(self, msg: str, level: int):
+        logger = logging.getLogger(self.logger_name)
+        logger.log(level, msg)
+
+    def get_corpus_dir(self, corpus_name: str, corpus_size: int, fingerprint: str) -> str:
+        """
+        :param fingerprint: identifies the documents of the corpus, as returned by CorpusView.get_sample_fingerprint()
+        """
+        safe_name: str = re.sub(r'[^\w.-]', '_', corpus_name)
+        return join(self.journal_dir, f"{safe_name}-{corpus_size}-{fingerprint}")
+
+    def restore(self, corpus_name: str, corpus_size: int,
+                fingerprint: str) -> Optional[tuple[AnnotationStore, Optional[str], int]]:
+        """
+        Reads the snapshot and journal of the given corpus, if present.
+        The files are read by the writer thread once it has written the records queued before, so they are current
+        without waiting for them to be synced to disk.
+        :return: the restored AnnotationStore, the default category, and the snapshot generation. None if there is
+        nothing to restore or the stored annotations don't match the corpus size
+        """
+        corpus_dir: str = self.get_corpus_dir(corpus_name, corpus_size, fingerprint)
+        if self.writer is None:
+            return self._read(corpus_dir, corpus_size)
+        restored: Future = Future()
+        self.queue.put(('restore', corpus_dir, corpus_size, restored))
+        return restored.result()
+
+    def _read(self, corpus_dir: str, corpus_size: int) -> Optional[tuple[AnnotationStore, Optional[str], int]]:
+        snapshot_path: str = join(corpus_dir, self.SNAPSHOT_FILE)
+        if not exists(snapshot_path):
+            return None
+        with np.load(snapshot_path) as snapshot:
+            codes: np.ndarray = snapshot['codes'].astype(AnnotationStore.CODE_DTYPE)
+            category_table: list[str] = snapshot['categories'].tolist()
+            default_arr: np.ndarray = snapshot['default']
+            generation: int = int(snapshot['generation'])
+        if len(codes) != corpus_size:
+            return None
+        store = AnnotationStore(0)
+        store.codes = codes
+        for category in category_table:
+            store.get_code(category)
+        default_category: Optional[str] = default_arr[0].item() if len(default_arr) else None
+
+        journal_path: str = join(corpus_dir, self.JOURNAL_FILE)
+        if exists(journal_path):
+            with open(journal_path, 'rb') as journal_file:
+                data: bytes = journal_file.read()
+            default_category = self._replay(data, generation, store, default_category)
+
+        return store, default_category, generation
+
+    def _replay(self, data: bytes, generation: int, store: AnnotationStore,
+                default_category: Optional[str]) -> Optional[str]:
+        if len(data) < self.HEADER.size:
+            return default_category
+        magic, journal_generation = self.HEADER.unpack_from(data, 0)
+        if (magic != self.MAGIC) or (journal_generation != generation):
+            return default_category
+        offset: int = self.HEADER.size
+        record_size: int = self.RECORD.size
+        # A partially written record at the end of the journal is discarded
+        while offset + record_size <= len(data):
+            op, value, code = self.RECORD.unpack_from(data, offset)
+            offset += record_size
+            if op == self.SET_OP:
+                if value < len(store):
+                    store.codes[value] = code
+            elif op == self.DEFAULT_OP:
+                default_category = None if code < 0 else store.category_table[code]
+            elif op == self.CATEGORY_OP:
+                if offset + value > len(data):
+                    break
+                category: str = data[offset:offset + value].decode('utf-8')
+                offset += value
+                if store.get_code(category) != code:
+                    self.log(f"Journal category code mismatch for {category}", logging.WARNING)
+            else:
+                break
+        return default_category
+
+    def attach(self, corpus_name: str, corpus_size: int, fingerprint: str, store: AnnotationStore,
+               default_category: Optional[str], generation: int = 0):
+        """
+        Begins journalling changes to the given store, replacing any previously attached store.
+        A snapshot of the store is written in the background, after which the journal is reset.
+        """
+        self.store = store
+        self.default_category = default_category
+        self.journaled_category_count = len(store.category_table)
+        self._ensure_writer()
+        corpus_dir: str = self.get_corpus_dir(corpus_name, corpus_size, fingerprint)
+        self.queue.put(('attach', corpus_dir, store, generation + 1))
+
+    def snapshot(self):
+        """
+        Writes a snapshot of the attached store in the background. Used after bulk changes in place of a record per
+        document.
+        """
+        if self.store is None:
+            return
+        self.journaled_category_count = len(self.store.category_table)
+        self.queue.put(('snapshot',))
+
+    def detach(self):
+        self.store = None
+        self.queue.put(('detach',))
+
+    def record_category(self, position: int):
+        if self.store is None:
+            return
+        self._record_new_categories()
+        self.queue.put(self.RECORD.pack(self.SET_OP, position, int(self.store.codes[position])))
+
+    def record_default(self, default_category: Optional[str]):
+        if self.store is None:
+            return
+        self.default_category = default_category
+        code: int = self.store.get_code(default_category)
+        self._record_new_categories()
+        self.queue.put(self.RECORD.pack(self.DEFAULT_OP, 0, code))
+
+    def _record_new_categories(self):
+        category_table: list[str] = self.store.category_table
+        while self.journaled_category_count < len(category_table):
+            code: int = self.journaled_category_count
+            encoded: bytes = category_table[code].encode('utf-8')
+            self.queue.put(self.RECORD.pack(self.CATEGORY_OP, len(encoded), code) + encoded)
+            self.journaled_category_count += 1
+
+    def close(self):
+        """
+        Writes and syncs the queued records, then stops the writer thread. Attaching a store starts a new writer
+        """
+        self.store = None
+        if self.writer is None:
+            return
+        self.queue.put(('close',))
+        self.writer.join()
+        self.writer = None
+        atexit.unregister(self.flush)
+
+    def flush(self):
+        """
+        Blocks until all queued records have been written and synced to disk
+        """
+        if self.writer is None:
+            return
+        flushed = threading.Event()
+        self.queue.put(('flush', flushed))
+        flushed.wait()
+
+    def _ensure_writer(self):
+        if self.writer is not None:
+            return
+        self.writer = threading.Thread(target=self._write_loop, name='annotation-journal', daemon=True)
+        self.writer.start()
+        atexit.register(self.flush)
+
+    def _write_loop(self):
+        journal_file = None
+        corpus_dir: Optional[str] = None
+        store: Optional[AnnotationStore] = None
+        generation: int = 0
+        records_since_snapshot: int = 0
+        unsynced: bool = False
+        snapshot_requested: bool = False
+        last_sync: float = time.monotonic()
+
+        while True:
+            try:
+                item: Optional[Union[bytes, tuple]] = self.queue.get(timeout=self.FSYNC_INTERVAL)
+            except Empty:
+                item = None
+            try:
+                if isinstance(item, bytes):
+                    if journal_file is not None:
+                        journal_file.write(item)
+                        records_since_snapshot += 1
+                        unsynced = True
+                elif item is not None:
+                    action: str = item[0]
+                    if action in ('attach', 'detach', 'close'):
+                        self._sync(journal_file)
+                        if journal_file is not None:
+                            journal_file.close()
+                        journal_file = None
+                        unsynced = False
+                    if action == 'close':
+                        return
+                    if action == 'attach':
+                        _, corpus_dir, store, generation = item
+                        os.makedirs(corpus_dir, exist_ok=True)
+                        journal_file = self._compact(corpus_dir, store, generation)
+                        records_since_snapshot = 0
+                    elif action == 'snapshot':
+                        snapshot_requested = True
+                    elif action == 'flush':
+                        self._sync(journal_file)
+                        unsynced = False
+                        item[1].set()
+                    elif action == 'restore':
+                        self._restore_from_writer(journal_file, item[1], item[2], item[3])
+
+                if unsynced and (time.monotonic() - last_sync >= self.FSYNC_INTERVAL):
+                    self._sync(journal_file)
+                    unsynced = False
+                    last_sync = time.monotonic()
+                if snapshot_requested or (records_since_snapshot >= self.COMPACT_THRESHOLD):
+                    snapshot_requested = False
+                    if journal_file is not None:
+                        journal_file.close()
+                        generation += 1
+                        journal_file = self._compact(corpus_dir, store, generation)
+                        records_since_snapshot = 0
+                        unsynced = False
+            except Exception:
+                self.log(traceback.format_exc(), logging.ERROR)
+                if (item is not None) and (not isinstance(item, bytes)) and (item[0] == 'flush'):
+                    item[1].set()
+
+    def _restore_from_writer(self, journal_file, corpus_dir: str, corpus_size: int, restored: Future):
+        try:
+            # The records written so far only need to reach the operating system to be read back
+            if journal_file is not None:
+                journal_file.flush()
+            restored.set_result(self._read(corpus_dir, corpus_size))
+        except Exception as e:
+            restored.set_exception(e)
+
+    @staticmethod
+    def _sync(journal_file):
+        if journal_file is None:
+            return
+        journal_file.flush()
+        os.fsync(journal_file.fileno())
+
+    def _compact(self, corpus_dir: str, store: AnnotationStore, generation: int):
+        """
+        Writes a snapshot of the store and starts a new journal of the given generation.
+        :return: the new journal file, opened for appending
+        """
+        # Changes made while the snapshot is taken are also in the queue, and replaying them is idempotent
+        codes: np.ndarray = store.codes.copy()
+        categories: np.ndarray = np.array(list(store.category_table), dtype=np.str_)
+        default_category: Optional[str] = self.default_category
+        default_arr: np.ndarray = np.array([] if default_category is None else [default_category], dtype=np.str_)
+
+        snapshot_path: str = join(corpus_dir, self.SNAPSHOT_FILE)
+        tmp_path: str = snapshot_path + '.tmp'
+        with open(tmp_path, 'wb') as snapshot_file:
+            np.savez(snapshot_file, codes=codes, categories=categories, default=default_arr,
+                     generation=np.array(generation))
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+        os.replace(tmp_path, snapshot_path)
+
+        journal_path: str = join(corpus_dir, self.JOURNAL_FILE)
+        journal_file = open(journal_path, 'wb')
+        journal_file.write(self.HEADER.pack(self.MAGIC, generation))
+        self._sync(journal_file)
+        return journal_file
@@ -0,0 +1,777 @@
+import logging
+import re
+import traceback
+from typing import Optional, TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+from pandas import Series
+
+from atap_annotator.annotator.AnnotationHistory import AnnotationHistory
+from atap_annotator.annotator.AnnotationJournal import AnnotationJournal
+from atap_annotator.annotator.AnnotationStore import AnnotationStore
+from atap_annotator.annotator.CategoryIndex import CategoryIndex
+from atap_annotator.annotator.CorpusView import CorpusView
+
+if TYPE_CHECKING:
+    from atap_corpus.corpus.corpus import DataFrameCorpus
+
+    from atap_annotator.annotator.SessionAgreement import SessionAgreement
+    from atap_annotator.annotator.SessionAnnotationFiles import SessionAnnotationFiles
+    from atap_annotator.annotator.SessionDuplicates import SessionDuplicates
+    from atap_annotator.annotator.SessionSearch import SessionSearch
+    from atap_annotator.annotator.SessionSuggestions import SessionSuggestions
+    from atap_annotator.annotator.SessionWorkUnits import SessionWorkUnits
+
+
+class AnnotationSession:
+    """
+    The annotation state of a single corpus, independent of any user interface.
+    Holds the selected corpus, the annotations and categories, and the current document, and provides saving,
+    journalling and bulk assignment. It does not import Panel, so it can be used in scripts and worker processes.
+    Document indices are one-based. Invalid input raises a ValueError.
+    Navigation can be restricted to a sequence of documents, such as a work unit, in which case moving to the next or
+    previous document and finding the next document with a category follow the order of the sequence.
+    Work units, near-duplicate clusters, suggestions, search, agreement and annotation files are provided by
+    collaborators that are created, and their modules imported, the first time they are used.
+    """
+    MIN_DOCUMENT_IDX: int = 1
+    DEFAULT_CATEGORIES_COL: str = 'annotation'
+    DEFAULT_STATE: str = 'Default'
+    UNSET_STATE: str = 'Unset'
+    DEFAULT_LOGGER_NAME: str = 'corpus-annotator'
+    # Changes to more documents than this at once are journalled with a snapshot rather than a record per document
+    MAX_JOURNAL_RECORDS: int = 1000
+
+    def log(self, msg: str, level: int):
+        logger = logging.getLogger(self.logger_name)
+        logger.log(level, msg)
+
+    def __init__(self, corpus: Optional['DataFrameCorpus'] = None, journal_dir: Optional[str] = None,
+                 logger_name: str = DEFAULT_LOGGER_NAME, cache_dir: Optional[str] = None,
+                 history_size: int = AnnotationHistory.DEFAULT_MAX_SIZE):
+        self.logger_name: str = logger_name
+        self.cache_dir: Optional[str] = cache_dir
+        self.corpus: Optional['DataFrameCorpus'] = None
+        self.corpus_view: Optional[CorpusView] = None
+        self.annotations: Optional[AnnotationStore] = None
+        self.category_index: Optional[CategoryIndex] = None
+        self.history = AnnotationHistory(history_size)
+        self.curr_document_idx: int = self.MIN_DOCUMENT_IDX
+        self.categories: list[str] = []
+        self.default_category: Optional[str] = None
+        self.saved_corpus: Optional['DataFrameCorpus'] = None
+        self.saved_meta: Optional[str] = None
+        # The meta of the selected corpus whose values filled the unset annotations when the corpus was saved
+        self.saved_fill_meta: Optional[str] = None
+        self.navigation_sequence: Optional[np.ndarray] = None
+        self.navigation_name: Optional[str] = None
+        self.navigation_position: int = 0
+        # The position of each document in the navigation sequence, or -1 if it is not in the sequence
+        self.navigation_positions: Optional[np.ndarray] = None
+        self._work_units: Optional['SessionWorkUnits'] = None
+        self._duplicates: Optional['SessionDuplicates'] = None
+        self._suggestions: Optional['SessionSuggestions'] = None
+        self._search: Optional['SessionSearch'] = None
+        self._agreement: Optional['SessionAgreement'] = None
+        self._annotation_files: Optional['SessionAnnotationFiles'] = None
+        self.journal: Optional[AnnotationJournal] = None
+        if journal_dir is not None:
+            self.journal = AnnotationJournal(journal_dir, logger_name)
+
+        if corpus is not None:
+            self.set_corpus(corpus)
+
+    def close(self):
+        """
+        Writes out and stops the journal and stops the category model worker process
+        """
+        if self.journal is not None:
+            self.journal.close()
+        if self._suggestions is not None:
+            self._suggestions.close()
+
+    # Collaborators
+
+    @property
+    def work_units(self) -> 'SessionWorkUnits':
+        if self._work_units is None:
+            from atap_annotator.annotator.SessionWorkUnits import SessionWorkUnits
+
+            self._work_units = SessionWorkUnits(self)
+        return self._work_units
+
+    @property
+    def duplicates(self) -> 'SessionDuplicates':
+        if self._duplicates is None:
+            from atap_annotator.annotator.SessionDuplicates import SessionDuplicates
+
+            self._duplicates = SessionDuplicates(self)
+        return self._duplicates
+
+    @property
+    def suggestions(self) -> 'SessionSuggestions':
+        if self._suggestions is None:
+            from atap_annotator.annotator.SessionSuggestions import SessionSuggestions
+
+            self._suggestions = SessionSuggestions(self)
+        return self._suggestions
+
+    @property
+    def search(self) -> 'SessionSearch':
+        if self._search is None:
+            from atap_annotator.annotator.SessionSearch import SessionSearch
+
+            self._search = SessionSearch(self)
+        return self._search
+
+    @property
+    def agreement(self) -> 'SessionAgreement':
+        if self._agreement is None:
+            from atap_annotator.annotator.SessionAgreement import SessionAgreement
+
+            self._agreement = SessionAgreement(self)
+        return self._agreement
+
+    @property
+    def annotation_files(self) -> 'SessionAnnotationFiles':
+        if self._annotation_files is None:
+            from atap_annotator.annotator.SessionAnnotationFiles import SessionAnnotationFiles
+
+            self._annotation_files = SessionAnnotationFiles(self)
+        return self._annotation_files
+
+    def _reset_collaborators(self):
+        # Clears the state derived from the previously selected corpus without creating unused collaborators
+        for collaborator in (self._work_units, self._duplicates, self._suggestions, self._search):
+            if collaborator is not None:
+                collaborator.reset()
+
+    def has_duplicate_clusters(self) -> bool:
+        return (self._duplicates is not None) and self._duplicates.has_clusters()
+
+    def get_indexed_count(self) -> Optional[int]:
+        """
+        :return: the number of documents indexed for search, or None if the documents have not been indexed
+        """
+        if self._search is None:
+            return None
+        return self._search.get_indexed_count()
+
+    def get_trained_count(self) -> Optional[int]:
+        """
+        :return: the number of annotated documents the suggestions were trained on, or None if there are no suggestions
+        """
+        if (self._suggestions is None) or (not self._suggestions.has_suggestions()):
+            return None
+        return self._suggestions.trained_annotation_count
+
+    # Corpus selection
+
+    def set_corpus(self, corpus: Optional['DataFrameCorpus']) -> Optional[int]:
+        """
+        Selects the corpus to annotate, restoring its journalled annotations if a journal directory was provided.
+        :return: the number of annotations restored from the journal, or None if nothing was restored
+        """
+        restored_count: Optional[int] = None
+        if corpus is None:
+            self.corpus = None
+            self.corpus_view = None
+            self._set_annotations(None)
+            if self.journal is not None:
+                self.journal.detach()
+        else:
+            self.corpus = corpus
+            self.corpus_view = CorpusView(corpus)
+            self._set_annotations(AnnotationStore(len(self.corpus_view)))
+            self.default_category = None
+            self.set_saved_corpus(None, None)
+            restored_count = self._restore_annotations()
+        self.clear_navigation_sequence()
+        self._reset_collaborators()
+        self.curr_document_idx = self.MIN_DOCUMENT_IDX
+
+        return restored_count
+
+    def _set_annotations(self, annotations: Optional[AnnotationStore]):
+        self.annotations = annotations
+        self.history.clear()
+        if annotations is None:
+            self.category_index = None
+        else:
+            self.category_index = CategoryIndex(annotations)
+
+    def _restore_annotations(self) -> Optional[int]:
+        # Restores the journalled annotations of the selected corpus and begins journalling further changes
+        if self.journal is None:
+            return None
+        corpus_size: int = len(self.annotations)
+        generation: int = 0
+        restored_count: Optional[int] = None
+        try:
+            restored = self.journal.restore(self.corpus.name, corpus_size, self.get_journal_fingerprint())
+        except Exception:
+            self.log(traceback.format_exc(), logging.ERROR)
+            restored = None
+        if restored is not None:
+            restored_store, self.default_category, generation = restored
+            self._set_annotations(restored_store)
+            self.categories = self.annotations.get_used_categories()
+            if (self.default_category is not None) and (self.default_category not in self.categories):
+                self.categories.append(self.default_category)
+            restored_count = int((self.annotations.codes != AnnotationStore.DEFAULT_CODE).sum())
+        self._attach_journal(generation)
+
+        return restored_count
+
+    def get_document_fingerprint(self) -> str:
+        # Reads every document, so is only used by the background tasks that cache to disk
+        return self.corpus_view.get_fingerprint(self.corpus._COL_DOC)
+
+    def get_journal_fingerprint(self) -> str:
+        # Computed whenever a corpus is selected, so samples the documents rather than reading all of them
+        return self.corpus_view.get_sample_fingerprint(self.corpus._COL_DOC)
+
+    def _attach_journal(self, generation: int = 0):
+        if self.journal is None:
+            return
+        self.journal.attach(self.corpus.name, len(self.annotations), self.get_journal_fingerprint(),
+                            self.annotations, self.default_category, generation)
+
+    def get_all_metas(self) -> list[str]:
+        if self.corpus is None:
+            return []
+        return [self.corpus._COL_DOC] + self.corpus.metas
+
+    def get_categorical_metas(self) -> list[str]:
+        if self.corpus is None:
+            return []
+        return self.corpus_view.get_categorical_columns()
+
+    def get_meta_str(self, document_idx: int, meta: str) -> str:
+        if (self.corpus is None) or (meta not in self.get_all_metas()):
+            return ""
+        return str(self.corpus_view.get_cell(document_idx, meta))
+
+    def load_annotated_meta(self, meta: str) -> bool:
+        """
+        Replaces the annotations with the values of a categorical meta of the selected corpus.
+        :return: True if the meta was loaded, False if it does not exist or is not categorical
+        """
+        if (self.corpus_view is None) or (meta not in self.get_categorical_metas()):
+            return False
+        self._set_annotations(AnnotationStore.from_categorical(self.corpus_view.get_column(meta)))
+        self.categories = self.annotations.get_used_categories()
+        self._attach_journal()
+        return True
+
+    def set_imported_annotations(self, annotations: AnnotationStore, categories: list[str],
+                                 default_category: Optional[str]):
+        """
+        Replaces the annotations, categories and default category with those read by read_annotations()
+        :raises ValueError: if the annotations do not match the selected corpus
+        """
+        if (self.annotations is None) or (len(annotations) != len(self.annotations)):
+            raise ValueError("The annotations do not match the selected corpus")
+        self._set_annotations(annotations)
+        self.categories = list(categories)
+        for category in annotations.get_used_categories() + [default_category]:
+            if (category is not None) and (category not in self.categories):
+                self.categories.append(category)
+        self.default_category = default_category
+        if self._suggestions is not None:
+            self._suggestions.clear_suggestions()
+        self._attach_journal()
+
+    # Categories
+
+    def add_category(self, category: str):
+        if category in self.categories:
+            raise ValueError("This category has already been added")
+        if len(category) == 0:
+            raise ValueError("Category cannot be empty")
+        self.categories.append(category)
+        self.log(f"Category added: {category}", logging.DEBUG)
+
+    def remove_category(self, category: str):
+        if category in self.categories:
+            self.categories.remove(category)
+            self.log(f"Category removed: {category}", logging.DEBUG)
+
+    def get_all_categories(self) -> list[str]:
+        return self.categories.copy()
+
+    def get_default_category(self) -> Optional[str]:
+        return self.default_category
+
+    def set_default_category(self, category: Optional[str]):
+        self.history.record_default(self.default_category, category)
+        self._apply_default_category(category)
+
+    def _apply_default_category(self, category: Optional[str]):
+        self.default_category = category
+        if self.journal is not None:
+            self.journal.record_default(category)
+        self.log(f"Set default category to {category}", logging.DEBUG)
+
+    # Navigation
+
+    def get_min_document_idx(self) -> int:
+        return self.MIN_DOCUMENT_IDX
+
+    def get_max_document_idx(self) -> int:
+        if self.annotations is None:
+            return self.MIN_DOCUMENT_IDX
+        return max(len(self.annotations), self.MIN_DOCUMENT_IDX)
+
+    def set_curr_document_idx(self, new_document_idx: int) -> int:
+        """
+        Sets the current document, clamped to the range of the corpus.
+        :return: the new current document index
+        """
+        new_document_idx = min(new_document_idx, self.get_max_document_idx())
+        new_document_idx = max(new_document_idx, self.get_min_document_idx())
+        self.curr_document_idx = new_document_idx
+        if self.navigation_positions is not None:
+            sequence_position: int = int(self.navigation_positions[new_document_idx - self.MIN_DOCUMENT_IDX])
+            if sequence_position >= 0:
+                self.navigation_position = sequence_position
+
+        return new_document_idx
+
+    def get_next_document_idx(self) -> int:
+        """
+        :return: the index of the document after the current one, following the navigation sequence if one is set
+        """
+        return self._get_adjacent_document_idx(1)
+
+    def get_prev_document_idx(self) -> int:
+        """
+        :return: the index of the document before the current one, following the navigation sequence if one is set
+        """
+        return self._get_adjacent_document_idx(-1)
+
+    def _get_adjacent_document_idx(self, step: int) -> int:
+        if self.navigation_sequence is None:
+            return self.curr_document_idx + step
+        if self.navigation_sequence[self.navigation_position] != self.curr_document_idx:
+            # The current document is outside the sequence, so the sequence is resumed where it was left
+            step = 0 if step > 0 else -1
+        position: int = min(max(self.navigation_position + step, 0), len(self.navigation_sequence) - 1)
+        return int(self.navigation_sequence[position])
+
+    def set_navigation_sequence(self, document_indices: np.ndarray, name: Optional[str] = None):
+        """
+        Restricts navigation to the provided documents, in the order provided, and moves to the first of them.
+        Indices outside the corpus and repeated indices are ignored.
+        :param name: describes the sequence, e.g. the name of a work unit
+        :raises ValueError: if none of the indices are within the corpus
+        """
+        indices: np.ndarray = np.asarray(document_indices, dtype=np.int64)
+        in_range: np.ndarray = (indices >= self.get_min_document_idx()) & (indices <= self.get_max_document_idx())
+        indices = indices[in_range]
+        _, first_positions = np.unique(indices, return_index=True)
+        indices = indices[np.sort(first_positions)]
+        if (self.annotations is None) or (len(indices) == 0):
+            raise ValueError("No documents to navigate")
+        self.navigation_sequence = indices
+        self.navigation_name = name
+        self.navigation_position = 0
+        position_dtype = np.int32 if len(self.annotations) < np.iinfo(np.int32).max else np.int64
+        self.navigation_positions = np.full(len(self.annotations), -1, dtype=position_dtype)
+        self.navigation_positions[indices - self.MIN_DOCUMENT_IDX] = np.arange(len(indices), dtype=position_dtype)
+        self.curr_document_idx = int(indices[0])
+        self.log(f"Set navigation sequence {name} of {len(indices)} documents", logging.DEBUG)
+
+    def clear_navigation_sequence(self):
+        self.navigation_sequence = None
+        self.navigation_name = None
+        self.navigation_position = 0
+        self.navigation_positions = None
+
+    def get_navigation_str(self) -> str:
+        """
+        :return: describes the position of the current document in the navigation sequence and the size of its
+        near-duplicate cluster. Empty if no sequence or clusters are set
+        """
+        navigation_info: list[str] = []
+        if self.navigation_sequence is not None:
+            if self.navigation_sequence[self.navigation_position] != self.curr_document_idx:
+                navigation_info.append(f"{self.navigation_name}: outside of sequence")
+            else:
+                navigation_info.append(f"{self.navigation_name}: {self.navigation_position + 1:,} of "
+                                       f"{len(self.navigation_sequence):,}")
+        if self.has_duplicate_clusters():
+            cluster_size: int = len(self._duplicates.get_members(self.curr_document_idx))
+            if cluster_size > 1:
+                navigation_info.append(f"Near-duplicate cluster of {cluster_size:,} documents")
+        return ' | '.join(navigation_info)
+
+    def find_next_unannotated(self) -> Optional[int]:
+        """
+        :return: the index of the next document after the current one that has not been explicitly annotated,
+        wrapping around to the start of the corpus. None if every document is annotated
+        """
+        return self._find_next_code([AnnotationStore.DEFAULT_CODE, AnnotationStore.UNSET_CODE])
+
+    def find_next_with_category(self, category: str) -> Optional[int]:
+        """
+        :return: the index of the next document after the current one explicitly annotated with the category,
+        wrapping around to the start of the corpus. None if no document has the category
+        """
+        if self.annotations is None:
+            return None
+        code: Optional[int] = self.annotations.category_codes.get(category)
+        if code is None:
+            return None
+        return self._find_next_code([code])
+
+    def _find_next_code(self, codes: list[int]) -> Optional[int]:
+        if (self.category_index is None) or (len(self.annotations) == 0):
+            return None
+        if self.navigation_sequence is not None:
+            return self._find_next_code_in_sequence(codes)
+        start_position: int = self.curr_document_idx - self.MIN_DOCUMENT_IDX + 1
+        found: Optional[int] = self.category_index.find_next(start_position % len(self.annotations), codes)
+        if found is None:
+            return None
+        return found + self.MIN_DOCUMENT_IDX
+
+    def _find_next_code_in_sequence(self, codes: list[int]) -> Optional[int]:
+        # Searches the sequence in order after the current position, wrapping around to its start
+        sequence: np.ndarray = np.roll(self.navigation_sequence, -(self.navigation_position + 1))
+        matches: np.ndarray = np.flatnonzero(np.isin(self.annotations.codes[sequence - self.MIN_DOCUMENT_IDX], codes))
+        if len(matches) == 0:
+            return None
+        return int(sequence[matches[0]])
+
+    # Annotation
+
+    def get_annotated_count(self) -> int:
+        if self.category_index is None:
+            return 0
+        return len(self.annotations) - self.category_index.get_count(AnnotationStore.DEFAULT_CODE) - \
+            self.category_index.get_count(AnnotationStore.UNSET_CODE)
+
+    def get_document_category(self, document_idx: int) -> Optional[str]:
+        if self.annotations is None:
+            return ''
+        position: int = document_idx - self.MIN_DOCUMENT_IDX
+        return self.annotations.get_category(position, self.get_default_category())
+
+    def get_curr_category(self) -> Optional[str]:
+        return self.get_document_category(self.curr_document_idx)
+
+    def set_document_category(self, document_idx: int, category: Optional[str]):
+        if self.annotations is None:
+            return
+        if self.has_duplicate_clusters() and self._duplicates.propagate:
+            cluster_positions: np.ndarray = self._duplicates.get_members(document_idx) - self.MIN_DOCUMENT_IDX
+            if len(cluster_positions) > 1:
+                self._set_positions_category(cluster_positions, category)
+                self.log(f"Set category for the cluster of document {document_idx} to {category}", logging.DEBUG)
+                return
+        position: int = document_idx - self.MIN_DOCUMENT_IDX
+        old_code: int = int(self.annotations.codes[position])
+        self.annotations.set_category(position, category)
+        new_code: int = int(self.annotations.codes[position])
+        self.category_index.update(position, old_code, new_code)
+        self.history.record_set(position, old_code, new_code)
+        if self.journal is not None:
+            self.journal.record_category(position)
+        self.log(f"Set category for document {document_idx} to {category}", logging.DEBUG)
+
+    def _set_positions_category(self, positions: np.ndarray, category: Optional[str]):
+        # Sets the category of several documents as a single change in the history
+        old_codes: np.ndarray = self.annotations.codes[positions]
+        self.annotations.set_categories(positions, category)
+        new_code: int = self.annotations.get_code(category)
+        self.category_index.update_many(positions, old_codes, new_code)
+        self.history.record_bulk(positions, old_codes, new_code)
+        self._journal_positions(positions)
+
+    def _journal_positions(self, positions: np.ndarray):
+        if self.journal is None:
+            return
+        if len(positions) > self.MAX_JOURNAL_RECORDS:
+            self.journal.snapshot()
+            return
+        for position in positions:
+            self.journal.record_category(int(position))
+
+    # Undo and redo
+
+    def can_undo(self) -> bool:
+        return self.history.can_undo()
+
+    def can_redo(self) -> bool:
+        return self.history.can_redo()
+
+    def undo(self) -> Optional[int]:
+        """
+        Reverts the most recent change to the annotations or the default category.
+        :return: the index of the first document changed, the current document index for a change of the default
+        category, or None if there is nothing to undo
+        """
+        change: Optional[AnnotationHistory.Change] = self.history.pop_undo()
+        if change is None:
+            return None
+        return self._apply_change(change, undo=True)
+
+    def redo(self) -> Optional[int]:
+        """
+        Reapplies the most recently undone change.
+        :return: as for undo()
+        """
+        change: Optional[AnnotationHistory.Change] = self.history.pop_redo()
+        if change is None:
+            return None
+        return self._apply_change(change, undo=False)
+
+    def _apply_change(self, change: AnnotationHistory.Change, undo: bool) -> int:
+        op, positions, old_value, new_value = change
+        target_value = old_value if undo else new_value
+        if op == AnnotationHistory.DEFAULT_OP:
+            self._apply_default_category(target_value)
+            if (target_value is not None) and (target_value not in self.categories):
+                self.categories.append(target_value)
+            return self.curr_document_idx
+
+        positions = np.atleast_1d(np.asarray(positions, dtype=np.int64))
+        curr_codes: np.ndarray = self.annotations.codes[positions]
+        self.annotations.codes[positions] = target_value
+        self.category_index.update_many(positions, curr_codes, target_value)
+        self._journal_positions(positions)
+        # Categories removed from the selection since the change was made are restored with it
+        for code in np.unique(np.atleast_1d(target_value)):
+            if code >= 0:
+                category: str = self.annotations.category_table[int(code)]
+                if category not in self.categories:
+                    self.categories.append(category)
+        self.log(f"{'Undid' if undo else 'Redid'} a change to {len(positions)} documents", logging.DEBUG)
+        return int(positions[0]) + self.MIN_DOCUMENT_IDX
+
+    def set_curr_category(self, category: Optional[str]):
+        self.set_document_category(self.curr_document_idx, category)
+
+    def get_category_counts(self) -> dict[str, int]:
+        """
+        :return: the number of documents explicitly annotated with each category, followed by the number of documents
+        that take the default category and the number that are unset
+        """
+        if self.category_index is None:
+            return {}
+        counts: dict[str, int] = {}
+        for category in self.categories:
+            code: Optional[int] = self.annotations.category_codes.get(category)
+            counts[category] = 0 if code is None else self.category_index.get_count(code)
+        counts[self.DEFAULT_STATE] = self.category_index.get_count(AnnotationStore.DEFAULT_CODE)
+        counts[self.UNSET_STATE] = self.category_index.get_count(AnnotationStore.UNSET_CODE)
+        return counts
+
+    # Bulk annotation
+
+    def _get_match_indices(self, mask: np.ndarray) -> np.ndarray:
+        return np.flatnonzero(mask) + self.MIN_DOCUMENT_IDX
+
+    def _get_string_column(self, meta: str) -> Optional[Series]:
+        if (self.corpus_view is None) or (meta not in self.get_all_metas()):
+            return None
+        return self.corpus_view.get_column(meta).astype('string')
+
+    def match_regex(self, pattern: str, meta: str) -> Optional[np.ndarray]:
+        """
+        :return: the indices of the documents whose meta value contains a match for the regular expression. None if
+        the meta does not exist
+        :raises ValueError: if the pattern is not a valid regular expression
+        """
+        try:
+            compiled_pattern: re.Pattern = re.compile(pattern)
+        except re.error as e:
+            raise ValueError(f"Invalid regular expression: {e}")
+        meta_col: Optional[Series] = self._get_string_column(meta)
+        if meta_col is None:
+            return None
+        mask: Series = meta_col.str.contains(compiled_pattern, na=False)
+        return self._get_match_indices(mask.to_numpy(dtype=bool))
+
+    def match_value(self, meta: str, value: str) -> Optional[np.ndarray]:
+        """
+        :return: the indices of the documents whose meta value is equal to the provided value when compared as strings.
+        None if the meta does not exist
+        """
+        meta_col: Optional[Series] = self._get_string_column(meta)
+        if meta_col is None:
+            return None
+        mask: Series = (meta_col == value).fillna(False)
+        return self._get_match_indices(mask.to_numpy(dtype=bool))
+
+    def match_range(self, meta: str, lower: Optional[float], upper: Optional[float]) -> Optional[np.ndarray]:
+        """
+        :return: the indices of the documents whose numeric meta value is within the inclusive range. An omitted bound
+        is unbounded. Non-numeric values never match. None if the meta does not exist
+        """
+        if (self.corpus_view is None) or (meta not in self.get_all_metas()):
+            return None
+        meta_col: Series = self.corpus_view.get_column(meta)
+        numeric_col: np.ndarray = pd.to_numeric(meta_col, errors='coerce').to_numpy(dtype=float)
+        mask: np.ndarray = ~np.isnan(numeric_col)
+        if lower is not None:
+            mask &= numeric_col >= lower
+        if upper is not None:
+            mask &= numeric_col <= upper
+        return self._get_match_indices(mask)
+
+    def match_indices(self, document_indices: np.ndarray) -> np.ndarray:
+        """
+        :return: the provided document indices that are within the corpus, sorted and without duplicates
+        """
+        indices: np.ndarray = np.unique(np.asarray(document_indices, dtype=np.int64))
+        if self.annotations is None:
+            return indices[:0]
+        in_range: np.ndarray = (indices >= self.get_min_document_idx()) & (indices <= self.get_max_document_idx())
+        return indices[in_range]
+
+    def assign_category(self, document_indices: np.ndarray, category: Optional[str]):
+        if (self.annotations is None) or (len(document_indices) == 0):
+            return
+        positions: np.ndarray = np.asarray(document_indices, dtype=np.int64) - self.MIN_DOCUMENT_IDX
+        self._set_positions_category(positions, category)
+        self.log(f"Set category for {len(positions)} documents to {category}", logging.DEBUG)
+
+    # Saving
+
+    def get_annotations_col(self) -> Series:
+        """
+        :return: the annotations as a categorical Series in corpus order. Documents with the default category are
+        empty strings and unset documents are NaN
+        """
+        if self.annotations is None:
+            return Series([], dtype='category')
+        return Series(self.annotations.to_categorical())
+
+    def build_annotated_corpus(self, new_name: Optional[str], selected_meta: str, overwrite_meta: bool,
+                               annotations_col: Optional[Series] = None,
+                               source_corpus: Optional['DataFrameCorpus'] = None) -> tuple['DataFrameCorpus', str]:
+        """
+        Builds a copy of the selected corpus with the annotations added as a categorical meta.
+        If overwrite_meta is True, selected_meta is replaced and unset annotations keep the original meta value.
+        The selected corpus is not modified.
+        :param annotations_col: the annotations to save, as returned by get_annotations_col(). Taken from the current
+        annotations if not provided
+        :param source_corpus: the corpus the annotations were taken from. Defaults to the selected corpus, and must be
+        provided when run on a background thread, as another corpus may be selected in the meantime
+        :return: the new corpus and the name of the annotation meta
+        :raises ValueError: if no corpus is selected or the annotations do not match the source corpus
+        """
+        if source_corpus is None:
+            source_corpus = self.corpus
+        if source_corpus is None:
+            raise ValueError("No corpus selected")
+        if annotations_col is None:
+            annotations_col = self.get_annotations_col()
+        if len(annotations_col) != len(source_corpus):
+            raise ValueError("The annotations do not match the source corpus")
+        if (new_name is not None) and (len(new_name) == 0):
+            new_name = None
+        new_corpus: 'DataFrameCorpus' = self.copy_corpus(source_corpus, len(annotations_col), new_name)
+        if overwrite_meta:
+            orig_col: Series = new_corpus[selected_meta].reset_index(drop=True)
+            annotations_col = self._fill_unset(annotations_col, orig_col)
+            new_corpus.remove_meta(selected_meta)
+        annotations_col_name: str = self.get_new_column_name(selected_meta, set(new_corpus.metas))
+        meta_name: str = self.replace_meta(new_corpus, None, annotations_col, annotations_col_name)
+
+        return new_corpus, meta_name
+
+    def update_saved_corpus(self, annotations_col: Optional[Series] = None) -> Optional[tuple['DataFrameCorpus', str]]:
+        """
+        Replaces the annotation meta of the corpus most recently saved from the selected corpus.
+        :return: the saved corpus and the name of the annotation meta, or None if no corpus has been saved
+        """
+        meta_col: Optional[Series] = self.build_saved_meta_col(annotations_col)
+        if meta_col is None:
+            return None
+        return self.set_saved_meta_col(meta_col)
+
+    def build_saved_meta_col(self, annotations_col: Optional[Series] = None) -> Optional[Series]:
+        """
+        Builds the annotation meta of the corpus most recently saved from the selected corpus, filling the unset
+        annotations from the same meta as when it was first saved. The session state is not changed, so it can be run
+        on a background thread. The result is applied with set_saved_meta_col()
+        :return: the annotation meta, or None if no corpus has been saved
+        """
+        if self.saved_corpus is None:
+            return None
+        if annotations_col is None:
+            annotations_col = self.get_annotations_col()
+        if self.saved_fill_meta is not None:
+            orig_col: Series = self.corpus_view.get_column(self.saved_fill_meta)
+            annotations_col = self._fill_unset(annotations_col, orig_col)
+        return annotations_col
+
+    def set_saved_meta_col(self, meta_col: Series) -> tuple['DataFrameCorpus', str]:
+        """
+        Replaces the annotation meta of the saved corpus with the meta built by build_saved_meta_col()
+        :return: the saved corpus and the name of the annotation meta
+        :raises ValueError: if no corpus has been saved or the meta does not match it
+        """
+        if (self.saved_corpus is None) or (len(meta_col) != len(self.annotations)):
+            raise ValueError("The annotations do not match the saved corpus")
+        self.replace_meta(self.saved_corpus, self.saved_meta, meta_col)
+        return self.saved_corpus, self.saved_meta
+
+    def set_saved_corpus(self, saved_corpus: Optional['DataFrameCorpus'], saved_meta: Optional[str],
+                         fill_meta: Optional[str] = None):
+        """
+        :param fill_meta: the meta of the selected corpus that filled the unset annotations when saved_corpus was
+        built, i.e. the selected_meta of build_annotated_corpus() if overwrite_meta was True
+        """
+        self.saved_corpus = saved_corpus
+        self.saved_meta = saved_meta
+        self.saved_fill_meta = fill_meta
+
+    def get_new_column_name(self, provided_name: str, existing_columns: set[str]) -> str:
+        iteration: int = 0
+        if len(provided_name) == 0:
+            provided_name = self.DEFAULT_CATEGORIES_COL
+        while provided_name in existing_columns:
+            provided_name = f"{provided_name}_{iteration}"
+            iteration += 1
+
+        return provided_name
+
+    @staticmethod
+    def copy_corpus(corpus: 'DataFrameCorpus', corpus_size: int, new_name: Optional[str]) -> 'DataFrameCorpus':
+        mask: Series = Series(np.ones(corpus_size, dtype=bool))
+        cloned_corpus: 'DataFrameCorpus' = corpus.cloned(mask, new_name)
+        new_name = cloned_corpus.name
+        new_corpus: 'DataFrameCorpus' = cloned_corpus.detached()
+        del cloned_corpus
+        new_corpus.rename(new_name)
+        return new_corpus
+
+    @staticmethod
+    def _fill_unset(annotations_col: Series, orig_col: Series) -> Series:
+        # Fills the unset annotations with the original meta values by aligning the categories of both columns
+        orig_col = orig_col.astype(str).where(orig_col.notna()).astype('category')
+        categories = annotations_col.cat.categories.union(orig_col.cat.categories)
+        annotations_col = annotations_col.cat.set_categories(categories)
+        orig_col = orig_col.cat.set_categories(categories)
+        return annotations_col.where(annotations_col.notna(), orig_col)
+
+    @staticmethod
+    def replace_meta(corpus: 'DataFrameCorpus', old_meta: Optional[str], meta_col: Series,
+                      new_meta: Optional[str] = None) -> str:
+        """
+        Replaces old_meta in the corpus with meta_col, named new_meta if provided, otherwise old_meta.
+        :return: the name the meta was added with, which may have been sanitised by the corpus
+        """
+        if new_meta is None:
+            new_meta = old_meta
+        if (old_meta is not None) and (old_meta in corpus.metas):
+            corpus.remove_meta(old_meta)
+        existing_metas: set[str] = set(corpus.metas)
+        corpus.add_meta(meta_col, name=new_meta)
+        added_metas: list[str] = [m for m in corpus.metas if m not in existing_metas]
+        return added_metas[0] if len(added_metas) else new_meta
@@ -0,0 +1,130 @@
+import json
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from pandas import Series
+
+from atap_annotator.annotator.AnnotationStore import AnnotationStore
+from atap_annotator.annotator.CorpusView import CorpusView
+
+
+class AnnotationSidecar:
+    """
+    Exports and imports the annotation state of a corpus as a Parquet file holding only the annotated documents,
+    without their text. Each row is a document key and its category code, and the category table, the category list
+    and the default category are stored in the file metadata.
+    Documents are keyed either by a hash of their text, so annotations can be imported into another version of the
+    corpus in which documents were added, removed or reordered, or by the values of a meta such as a document id.
+    Rows are written in chunks of CHUNK_SIZE, and importing matches the keys with a single hash join.
+    """
+    FORMAT_VERSION: int = 1
+    METADATA_KEY: bytes = b'atap_annotator'
+    KEY_COL: str = 'key'
+    CODE_COL: str = 'code'
+    # The key stored in the metadata when documents are keyed by a hash of their text
+    CONTENT_KEY: str = ''
+    CHUNK_SIZE: int = 1000000
+    FILE_EXTENSION: str = '.annotations.parquet'
+
+    @staticmethod
+    def hash_documents(docs: Series) -> np.ndarray:
+        return pd.util.hash_pandas_object(docs.reset_index(drop=True), index=False).to_numpy()
+
+    @classmethod
+    def _get_key_column(cls, corpus_view: CorpusView, key_meta: Optional[str]) -> Series:
+        if key_meta is None:
+            return corpus_view.get_column(corpus_view.corpus._COL_DOC)
+        if key_meta not in corpus_view.get_columns():
+            raise ValueError(f"The metadata {key_meta} is not in the corpus")
+        return corpus_view.get_column(key_meta)
+
+    @classmethod
+    def write(cls, file_path: str, corpus_view: CorpusView, store: AnnotationStore, categories: list[str],
+              default_category: Optional[str], key_meta: Optional[str] = None) -> int:
+        """
+        Writes every document not taking the default category to file_path.
+        :param categories: the categories offered for annotation, stored so they can be restored on import
+        :param key_meta: the meta that identifies each document. Documents are keyed by a hash of their text if None
+        :return: the number of documents written
+        :raises ValueError: if key_meta is not in the corpus
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        key_col: Series = cls._get_key_column(corpus_view, key_meta)
+        positions: np.ndarray = np.flatnonzero(store.codes != AnnotationStore.DEFAULT_CODE)
+        metadata: dict = {
+            'format_version': cls.FORMAT_VERSION,
+            'key': cls.CONTENT_KEY if key_meta is None else key_meta,
+            'category_table': store.category_table,
+            'categories': categories,
+            'default_category': default_category,
+            'corpus_name': corpus_view.corpus.name,
+            'corpus_size': len(corpus_view)
+        }
+
+        writer: Optional[pq.ParquetWriter] = None
+        try:
+            # At least one chunk is written so the file has a schema when no document is annotated
+            for chunk_start in range(0, max(len(positions), 1), cls.CHUNK_SIZE):
+                chunk_positions: np.ndarray = positions[chunk_start:chunk_start + cls.CHUNK_SIZE]
+                chunk_keys = key_col.iloc[chunk_positions]
+                if key_meta is None:
+                    chunk_keys = cls.hash_documents(chunk_keys)
+                chunk_table: pa.Table = pa.table({
+                    cls.KEY_COL: pa.array(chunk_keys, from_pandas=True),
+                    cls.CODE_COL: pa.array(store.codes[chunk_positions], type=pa.int32())
+                })
+                if writer is None:
+                    schema: pa.Schema = chunk_table.schema.with_metadata({cls.METADATA_KEY: json.dumps(metadata)})
+                    writer = pq.ParquetWriter(file_path, schema)
+                writer.write_table(chunk_table.cast(writer.schema))
+        finally:
+            if writer is not None:
+                writer.close()
+        return len(positions)
+
+    @classmethod
+    def read(cls, file_path: str,
+             corpus_view: CorpusView) -> tuple[AnnotationStore, list[str], Optional[str], int, int]:
+        """
+        Reads the annotations in file_path and matches them to the documents of the corpus. Documents of the corpus
+        not in the file take the default category. If a key appears more than once in the file, its last row is used.
+        :return: the AnnotationStore of the corpus, the categories and the default category, the number of documents
+        of the corpus that were matched and the number of rows in the file
+        :raises ValueError: if the file was not written by write() or its key meta is not in the corpus
+        """
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(file_path, memory_map=True)
+        schema_metadata: Optional[dict[bytes, bytes]] = table.schema.metadata
+        if (schema_metadata is None) or (cls.METADATA_KEY not in schema_metadata):
+            raise ValueError(f"{file_path} is not an annotations file")
+        metadata: dict = json.loads(schema_metadata[cls.METADATA_KEY])
+        if metadata.get('format_version') != cls.FORMAT_VERSION:
+            raise ValueError(f"{file_path} has unsupported format version {metadata.get('format_version')}")
+
+        category_table: list[str] = metadata['category_table']
+        file_codes: np.ndarray = table.column(cls.CODE_COL).to_numpy().astype(AnnotationStore.CODE_DTYPE)
+        if len(file_codes) and ((file_codes.min() < AnnotationStore.UNSET_CODE) or
+                                (file_codes.max() >= len(category_table))):
+            raise ValueError(f"{file_path} contains category codes missing from its category table")
+
+        key_meta: Optional[str] = metadata['key'] if metadata['key'] != cls.CONTENT_KEY else None
+        corpus_keys = cls._get_key_column(corpus_view, key_meta)
+        if key_meta is None:
+            corpus_keys = cls.hash_documents(corpus_keys)
+        file_keys: pd.Index = pd.Index(table.column(cls.KEY_COL).to_pandas())
+        last_rows: np.ndarray = ~file_keys.duplicated(keep='last')
+        file_keys = file_keys[last_rows]
+        file_codes = file_codes[last_rows]
+
+        store = AnnotationStore(len(corpus_view))
+        for category in category_table:
+            store.get_code(category)
+        file_rows: np.ndarray = file_keys.get_indexer(corpus_keys)
+        matched: np.ndarray = file_rows >= 0
+        store.codes[matched] = file_codes[file_rows[matched]]
+
+        return store, metadata['categories'], metadata['default_category'], int(matched.sum()), table.num_rows
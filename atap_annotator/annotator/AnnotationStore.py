@@ -0,0 +1,104 @@
+from typing import Optional
+
+import numpy as np
+from pandas import Categorical, Series
+
+
+class AnnotationStore:
+    """
+    Holds the annotation state of every document in a corpus as an integer array of category codes.
+    Non-negative codes index into the category table. Negative codes are sentinels for documents that take the
+    default category and for documents whose category has been explicitly unset.
+    Positions are zero-based and follow the order of the documents in the corpus.
+    """
+    DEFAULT_CODE: int = -1
+    UNSET_CODE: int = -2
+    CODE_DTYPE = np.int32
+    # Documents that take the default category are stored in the corpus meta as an empty string
+    DEFAULT_LABEL: str = ''
+
+    def __init__(self, size: int):
+        self.codes: np.ndarray = np.full(size, self.DEFAULT_CODE, dtype=self.CODE_DTYPE)
+        self.category_table: list[str] = []
+        self.category_codes: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def copy(self) -> 'AnnotationStore':
+        store_copy = AnnotationStore(0)
+        store_copy.codes = self.codes.copy()
+        store_copy.category_table = self.category_table.copy()
+        store_copy.category_codes = self.category_codes.copy()
+        return store_copy
+
+    def get_code(self, category: Optional[str]) -> int:
+        """
+        Returns the code for the given category, adding the category to the category table if it is not present.
+        A category of None corresponds to the unset sentinel.
+        """
+        if category is None:
+            return self.UNSET_CODE
+        code: Optional[int] = self.category_codes.get(category)
+        if code is None:
+            code = len(self.category_table)
+            self.category_table.append(category)
+            self.category_codes[category] = code
+        return code
+
+    def get_category(self, position: int, default_category: Optional[str]) -> Optional[str]:
+        code: int = int(self.codes[position])
+        if code == self.DEFAULT_CODE:
+            return default_category
+        if code == self.UNSET_CODE:
+            return None
+        return self.category_table[code]
+
+    def set_category(self, position: int, category: Optional[str]):
+        self.codes[position] = self.get_code(category)
+
+    def set_categories(self, positions: np.ndarray, category: Optional[str]):
+        self.codes[positions] = self.get_code(category)
+
+    def get_used_categories(self) -> list[str]:
+        """
+        Returns the categories assigned to at least one document, in order of first appearance
+        """
+        assigned: np.ndarray = self.codes[self.codes >= 0]
+        unique_codes, first_positions = np.unique(assigned, return_index=True)
+        ordered_codes: np.ndarray = unique_codes[np.argsort(first_positions)]
+        return [self.category_table[code] for code in ordered_codes]
+
+    def to_categorical(self) -> Categorical:
+        """
+        Converts the annotations to a pandas Categorical suitable for inclusion in a corpus as a meta.
+        Documents with the default category become empty strings and unset documents become NaN.
+        """
+        default_code: int = len(self.category_table)
+        categories: list[str] = self.category_table + [self.DEFAULT_LABEL]
+        codes: np.ndarray = self.codes.copy()
+        codes[codes == self.DEFAULT_CODE] = default_code
+        codes[codes == self.UNSET_CODE] = -1
+        return Categorical.from_codes(codes, categories=categories).remove_unused_categories()
+
+    @classmethod
+    def from_categorical(cls, annotations_col: Series) -> 'AnnotationStore':
+        """
+        Builds an AnnotationStore from a categorical column, performing the inverse of to_categorical()
+        """
+        annotations_col = Series(annotations_col)
+        if annotations_col.dtype != 'category':
+            annotations_col = annotations_col.astype('category')
+        store = cls(0)
+        col_categories: list[str] = [str(c) for c in annotations_col.cat.categories]
+        # The final entry of the lookup is selected by the NaN code of -1
+        lookup: np.ndarray = np.empty(len(col_categories) + 1, dtype=cls.CODE_DTYPE)
+        for i, category in enumerate(col_categories):
+            if category == cls.DEFAULT_LABEL:
+                lookup[i] = cls.DEFAULT_CODE
+            else:
+                lookup[i] = store.get_code(category)
+        lookup[-1] = cls.UNSET_CODE
+        store.codes = lookup[annotations_col.cat.codes.to_numpy()]
+
+        return store
@@ -1,205 +1,331 @@
 import logging
+import time
 import traceback
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Optional, Union, TYPE_CHECKING
 
-import pandas as pd
+import numpy as np
 import panel as pn
 from atap_corpus.corpus.corpus import DataFrameCorpus
 from atap_corpus_loader import CorpusLoader
-from pandas import DataFrame, Series
+from pandas import Series, DataFrame
 from panel import Row, Column
+from panel.io import hold
+from panel.io.state import set_curdoc
 from panel.layout import Divider
 
+from atap_annotator.annotator.AgreementControls import AgreementControls
+from atap_annotator.annotator.AnnotationFileControls import AnnotationFileControls
+from atap_annotator.annotator.AnnotationHistory import AnnotationHistory
+from atap_annotator.annotator.AnnotationSession import AnnotationSession
+from atap_annotator.annotator.AnnotationStore import AnnotationStore
+from atap_annotator.annotator.BulkControls import BulkControls
+from atap_annotator.annotator.CorpusView import CorpusView
+from atap_annotator.annotator.DocumentCache import DocumentCache, DocumentPayload
+from atap_annotator.annotator.DuplicateControls import DuplicateControls
+from atap_annotator.annotator.KeyboardShortcuts import KeyboardShortcuts
+from atap_annotator.annotator.LatencyTracker import LatencyTracker
+from atap_annotator.annotator.SearchControls import SearchControls
 from atap_annotator.annotator.SettingsControls import SettingsControls
+from atap_annotator.annotator.SuggestionControls import SuggestionControls
 from atap_annotator.annotator.Navigator import Navigator
 from atap_annotator.annotator.MetaDisplay import MetaDisplay
+from atap_annotator.annotator.WorkUnitControls import WorkUnitControls
 
-
-class DefaultCategoryMarker:
-    __slots__ = []
-
-    def __str__(self) -> str:
-        return ""
-
-    def __repr__(self) -> str:
-        return ""
+if TYPE_CHECKING:
+    from atap_annotator.annotator.SearchIndex import SearchIndex
 
 
 class Annotator(pn.viewable.Viewer):
-    MIN_DOCUMENT_IDX: int = 1
+    """
+    The Panel interface for annotating a corpus. The annotation state and logic are held by an AnnotationSession,
+    and this class connects it to the sub-views, the corpus loader and the session notifications.
+    """
+    MIN_DOCUMENT_IDX: int = AnnotationSession.MIN_DOCUMENT_IDX
     DOC_COL: str = DataFrameCorpus._COL_DOC
-    DEFAULT_CATEGORIES_COL: str = 'annotation'
+    DEFAULT_CATEGORIES_COL: str = AnnotationSession.DEFAULT_CATEGORIES_COL
 
     def log(self, msg: str, level: int):
         logger = logging.getLogger(self.logger_name)
         logger.log(level, msg)
 
-    def __init__(self, corpus_loader: CorpusLoader, logger_name: str, **params):
+    def __init__(self, corpus_loader: CorpusLoader, logger_name: str,
+                 prefetch_next: int = 5, prefetch_prev: int = 2, cache_size: int = 64,
+                 journal_dir: Optional[str] = None, cache_dir: Optional[str] = None,
+                 history_size: int = AnnotationHistory.DEFAULT_MAX_SIZE, latency: Optional[LatencyTracker] = None,
+                 **params):
         super().__init__(**params)
         self.corpus_loader: CorpusLoader = corpus_loader
         self.logger_name: str = logger_name
-        self.corpus: Optional[DataFrameCorpus] = None
-        self.corpus_df: Optional[DataFrame] = None
-        self.annotations: Optional[Series] = None
-        self.curr_document_idx: int = self.MIN_DOCUMENT_IDX
-        self.categories: list[str] = []
-        self.default_category: Optional[str] = None
+        self.session = AnnotationSession(journal_dir=journal_dir, logger_name=logger_name, cache_dir=cache_dir,
+                                         history_size=history_size)
+        self.document_cache = DocumentCache(logger_name, prefetch_next, prefetch_prev, cache_size)
+        self.cached_metas: list[str] = []
+        # The mergeable corpora are found by scanning every loaded corpus, so they are kept until the corpora change
+        self.corpora_with_meta: Optional[dict[str, list[str]]] = None
+        self.background_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='annotator-background')
+        # Indexing a large corpus takes a while, so it has its own worker rather than delaying other background tasks
+        self.index_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='annotator-search-index')
+        self.saving: bool = False
+        self.merging: bool = False
+        self.suggestions_enabled: bool = False
+        self.training: bool = False
+        self.search_enabled: bool = False
+        self.indexing: bool = False
+        # Incremented for each index build, so only the most recent build marks indexing as finished
+        self.index_generation: int = 0
+        self.latency: LatencyTracker = latency if latency is not None else LatencyTracker()
 
         self.meta_display = MetaDisplay(self)
         self.navigator = Navigator(self)
+        self.search_controls = SearchControls(self)
         self.settings_controls = SettingsControls(self)
+        self.annotation_file_controls = AnnotationFileControls(self)
+        self.bulk_controls = BulkControls(self)
+        self.keyboard_shortcuts = KeyboardShortcuts(sizing_mode='stretch_width')
+        self.keyboard_shortcuts.param.watch(self._apply_shortcut_batch, ['batch'])
+        self.work_unit_controls = WorkUnitControls(self)
+        self.agreement_controls = AgreementControls(self)
+        self.duplicate_controls = DuplicateControls(self)
+        self.suggestion_controls = SuggestionControls(self)
 
         self.panel = Row(
             self.meta_display,
             Column(self.navigator,
+                   self.keyboard_shortcuts,
+                   self.search_controls,
+                   Divider(),
+                   self.settings_controls,
+                   Divider(),
+                   self.annotation_file_controls,
+                   Divider(),
+                   self.bulk_controls,
+                   Divider(),
+                   self.work_unit_controls,
+                   Divider(),
+                   self.agreement_controls,
                    Divider(),
-                   self.settings_controls),
+                   self.duplicate_controls,
+                   Divider(),
+                   self.suggestion_controls),
             sizing_mode='stretch_width'
         )
 
-        self.corpus_loader.register_event_callback("update", self.update_displays)
+        self.corpus_loader.register_event_callback("update", self._on_corpora_update)
+        # The displays are populated once all sub-views exist, as a corpus may be selected during the update
+        self.update_displays()
 
     def __panel__(self):
         return self.panel.servable()
 
+    def close(self):
+        """
+        Stops the background workers, the document prefetch worker, the journal and the category model worker
+        process. Called when the Panel session is destroyed, after which the annotator should not be used
+        """
+        # Indexing checks search_enabled after each chunk, so a build in progress stops early
+        self.search_enabled = False
+        self.background_executor.shutdown(wait=False, cancel_futures=True)
+        self.index_executor.shutdown(wait=False, cancel_futures=True)
+        self.document_cache.close()
+        self.session.close()
+        self.log("Annotator closed", logging.DEBUG)
+
+    @property
+    def corpus(self) -> Optional[DataFrameCorpus]:
+        return self.session.corpus
+
     def display_error(self, error_msg: str):
         self.log(f"Error displayed: {error_msg}", logging.ERROR)
-        pn.state.notifications.error(error_msg, duration=0)
+        if pn.state.notifications is not None:
+            pn.state.notifications.error(error_msg, duration=0)
 
     def display_warning(self, warning_msg: str):
         self.log(f"Warning displayed: {warning_msg}", logging.ERROR)
-        pn.state.notifications.warning(warning_msg, duration=6000)
+        if pn.state.notifications is not None:
+            pn.state.notifications.warning(warning_msg, duration=6000)
 
     def display_success(self, success_msg: str):
         self.log(f"Success displayed: {success_msg}", logging.INFO)
-        pn.state.notifications.success(success_msg, duration=3000)
+        if pn.state.notifications is not None:
+            pn.state.notifications.success(success_msg, duration=3000)
 
     def update_displays(self):
-        self.settings_controls.update_display()
-        self.meta_display.update_display()
-        self.navigator.update_display()
+        views = [self.settings_controls, self.meta_display, self.navigator, self.search_controls,
+                 self.annotation_file_controls,
+                 self.bulk_controls, self.work_unit_controls, self.agreement_controls, self.duplicate_controls,
+                 self.suggestion_controls]
+        with self.latency.time('update_displays'), hold(pn.state.curdoc):
+            for view in views:
+                with self.latency.time(f'{type(view).__name__}.update_display'):
+                    view.update_display()
+
+    def update_document_displays(self):
+        # Only the views that depend on the current document are updated when navigating
+        with self.latency.time('update_document_displays'), hold(pn.state.curdoc):
+            with self.latency.time('MetaDisplay.update_document'):
+                self.meta_display.update_document()
+            with self.latency.time('Navigator.update_document'):
+                self.navigator.update_document()
 
     def get_corpus_dict(self) -> dict[str, DataFrameCorpus]:
         return self.corpus_loader.get_corpora()
 
+    def _on_corpora_update(self):
+        self.corpora_with_meta = None
+        self.update_displays()
+
     def set_selected_corpus(self, corpus: Optional[DataFrameCorpus]):
-        if corpus == self.corpus:
+        if corpus == self.session.corpus:
             # Prevents endless recursive loop through update_displays()
             return
-        elif corpus is None:
-            self.corpus = None
-            self.corpus_df = None
-            self.annotations = None
-        else:
-            self.corpus = corpus
-            self.corpus_df = corpus.to_dataframe().reset_index(drop=True)
-            self.corpus_df.index = range(1, len(self.corpus) + 1)
-            self.annotations = Series(len(self.corpus) * [DefaultCategoryMarker()])
-            self.annotations.index = range(1, len(self.corpus) + 1)
-            self.default_category = None
-        self.curr_document_idx = self.MIN_DOCUMENT_IDX
-        self.update_displays()
-
-    def _get_new_column_name(self, provided_name: str, existing_columns: set[str]) -> str:
-        iteration: int = 0
-        if len(provided_name) == 0:
-            provided_name = self.DEFAULT_CATEGORIES_COL
-        while provided_name in existing_columns:
-            provided_name = f"{provided_name}_{iteration}"
-            iteration += 1
-
-        return provided_name
-
-    def _resolve_annotations_col(self, annotations_col: Series) -> Series:
-        # Converts an annotations Series to a column to be included in a corpus
-        def resolver(x):
-            return str(x) if x else None
-        return annotations_col.apply(resolver).reset_index(drop=True)
-
-    def _unresolve_annotations_col(self, annotations_col: Series) -> Series:
-        # Converts a column from the corpus to an annotations Series
-        def unresolver(x):
-            if (x is None) or (pd.isna(x)):
-                return None
-            elif len(x) == 0:
-                return DefaultCategoryMarker()
-            return str(x)
-        annotations_col = annotations_col.apply(unresolver)
-        annotations_col.index = range(1, len(annotations_col) + 1)
-
-        return annotations_col
+        with self.latency.time('set_selected_corpus'):
+            restored_count: Optional[int] = self.session.set_corpus(corpus)
+            self.corpora_with_meta = None
+            if restored_count is not None:
+                self.display_success(f"Restored {restored_count} annotations for {corpus.name}")
+            self._invalidate_document_cache()
+            if self.search_enabled and (corpus is not None):
+                self.build_search_index()
+            self.update_displays()
 
-    def save_as_corpus(self, new_name: str, selected_meta: str, overwrite_meta: bool):
-        if self.corpus is None:
+    def _run_in_background(self, task: Callable, on_complete: Callable, error_msg: str,
+                           executor: Optional[ThreadPoolExecutor] = None):
+        """
+        Runs task on the background worker and then passes its result to on_complete in the context of the current
+        session. On a Panel server on_complete is scheduled on the session event loop so widgets can be updated safely.
+        :param executor: the worker to run task on. Defaults to the background worker
+        """
+        doc = pn.state.curdoc
+
+        def on_ui(callback: Callable):
+            def wrapped():
+                with set_curdoc(doc):
+                    callback()
+            if (doc is not None) and (doc.session_context is not None):
+                doc.add_next_tick_callback(wrapped)
+            else:
+                wrapped()
+
+        def run():
+            try:
+                result = task(on_ui)
+            except Exception as e:
+                self.log(traceback.format_exc(), logging.ERROR)
+                on_ui(partial(self.display_error, f"{error_msg}: {e}"))
+                result = None
+            on_ui(partial(on_complete, result))
+
+        if executor is None:
+            executor = self.background_executor
+        executor.submit(run)
+
+    def _display_progress(self, progress_msg: str):
+        self.log(f"Progress displayed: {progress_msg}", logging.INFO)
+        if pn.state.notifications is not None:
+            pn.state.notifications.info(progress_msg, duration=3000)
+
+    def save_as_corpus(self, new_name: str, selected_meta: str, overwrite_meta: bool, update_saved: bool = False):
+        """
+        Saves the annotations as a categorical meta on a copy of the selected corpus. The copy is built on a
+        background worker and progress is shown as notifications.
+        If update_saved is True and a corpus previously saved from the selected corpus is still loaded, the annotation
+        meta of that corpus is replaced instead of copying the selected corpus again.
+        """
+        if self.session.corpus is None:
             self.display_warning("No corpus selected")
             return
-        if len(new_name) == 0:
-            new_name = None
-        mask: Series = Series([True]*len(self.corpus))
-        cloned_corpus: DataFrameCorpus = self.corpus.cloned(mask, new_name)
-        new_name = cloned_corpus.name
-        new_corpus: DataFrameCorpus = cloned_corpus.detached()
-        del cloned_corpus
-        new_corpus.rename(new_name)
-        annotations_col: Series = self._resolve_annotations_col(self.annotations)
-        if overwrite_meta:
-            orig_col: Series = new_corpus[selected_meta]
-            annotations_col.fillna(orig_col)
-            new_corpus.remove_meta(selected_meta)
-        annotations_col = annotations_col.astype('category')
-        annotations_col_name: str = self._get_new_column_name(selected_meta, set(self.corpus.metas))
-        new_corpus.add_meta(annotations_col, name=annotations_col_name)
-
-        corpora = self.corpus_loader.get_mutable_corpora()
-        corpora.add(new_corpus)
-        self.corpus_loader.trigger_event("update")
-
-        self.display_success(f'Saved corpus as {new_name}')
+        if self.saving:
+            self.display_warning("A save is already in progress")
+            return
+        saved_corpus: Optional[DataFrameCorpus] = self.session.saved_corpus
+        update_saved = update_saved and any(c is saved_corpus for c in self.get_corpus_dict().values())
+
+        # Only the work done before handing over to the background worker is included, as it blocks the interface
+        start_time: float = time.perf_counter()
+        self.saving = True
+        source_corpus: DataFrameCorpus = self.session.corpus
+        annotations_col: Series = self.session.get_annotations_col()
+        self._display_progress("Saving corpus")
+
+        def save(on_ui: Callable) -> tuple[DataFrameCorpus, Union[str, Series]]:
+            with self.latency.time('save_as_corpus.background'):
+                if update_saved:
+                    # The saved corpus is already registered with the loader, so only its new meta is built here and
+                    # it is swapped in on the interface thread
+                    return saved_corpus, self.session.build_saved_meta_col(annotations_col)
+                on_ui(partial(self._display_progress, "Copying corpus and adding annotations"))
+                return self.session.build_annotated_corpus(new_name, selected_meta, overwrite_meta, annotations_col,
+                                                           source_corpus)
+
+        def on_complete(result: Optional[tuple[DataFrameCorpus, Union[str, Series]]]):
+            self.saving = False
+            if result is None:
+                return
+            if update_saved:
+                if (source_corpus is not self.session.corpus) or (saved_corpus is not self.session.saved_corpus):
+                    self.display_warning("The selected corpus changed before the saved corpus was updated")
+                    return
+                updated_corpus, _ = self.session.set_saved_meta_col(result[1])
+                self.corpus_loader.trigger_event("update")
+                self.display_success(f'Updated annotations in {updated_corpus.name}')
+                return
+            new_corpus, meta_name = result
+            if source_corpus is self.session.corpus:
+                self.session.set_saved_corpus(new_corpus, meta_name, selected_meta if overwrite_meta else None)
+            corpora = self.corpus_loader.get_mutable_corpora()
+            corpora.add(new_corpus)
+            self.corpus_loader.trigger_event("update")
+            self.display_success(f'Saved corpus as {new_corpus.name}')
+
+        self._run_in_background(save, on_complete, "Error while saving corpus")
+        self.latency.record('save_as_corpus', time.perf_counter() - start_time)
 
     # MetaDisplay methods
 
     def get_all_metas(self) -> list[str]:
-        if self.corpus is None:
-            return []
-        return [self.corpus._COL_DOC] + self.corpus.metas
+        return self.session.get_all_metas()
 
     def get_curr_meta_str(self, meta: str) -> str:
-        if (self.corpus is None) or (meta not in self.get_all_metas()):
+        if (self.session.corpus is None) or (meta not in self.get_all_metas()):
             return ""
-        return str(self.corpus_df.at[self.curr_document_idx, meta])
+        if self.cached_metas != self.get_all_metas():
+            self._invalidate_document_cache()
+        return self.document_cache.get(self.session.curr_document_idx).get(meta, "")
+
+    def _invalidate_document_cache(self):
+        self.cached_metas = self.get_all_metas()
+        if self.session.corpus_view is None:
+            self.document_cache.invalidate()
+            return
+        loader = partial(self._render_document, self.session.corpus_view, tuple(self.cached_metas))
+        self.document_cache.invalidate(loader, self.get_min_document_idx(), self.get_max_document_idx())
+
+    @staticmethod
+    def _render_document(corpus_view: CorpusView, metas: tuple[str], document_idx: int) -> DocumentPayload:
+        # Called from the prefetch worker, so only the arguments provided are used rather than the current state
+        return {meta: str(corpus_view.get_cell(document_idx, meta)) for meta in metas}
 
     # SettingsControls methods
 
     def add_category(self, category: str):
-        if category in self.categories:
-            self.display_warning("This category has already been added")
-            return
-        if len(category) == 0:
-            self.display_warning("Category cannot be empty")
-            return
-        self.categories.append(category)
-        self.log(f"Category added: {category}", logging.DEBUG)
+        try:
+            self.session.add_category(category)
+        except ValueError as e:
+            self.display_warning(str(e))
 
     def remove_category(self, category: str):
-        if category in self.categories:
-            self.categories.remove(category)
-            self.log(f"Category removed: {category}", logging.DEBUG)
+        self.session.remove_category(category)
 
     def get_categorical_metas(self) -> list[str]:
-        if self.corpus is None:
-            return []
-        return self.corpus_df.select_dtypes(include='category').columns.tolist()
+        return self.session.get_categorical_metas()
 
     def set_annotated_meta_col(self, meta: str):
         try:
-            if (self.corpus_df is None) or (meta not in self.corpus_df.columns):
-                return
-            metas: list[str] = self.corpus_df.select_dtypes(include='category').columns.tolist()
-            if meta not in metas:
+            if not self.session.load_annotated_meta(meta):
                 return
-            self.annotations = self._unresolve_annotations_col(self.corpus_df[meta])
-            self.categories = [x for x in self.annotations.unique() if isinstance(x, str)]
-            self.log(','.join([f"{c}:{type(c)}" for c in self.categories]), logging.DEBUG)
+            self.log(','.join([f"{c}:{type(c)}" for c in self.session.categories]), logging.DEBUG)
             self.update_displays()
         except Exception as e:
             self.log(traceback.format_exc(), logging.DEBUG)
@@ -207,56 +333,490 @@ class Annotator(pn.viewable.Viewer):
     # Navigator methods
 
     def get_curr_document_idx(self) -> int:
-        return self.curr_document_idx
+        return self.session.curr_document_idx
 
     def get_min_document_idx(self) -> int:
-        if self.annotations is None:
-            return self.MIN_DOCUMENT_IDX
-        return self.annotations.index.min()
+        return self.session.get_min_document_idx()
 
     def get_max_document_idx(self) -> int:
-        if self.annotations is None:
-            return self.MIN_DOCUMENT_IDX
-        return self.annotations.index.max()
+        return self.session.get_max_document_idx()
 
     def get_all_categories(self) -> list[str]:
-        return self.categories.copy()
+        return self.session.get_all_categories()
 
     def get_default_category(self) -> Optional[str]:
-        return self.default_category
+        return self.session.get_default_category()
 
     def get_document_category(self, document_idx: int) -> Optional[str]:
-        if self.annotations is None:
-            return ''
-        category = self.annotations.at[document_idx]
-        if isinstance(category, DefaultCategoryMarker):
-            return self.get_default_category()
-        else:
-            return category
+        return self.session.get_document_category(document_idx)
 
     def get_curr_category(self) -> Optional[str]:
-        return self.get_document_category(self.curr_document_idx)
+        return self.session.get_curr_category()
 
     def set_curr_document_idx(self, new_document_idx: int):
-        new_document_idx = min(new_document_idx, self.get_max_document_idx())
-        new_document_idx = max(new_document_idx, self.get_min_document_idx())
-
-        self.curr_document_idx = new_document_idx
-        self.update_displays()
+        with self.latency.time('set_curr_document_idx'):
+            new_document_idx = self.session.set_curr_document_idx(new_document_idx)
+            self.update_document_displays()
         self.log(f"Set curr_document_idx to {new_document_idx}", logging.DEBUG)
 
     def next_document(self):
-        self.set_curr_document_idx(self.curr_document_idx + 1)
+        self.set_curr_document_idx(self.session.get_next_document_idx())
 
     def prev_document(self):
-        self.set_curr_document_idx(self.curr_document_idx - 1)
+        self.set_curr_document_idx(self.session.get_prev_document_idx())
+
+    def get_navigation_str(self) -> str:
+        return self.session.get_navigation_str()
+
+    def set_curr_category(self, category: Optional[str]):
+        with self.latency.time('set_curr_category'):
+            self.session.set_curr_category(category)
+            self._train_if_needed()
+
+    def get_category_counts(self) -> dict[str, int]:
+        return self.session.get_category_counts()
+
+    def _apply_shortcut_batch(self, event):
+        with self.latency.time('apply_shortcut_actions'):
+            self.apply_shortcut_actions(event.new.get('actions', []))
+
+    def apply_shortcut_actions(self, actions: list[list]):
+        """
+        Applies a batch of keyboard shortcut actions, as described by KeyboardShortcuts, and then updates the
+        displays once for the whole batch.
+        """
+        if self.session.corpus is None:
+            return
+        categories: list[str] = self.get_all_categories()
+        categories_changed: bool = False
+        for action in actions:
+            if len(action) == 0:
+                continue
+            action_type: str = action[0]
+            try:
+                if action_type in ('set', 'label'):
+                    category_num: int = int(action[1])
+                    if 1 <= category_num <= len(categories):
+                        self.session.set_curr_category(categories[category_num - 1])
+                    if action_type == 'label':
+                        self._move_document(int(action[2]))
+                elif action_type == 'clear':
+                    self.session.set_curr_category(None)
+                elif action_type == 'move':
+                    self._move_document(int(action[1]))
+                elif action_type in ('undo', 'redo'):
+                    history_op: Callable = self.session.undo if action_type == 'undo' else self.session.redo
+                    document_idx: Optional[int] = history_op()
+                    if document_idx is not None:
+                        self.session.set_curr_document_idx(document_idx)
+                        categories_changed = True
+            except (IndexError, ValueError, TypeError):
+                self.log(f"Invalid shortcut action: {action}", logging.DEBUG)
+        self.log(f"Applied {len(actions)} shortcut actions", logging.DEBUG)
+        if categories_changed:
+            self.update_displays()
+        else:
+            self.update_document_displays()
+        self._train_if_needed()
+
+    def _move_document(self, steps: int):
+        for _ in range(abs(steps)):
+            if steps > 0:
+                self.session.set_curr_document_idx(self.session.get_next_document_idx())
+            else:
+                self.session.set_curr_document_idx(self.session.get_prev_document_idx())
+
+    def can_undo(self) -> bool:
+        return self.session.can_undo()
+
+    def can_redo(self) -> bool:
+        return self.session.can_redo()
+
+    def undo(self):
+        self._show_history_change(self.session.undo(), "Nothing to undo")
+
+    def redo(self):
+        self._show_history_change(self.session.redo(), "Nothing to redo")
+
+    def _show_history_change(self, document_idx: Optional[int], empty_msg: str):
+        if document_idx is None:
+            self.display_warning(empty_msg)
+            return
+        # Moves to the changed document. The categories may have changed, so every display is updated
+        self.session.set_curr_document_idx(document_idx)
+        self.update_displays()
+
+    def next_unannotated_document(self):
+        document_idx: Optional[int] = self.session.find_next_unannotated()
+        if document_idx is None:
+            self.display_warning("No unannotated documents remain")
+            return
+        self.set_curr_document_idx(document_idx)
+
+    def next_document_with_category(self, category: str):
+        document_idx: Optional[int] = self.session.find_next_with_category(category)
+        if document_idx is None:
+            self.display_warning(f"No documents are annotated with {category}")
+            return
+        self.set_curr_document_idx(document_idx)
+
+    def set_default_category(self, category: Optional[str]):
+        self.session.set_default_category(category)
+
+    # BulkControls methods
+
+    def match_regex(self, pattern: str, meta: str) -> Optional[np.ndarray]:
+        try:
+            return self.session.match_regex(pattern, meta)
+        except ValueError as e:
+            self.display_warning(str(e))
+            return None
+
+    def match_value(self, meta: str, value: str) -> Optional[np.ndarray]:
+        return self.session.match_value(meta, value)
+
+    def match_range(self, meta: str, lower: Optional[float], upper: Optional[float]) -> Optional[np.ndarray]:
+        return self.session.match_range(meta, lower, upper)
+
+    def match_indices(self, document_indices: np.ndarray) -> np.ndarray:
+        return self.session.match_indices(document_indices)
+
+    def assign_category(self, document_indices: np.ndarray, category: Optional[str]):
+        self.session.assign_category(document_indices, category)
+        self.update_document_displays()
+        self._train_if_needed()
 
-    def set_curr_category(self, category: str):
-        if self.annotations is None:
+    # AnnotationFileControls methods
+
+    def get_default_annotations_path(self) -> str:
+        return self.session.annotation_files.get_default_path()
+
+    def export_annotations(self, file_path: str, key_meta: Optional[str]):
+        """
+        Exports the annotations to file_path on a background worker. A copy of the annotations is exported, so
+        annotating can continue while the file is written.
+        """
+        if self.session.corpus is None:
+            self.display_warning("No corpus selected")
+            return
+        source_corpus: DataFrameCorpus = self.session.corpus
+        annotations: AnnotationStore = self.session.annotations.copy()
+        annotation_files = self.session.annotation_files
+
+        def export(on_ui: Callable) -> int:
+            if source_corpus is not self.session.corpus:
+                raise ValueError("The selected corpus changed before the annotations were exported")
+            return annotation_files.export_annotations(file_path, key_meta, annotations)
+
+        def on_complete(exported_count: Optional[int]):
+            if exported_count is not None:
+                self.display_success(f"Exported {exported_count:,} annotations to {file_path}")
+
+        self._run_in_background(export, on_complete, "Error while exporting annotations")
+
+    def import_annotations(self, file_path: str):
+        """
+        Reads and matches the annotations in file_path on a background worker, then replaces the annotations with them
+        """
+        if self.session.corpus is None:
+            self.display_warning("No corpus selected")
+            return
+        source_corpus: DataFrameCorpus = self.session.corpus
+        annotation_files = self.session.annotation_files
+
+        def read(on_ui: Callable) -> tuple[AnnotationStore, list[str], Optional[str], int, int]:
+            return annotation_files.read_annotations(file_path)
+
+        def on_complete(result: Optional[tuple[AnnotationStore, list[str], Optional[str], int, int]]):
+            if result is None:
+                return
+            if source_corpus is not self.session.corpus:
+                self.display_warning("The selected corpus changed before the annotations were imported")
+                return
+            annotations, categories, default_category, matched_count, file_count = result
+            self.session.set_imported_annotations(annotations, categories, default_category)
+            self.update_displays()
+            self.display_success(f"Imported annotations for {matched_count:,} documents, "
+                                 f"with {file_count:,} documents in {file_path}")
+
+        self._run_in_background(read, on_complete, "Error while importing annotations")
+
+    # WorkUnitControls methods
+
+    def has_navigation_sequence(self) -> bool:
+        return self.session.navigation_sequence is not None
+
+    def get_corpora_with_meta(self) -> dict[str, list[str]]:
+        """
+        :return: the categorical metas of each loaded corpus other than the selected corpus that has the same number
+        of documents, which are the corpora that can be merged as work units. Computed again only after the loaded
+        corpora or the selected corpus change
+        """
+        if self.session.corpus_view is None:
+            return {}
+        if self.corpora_with_meta is None:
+            corpora_metas: dict[str, list[str]] = {}
+            for name, corpus in self.get_corpus_dict().items():
+                if corpus is self.session.corpus:
+                    continue
+                corpus_view = CorpusView(corpus)
+                if len(corpus_view) == len(self.session.corpus_view):
+                    corpora_metas[name] = corpus_view.get_categorical_columns()
+            self.corpora_with_meta = corpora_metas
+        return self.corpora_with_meta
+
+    def partition_work(self, method: str, num_units: int, key_meta: Optional[str]) -> list[int]:
+        try:
+            return self.session.work_units.partition(method, num_units, key_meta)
+        except ValueError as e:
+            self.display_warning(str(e))
+            return []
+
+    def set_work_unit(self, unit_idx: Optional[int]):
+        if unit_idx is None:
+            self.session.clear_navigation_sequence()
+        else:
+            try:
+                self.session.work_units.set_unit(unit_idx)
+            except ValueError as e:
+                self.display_warning(str(e))
+                return
+        self.update_document_displays()
+
+    def merge_annotations(self, corpus_names: list[str], unit_meta: str, merged_meta: str):
+        """
+        Merges the annotations of the work unit corpora into a copy of the selected corpus. The copy is built on a
+        background worker and added to the corpus loader when complete.
+        """
+        if self.session.corpus is None:
+            self.display_warning("No corpus selected")
+            return
+        if self.merging:
+            self.display_warning("A merge is already in progress")
+            return
+        corpus_dict: dict[str, DataFrameCorpus] = self.get_corpus_dict()
+        unit_corpora: list[DataFrameCorpus] = [corpus_dict[name] for name in corpus_names if name in corpus_dict]
+        self.merging = True
+        source_corpus: DataFrameCorpus = self.session.corpus
+        work_units = self.session.work_units
+        self._display_progress("Merging annotations")
+
+        def merge(on_ui: Callable) -> Optional[tuple[DataFrameCorpus, str, DataFrame]]:
+            try:
+                return work_units.build_merged_corpus(source_corpus, unit_corpora, unit_meta, merged_meta)
+            except ValueError as e:
+                on_ui(partial(self.display_warning, str(e)))
+                return None
+
+        def on_complete(result: Optional[tuple[DataFrameCorpus, str, DataFrame]]):
+            self.merging = False
+            if result is None:
+                return
+            merged_corpus, meta_name, conflicts = result
+            self.corpus_loader.get_mutable_corpora().add(merged_corpus)
+            self.corpus_loader.trigger_event("update")
+            merged_str: str = f"Merged into {meta_name} of {merged_corpus.name}"
+            if not len(conflicts):
+                self.display_success(f"{merged_str} with no conflicts")
+            elif source_corpus is self.session.corpus:
+                work_units.set_conflict_sequence(conflicts)
+                self.update_displays()
+                self.display_warning(f"{merged_str} with {len(conflicts):,} conflicting documents left unset. "
+                                     f"Navigation is restricted to the conflicts")
+            else:
+                self.display_warning(f"{merged_str} with {len(conflicts):,} conflicting documents left unset")
+
+        self._run_in_background(merge, on_complete, "Error while merging annotations")
+
+    # AgreementControls methods
+
+    def get_agreement(self, metas: list[str]) -> Optional[tuple[float, DataFrame]]:
+        try:
+            return self.session.agreement.get_agreement(metas)
+        except ValueError as e:
+            self.display_warning(str(e))
+            return None
+
+    def get_confusion_matrix(self, meta_a: str, meta_b: str) -> Optional[DataFrame]:
+        try:
+            return self.session.agreement.get_confusion_matrix(meta_a, meta_b)
+        except ValueError as e:
+            self.display_warning(str(e))
+            return None
+
+    def navigate_disagreements(self, metas: list[str]):
+        try:
+            disagreement_count: int = self.session.agreement.set_disagreement_sequence(metas)
+        except ValueError as e:
+            self.display_warning(str(e))
+            return
+        if disagreement_count == 0:
+            self.display_success("The annotations agree on every document")
+            return
+        self.update_document_displays()
+
+    # DuplicateControls methods
+
+    def find_duplicates(self, threshold: float):
+        """
+        Clusters the near-duplicate documents of the selected corpus on the background worker, then restricts
+        navigation to one document of each cluster.
+        """
+        if self.session.corpus is None:
+            self.display_warning("No corpus selected")
+            return
+        source_corpus: DataFrameCorpus = self.session.corpus
+        duplicates = self.session.duplicates
+        self._display_progress("Finding near-duplicate documents")
+
+        def find(on_ui: Callable) -> np.ndarray:
+            return duplicates.compute_clusters(threshold)
+
+        def on_complete(cluster_labels: Optional[np.ndarray]):
+            if (cluster_labels is None) or (source_corpus is not self.session.corpus):
+                return
+            cluster_count: int = duplicates.set_clusters(cluster_labels)
+            self.update_displays()
+            duplicate_count: int = len(cluster_labels) - cluster_count
+            self.display_success(f"Found {cluster_count:,} clusters. {duplicate_count:,} near-duplicate documents "
+                                 f"are skipped when navigating")
+
+        self._run_in_background(find, on_complete, "Error while finding near-duplicates")
+
+    def has_duplicate_clusters(self) -> bool:
+        return self.session.has_duplicate_clusters()
+
+    def clear_duplicates(self):
+        if not self.has_duplicate_clusters():
             return
-        self.annotations.at[self.curr_document_idx] = category
-        self.log(f"Set category for document {self.curr_document_idx} to {category}", logging.DEBUG)
+        self.session.duplicates.clear_clusters()
+        self.session.clear_navigation_sequence()
+        self.update_displays()
+
+    def set_propagate_to_clusters(self, propagate: bool):
+        self.session.duplicates.propagate = propagate
+
+    # SearchControls methods
 
-    def set_default_category(self, category: str):
-        self.default_category = category
-        self.log(f"Set default category to {category}", logging.DEBUG)
+    def get_indexed_count(self) -> Optional[int]:
+        return self.session.get_indexed_count()
+
+    def set_search_enabled(self, enabled: bool):
+        self.search_enabled = enabled
+        if enabled:
+            if (self.session.corpus is not None) and (self.get_indexed_count() is None):
+                self.build_search_index()
+        else:
+            self.session.search.clear_index()
+        self.search_controls.update_display()
+
+    def build_search_index(self):
+        """
+        Indexes the documents of the selected corpus on the search index worker, reporting progress in the search
+        controls. Indexing stops early if the corpus changes or search is disabled.
+        """
+        if self.session.corpus is None:
+            return
+        self.indexing = True
+        self.index_generation += 1
+        generation: int = self.index_generation
+        source_corpus: DataFrameCorpus = self.session.corpus
+        corpus_size: int = len(self.session.annotations)
+        search = self.session.search
+        self.search_controls.set_status("Indexing documents")
+
+        def index(on_ui: Callable) -> Optional['SearchIndex']:
+            def on_progress(indexed_count: int) -> bool:
+                on_ui(partial(self.search_controls.set_status,
+                              f"Indexed {indexed_count:,} of {corpus_size:,} documents"))
+                return self.search_enabled and (source_corpus is self.session.corpus)
+
+            return search.compute_index(on_progress)
+
+        def on_complete(search_index: Optional['SearchIndex']):
+            if generation != self.index_generation:
+                return
+            self.indexing = False
+            if (search_index is not None) and self.search_enabled and (source_corpus is self.session.corpus):
+                search.set_index(search_index)
+            self.search_controls.update_display()
+
+        self._run_in_background(index, on_complete, "Error while indexing documents", self.index_executor)
+
+    def search(self, query: str):
+        with self.latency.time('search'):
+            try:
+                match_count: int = self.session.search.set_search_sequence(query)
+            except ValueError as e:
+                self.display_warning(str(e))
+                return
+            self.update_displays()
+        self.search_controls.set_status(f"{match_count:,} matching documents")
+
+    def clear_search(self):
+        self.session.clear_navigation_sequence()
+        self.update_displays()
+
+    # SuggestionControls methods
+
+    def set_suggestions_enabled(self, enabled: bool):
+        self.suggestions_enabled = enabled
+        if enabled:
+            self._train_if_needed()
+        self.update_document_displays()
+
+    def get_trained_count(self) -> Optional[int]:
+        return self.session.get_trained_count()
+
+    def _train_if_needed(self):
+        if self.suggestions_enabled and (not self.training) and self.session.suggestions.needs_training():
+            self.train_suggestions(notify=False)
+
+    def train_suggestions(self, notify: bool = True):
+        """
+        Trains the category model in its worker process and then updates the suggestions. Errors are only shown
+        when notify is True, as automatic retraining fails until two categories have been annotated.
+        """
+        if self.session.corpus is None:
+            if notify:
+                self.display_warning("No corpus selected")
+            return
+        if self.training:
+            return
+        self.training = True
+        source_corpus: DataFrameCorpus = self.session.corpus
+        suggestions = self.session.suggestions
+        suggestions.record_attempt()
+        self.suggestion_controls.set_status("Training")
+
+        def train(on_ui: Callable) -> Optional[tuple]:
+            try:
+                return suggestions.compute_suggestions()
+            except ValueError as e:
+                if notify:
+                    on_ui(partial(self.display_warning, str(e)))
+                return None
+
+        def on_complete(result: Optional[tuple]):
+            self.training = False
+            if (result is None) or (source_corpus is not self.session.corpus):
+                self.suggestion_controls.update_display()
+                return
+            suggestions.set_suggestions(*result)
+            self.suggestion_controls.update_display()
+            self.update_document_displays()
+
+        self._run_in_background(train, on_complete, "Error while training the category model")
+
+    def get_curr_suggestion(self) -> Optional[tuple[str, float]]:
+        if not self.suggestions_enabled:
+            return None
+        return self.session.suggestions.get_suggestion(self.session.curr_document_idx)
+
+    def navigate_uncertain(self):
+        try:
+            self.session.suggestions.set_uncertainty_sequence()
+        except ValueError as e:
+            self.display_warning(str(e))
+            return
+        self.update_document_displays()
@@ -0,0 +1,136 @@
+from typing import Optional
+
+import numpy as np
+from panel import Row, Column
+from panel.pane import Str
+from panel.widgets import Button, TextInput, Select
+
+
+class BulkControls:
+    """
+    Assigns a category to every document matching a rule in a single action.
+    The number of matching documents is reported before the category is applied.
+    """
+    STANDARD_WIDTH: int = 150
+    REGEX_RULE: str = 'Regex'
+    VALUE_RULE: str = 'Equals'
+    RANGE_RULE: str = 'Range'
+    INDICES_RULE: str = 'Document indices'
+
+    def __init__(self, controller):
+        self.controller = controller
+
+        self.rule_selector = Select(name='Rule', width=self.STANDARD_WIDTH,
+                                    options=[self.REGEX_RULE, self.VALUE_RULE, self.RANGE_RULE, self.INDICES_RULE])
+        self.meta_selector = Select(name='Metadata', width=self.STANDARD_WIDTH)
+        self.value_input = TextInput(name='Rule value', width=self.STANDARD_WIDTH, placeholder='Pattern')
+        self.upper_input = TextInput(name='Upper bound', width=self.STANDARD_WIDTH, visible=False)
+        self.category_selector = Select(name='Category', width=self.STANDARD_WIDTH)
+        self.count_button = Button(name='Count matches', button_type='primary', button_style='outline')
+        self.apply_button = Button(name='Apply to matches', button_type='warning', button_style='solid')
+        self.match_count = Str()
+
+        self.panel = Column(
+            Row(self.rule_selector, self.meta_selector, self.category_selector),
+            Row(self.value_input, self.upper_input),
+            Row(self.count_button, self.apply_button, self.match_count)
+        )
+
+        self.rule_selector.param.watch(self._update_rule_inputs, ['value'])
+        self.count_button.on_click(self._count_matches)
+        self.apply_button.on_click(self._apply_category)
+
+    def __panel__(self):
+        return self.panel
+
+    def update_display(self):
+        all_metas: list[str] = self.controller.get_all_metas()
+        if self.meta_selector.options != all_metas:
+            self.meta_selector.options = all_metas
+        all_categories: list[str] = self.controller.get_all_categories()
+        if self.category_selector.options != all_categories:
+            self.category_selector.options = all_categories
+
+    def _update_rule_inputs(self, *_):
+        rule: str = self.rule_selector.value
+        placeholders: dict[str, str] = {
+            self.REGEX_RULE: 'Pattern',
+            self.VALUE_RULE: 'Value',
+            self.RANGE_RULE: 'Lower bound',
+            self.INDICES_RULE: 'e.g. 1, 4, 10-20'
+        }
+        self.value_input.placeholder = placeholders[rule]
+        self.upper_input.visible = rule == self.RANGE_RULE
+        self.meta_selector.visible = rule != self.INDICES_RULE
+        self.match_count.object = ''
+
+    @staticmethod
+    def _parse_bound(bound: str) -> Optional[float]:
+        bound = bound.strip()
+        if len(bound) == 0:
+            return None
+        return float(bound)
+
+    @staticmethod
+    def _parse_indices(indices_str: str, min_idx: int, max_idx: int) -> np.ndarray:
+        """
+        Parses comma separated document indices and inclusive ranges of indices, e.g. '1, 4, 10-20'.
+        :raises ValueError: if an index or range is malformed or outside min_idx to max_idx
+        """
+        parts: list[np.ndarray] = []
+        for part in indices_str.split(','):
+            part = part.strip()
+            if len(part) == 0:
+                continue
+            if '-' in part:
+                start_str, end_str = part.split('-', 1)
+                start, end = int(start_str), int(end_str)
+            else:
+                start = end = int(part)
+            # Ranges are checked before they are expanded, so their size is bounded by the size of the corpus
+            if start > end:
+                raise ValueError(f"{part} is not a valid range")
+            if (start < min_idx) or (end > max_idx):
+                raise ValueError(f"{part} is not within {min_idx} to {max_idx}")
+            parts.append(np.arange(start, end + 1, dtype=np.int64))
+        if len(parts) == 0:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(parts)
+
+    def _get_matches(self) -> Optional[np.ndarray]:
+        rule: str = self.rule_selector.value
+        meta: str = self.meta_selector.value
+        value: str = self.value_input.value_input
+        try:
+            if rule == self.REGEX_RULE:
+                return self.controller.match_regex(value, meta)
+            elif rule == self.VALUE_RULE:
+                return self.controller.match_value(meta, value)
+            elif rule == self.RANGE_RULE:
+                lower: Optional[float] = self._parse_bound(value)
+                upper: Optional[float] = self._parse_bound(self.upper_input.value_input)
+                return self.controller.match_range(meta, lower, upper)
+            indices: np.ndarray = self._parse_indices(value, self.controller.get_min_document_idx(),
+                                                      self.controller.get_max_document_idx())
+            return self.controller.match_indices(indices)
+        except ValueError as e:
+            self.controller.display_warning(f"Invalid rule input: {e}")
+            return None
+
+    def _count_matches(self, *_):
+        matches: Optional[np.ndarray] = self._get_matches()
+        if matches is None:
+            self.match_count.object = ''
+            return
+        self.match_count.object = f"{len(matches):,} documents match"
+
+    def _apply_category(self, *_):
+        category: Optional[str] = self.category_selector.value
+        if category is None:
+            self.controller.display_warning("No category selected")
+            return
+        matches: Optional[np.ndarray] = self._get_matches()
+        if matches is None:
+            return
+        self.controller.assign_category(matches, category)
+        self.match_count.object = f"{len(matches):,} documents set to {category}"
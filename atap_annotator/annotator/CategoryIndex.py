@@ -0,0 +1,96 @@
+from typing import Optional, Union
+
+import numpy as np
+
+from atap_annotator.annotator.AnnotationStore import AnnotationStore
+
+
+class CategoryIndex:
+    """
+    Maintains the number of documents with each annotation code in fixed size blocks of the AnnotationStore.
+    Counts are updated in O(1) for every change, so the count of each code is available without scanning the store,
+    and finding the next document with a given code only scans the blocks that contain that code.
+    Codes are shifted by SENTINEL_OFFSET so the sentinels can be used as column indices.
+    """
+    BLOCK_SIZE: int = 1024
+    SENTINEL_OFFSET: int = -min(AnnotationStore.DEFAULT_CODE, AnnotationStore.UNSET_CODE)
+
+    def __init__(self, store: AnnotationStore):
+        self.store: AnnotationStore = store
+        self.block_counts: np.ndarray = np.zeros((0, 0), dtype=np.int32)
+        self.counts: np.ndarray = np.zeros(0, dtype=np.int64)
+        self.rebuild()
+
+    def rebuild(self):
+        num_blocks: int = -(-len(self.store) // self.BLOCK_SIZE)
+        width: int = len(self.store.category_table) + self.SENTINEL_OFFSET
+        block_ids: np.ndarray = np.arange(len(self.store)) // self.BLOCK_SIZE
+        flat_ids: np.ndarray = (block_ids * width) + self.store.codes + self.SENTINEL_OFFSET
+        flat_counts: np.ndarray = np.bincount(flat_ids, minlength=num_blocks * width)
+        self.block_counts = flat_counts.reshape(num_blocks, width).astype(np.int32)
+        self.counts = self.block_counts.sum(axis=0, dtype=np.int64)
+
+    def _ensure_code(self, code: int):
+        width: int = code + self.SENTINEL_OFFSET + 1
+        if width <= self.block_counts.shape[1]:
+            return
+        extra_cols: int = width - self.block_counts.shape[1]
+        self.block_counts = np.pad(self.block_counts, ((0, 0), (0, extra_cols)))
+        self.counts = np.pad(self.counts, (0, extra_cols))
+
+    def update(self, position: int, old_code: int, new_code: int):
+        self._ensure_code(new_code)
+        block: int = position // self.BLOCK_SIZE
+        self.block_counts[block, old_code + self.SENTINEL_OFFSET] -= 1
+        self.block_counts[block, new_code + self.SENTINEL_OFFSET] += 1
+        self.counts[old_code + self.SENTINEL_OFFSET] -= 1
+        self.counts[new_code + self.SENTINEL_OFFSET] += 1
+
+    def update_many(self, positions: np.ndarray, old_codes: np.ndarray, new_codes: Union[int, np.ndarray]):
+        """
+        :param new_codes: a single code given to every position, or the new code of each position
+        """
+        if len(positions) == 0:
+            return
+        new_codes = np.broadcast_to(np.asarray(new_codes, dtype=np.int64), positions.shape)
+        self._ensure_code(int(new_codes.max()))
+        blocks: np.ndarray = positions // self.BLOCK_SIZE
+        np.subtract.at(self.block_counts, (blocks, old_codes + self.SENTINEL_OFFSET), 1)
+        np.add.at(self.block_counts, (blocks, new_codes + self.SENTINEL_OFFSET), 1)
+        self.counts -= np.bincount(old_codes + self.SENTINEL_OFFSET, minlength=len(self.counts))
+        self.counts += np.bincount(new_codes + self.SENTINEL_OFFSET, minlength=len(self.counts))
+
+    def get_count(self, code: int) -> int:
+        col: int = code + self.SENTINEL_OFFSET
+        if (col < 0) or (col >= len(self.counts)):
+            return 0
+        return int(self.counts[col])
+
+    def find_next(self, start_position: int, codes: list[int]) -> Optional[int]:
+        """
+        Finds the first position at or after start_position with one of the given codes, wrapping around to the
+        start of the store if none is found.
+        :return: the position found, or None if no document has any of the codes
+        """
+        cols: list[int] = [c + self.SENTINEL_OFFSET for c in codes if 0 <= c + self.SENTINEL_OFFSET < len(self.counts)]
+        if (len(cols) == 0) or (self.counts[cols].sum() == 0):
+            return None
+        found: Optional[int] = self._find_in_range(start_position, len(self.store), codes, cols)
+        if found is None:
+            found = self._find_in_range(0, start_position, codes, cols)
+        return found
+
+    def _find_in_range(self, start: int, end: int, codes: list[int], cols: list[int]) -> Optional[int]:
+        if start >= end:
+            return None
+        first_block: int = start // self.BLOCK_SIZE
+        last_block: int = (end - 1) // self.BLOCK_SIZE
+        block_has_code: np.ndarray = self.block_counts[first_block:last_block + 1, cols].sum(axis=1) > 0
+        for block_offset in np.flatnonzero(block_has_code):
+            block: int = first_block + int(block_offset)
+            block_start: int = max(block * self.BLOCK_SIZE, start)
+            block_end: int = min((block + 1) * self.BLOCK_SIZE, end)
+            matches: np.ndarray = np.flatnonzero(np.isin(self.store.codes[block_start:block_end], codes))
+            if len(matches):
+                return block_start + int(matches[0])
+        return None
@@ -0,0 +1,152 @@
+import atexit
+import logging
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, Future
+from concurrent.futures.process import BrokenProcessPool
+from os.path import join, exists
+from typing import Optional, TYPE_CHECKING
+
+import numpy as np
+from pandas import Series
+
+if TYPE_CHECKING:
+    from scipy.sparse import csr_matrix
+
+
+class CategoryModel:
+    """
+    Suggests categories for documents with a logistic regression over hashed word unigrams and bigrams, trained on the
+    documents annotated so far.
+    Training and scoring run in a single spawned worker process. The worker keeps the feature matrix of the most
+    recent corpus in memory, and the matrix is cached to disk for each corpus version, so the documents are only
+    vectorised once. Each training fits a new model on every annotated document, so changed annotations are taken
+    into account, and scores every document.
+    """
+    NUM_FEATURES: int = 2 ** 18
+    NGRAM_RANGE: tuple[int, int] = (1, 2)
+    MAX_ITERATIONS: int = 20
+    SEED: int = 42
+    CACHE_VERSION: int = 1
+    CACHE_SUBDIR: str = 'features'
+
+    # Held by the worker process, keyed by corpus fingerprint
+    _worker_features: dict[str, 'csr_matrix'] = {}
+
+    def __init__(self, cache_dir: Optional[str], logger_name: str):
+        self.cache_dir: Optional[str] = cache_dir
+        self.logger_name: str = logger_name
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.sent_fingerprints: set[str] = set()
+
+    def log(self, msg: str, level: int):
+        logger = logging.getLogger(self.logger_name)
+        logger.log(level, msg)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self.executor is None:
+            # The worker is spawned rather than forked as the server process runs other threads
+            mp_context = multiprocessing.get_context('spawn')
+            self.executor = ProcessPoolExecutor(max_workers=1, mp_context=mp_context)
+            self.sent_fingerprints = set()
+            atexit.register(self.shutdown)
+        return self.executor
+
+    def shutdown(self):
+        """
+        Stops the worker process, releasing the features it holds. A later fit_and_score() spawns a new worker
+        """
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+            atexit.unregister(self.shutdown)
+
+    def _get_cache_path(self, corpus_name: str, corpus_size: int, fingerprint: str) -> Optional[str]:
+        if self.cache_dir is None:
+            return None
+        safe_name: str = re.sub(r'[^\w.-]', '_', corpus_name)
+        file_name: str = f"{safe_name}-{corpus_size}-{fingerprint}-v{self.CACHE_VERSION}-{self.NUM_FEATURES}.npz"
+        return join(self.cache_dir, self.CACHE_SUBDIR, file_name)
+
+    def fit_and_score(self, docs: Series, corpus_name: str, fingerprint: str, positions: np.ndarray,
+                      codes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Trains a model on the annotated documents and scores every document. Blocks until the worker process is done,
+        so it should be called from a background thread.
+        :param docs: the documents in corpus order
+        :param fingerprint: identifies the version of the documents, as returned by CorpusView.get_fingerprint()
+        :param positions: the zero-based positions of the annotated documents
+        :param codes: the category code of each annotated document. At least two distinct codes are required
+        :return: the suggested category code of each document, and the probability the model gives the suggestion
+        :raises ValueError: if fewer than two categories have been annotated
+        """
+        if len(np.unique(codes)) < 2:
+            raise ValueError("At least two categories must be annotated before categories can be suggested")
+        cache_path: Optional[str] = self._get_cache_path(corpus_name, len(docs), fingerprint)
+        # The documents are only sent when the worker can neither find them in memory nor in the cache
+        doc_list: Optional[list[str]] = None
+        if (fingerprint not in self.sent_fingerprints) and ((cache_path is None) or not exists(cache_path)):
+            doc_list = docs.astype(str).tolist()
+        future: Future = self._get_executor().submit(self.fit_and_score_worker, fingerprint, cache_path, doc_list,
+                                                     positions, codes)
+        try:
+            result: tuple[np.ndarray, np.ndarray] = future.result()
+        except BrokenProcessPool:
+            # A new worker is started on the next call, and it will need to be sent the documents
+            self.executor = None
+            raise
+        self.sent_fingerprints.add(fingerprint)
+        self.log(f"Trained category model on {len(positions)} documents", logging.DEBUG)
+        return result
+
+    @classmethod
+    def _vectorise(cls, docs: list[str]) -> 'csr_matrix':
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        vectoriser = HashingVectorizer(n_features=cls.NUM_FEATURES, ngram_range=cls.NGRAM_RANGE,
+                                       alternate_sign=False, norm='l2', dtype=np.float32)
+        return vectoriser.transform(docs).tocsr()
+
+    @classmethod
+    def _get_worker_features(cls, fingerprint: str, cache_path: Optional[str],
+                             docs: Optional[list[str]]) -> 'csr_matrix':
+        from scipy.sparse import load_npz, save_npz
+
+        features: Optional['csr_matrix'] = cls._worker_features.get(fingerprint)
+        if features is not None:
+            return features
+        if (cache_path is not None) and exists(cache_path):
+            features = load_npz(cache_path).tocsr()
+        elif docs is not None:
+            features = cls._vectorise(docs)
+            if cache_path is not None:
+                os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                tmp_path: str = cache_path + '.tmp.npz'
+                save_npz(tmp_path, features)
+                os.replace(tmp_path, cache_path)
+        else:
+            raise ValueError("The documents to vectorise were not provided")
+        # Only the features of the most recent corpus are kept in memory
+        cls._worker_features.clear()
+        cls._worker_features[fingerprint] = features
+        return features
+
+    @classmethod
+    def fit_and_score_worker(cls, fingerprint: str, cache_path: Optional[str], docs: Optional[list[str]],
+                             positions: np.ndarray, codes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Run in the worker process.
+        :return: the suggested code of each document and its probability
+        """
+        from sklearn.linear_model import SGDClassifier
+
+        features: 'csr_matrix' = cls._get_worker_features(fingerprint, cache_path, docs)
+        model = SGDClassifier(loss='log_loss', max_iter=cls.MAX_ITERATIONS, tol=None, class_weight='balanced',
+                              random_state=cls.SEED)
+        model.fit(features[positions], codes)
+        probabilities: np.ndarray = model.predict_proba(features).astype(np.float32)
+        suggested_classes: np.ndarray = probabilities.argmax(axis=1)
+        suggested_codes: np.ndarray = model.classes_[suggested_classes].astype(np.int32)
+        confidence: np.ndarray = probabilities[np.arange(len(probabilities)), suggested_classes]
+        return suggested_codes, confidence
@@ -0,0 +1,113 @@
+from typing import Any, Optional, TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame, Series, CategoricalDtype
+
+if TYPE_CHECKING:
+    from atap_corpus.corpus.corpus import DataFrameCorpus
+
+
+class CorpusView:
+    """
+    A read-only, zero-copy view over the rows of a DataFrameCorpus.
+    One-based document indices are mapped to positions in the root dataframe of the corpus, and only the cells
+    that are requested are read. For a cloned corpus the positions are derived from its mask on first access.
+    """
+    MIN_DOCUMENT_IDX: int = 1
+    SAMPLE_SIZE: int = 1024
+
+    def __init__(self, corpus: 'DataFrameCorpus'):
+        self.corpus: 'DataFrameCorpus' = corpus
+        self._root_positions: Optional[np.ndarray] = None
+        self._size: Optional[int] = None
+        self._fingerprints: dict[str, str] = {}
+        self._sample_fingerprints: dict[str, str] = {}
+
+    def __len__(self) -> int:
+        if self._size is None:
+            if self.corpus.is_root:
+                self._size = len(self._get_root_df())
+            else:
+                self._size = int(np.count_nonzero(self._get_mask()))
+        return self._size
+
+    def _get_root_df(self) -> DataFrame:
+        return self.corpus.find_root()._df
+
+    def _get_mask(self) -> np.ndarray:
+        mask: Series = self.corpus._mask
+        return mask.reindex(self._get_root_df().index, fill_value=False).to_numpy(dtype=bool)
+
+    def _get_root_positions(self) -> Optional[np.ndarray]:
+        # None indicates the corpus is a root corpus, in which case positions are not remapped
+        if self.corpus.is_root:
+            return None
+        if self._root_positions is None:
+            self._root_positions = np.flatnonzero(self._get_mask())
+        return self._root_positions
+
+    def get_root_position(self, document_idx: int) -> int:
+        position: int = document_idx - self.MIN_DOCUMENT_IDX
+        if (position < 0) or (position >= len(self)):
+            raise IndexError(f"Document index {document_idx} is out of range")
+        root_positions: Optional[np.ndarray] = self._get_root_positions()
+        if root_positions is None:
+            return position
+        return int(root_positions[position])
+
+    def get_columns(self) -> list[str]:
+        return self._get_root_df().columns.tolist()
+
+    def get_cell(self, document_idx: int, column: str) -> Any:
+        root_df: DataFrame = self._get_root_df()
+        return root_df.iat[self.get_root_position(document_idx), root_df.columns.get_loc(column)]
+
+    def get_column(self, column: str) -> Series:
+        """
+        Returns the column in corpus order with a zero-based index. The column is only copied for cloned corpora.
+        """
+        col: Series = self._get_root_df()[column]
+        root_positions: Optional[np.ndarray] = self._get_root_positions()
+        if root_positions is not None:
+            col = col.iloc[root_positions]
+        return col.reset_index(drop=True)
+
+    def get_categorical_columns(self) -> list[str]:
+        return [col for col, dtype in self._get_root_df().dtypes.items() if isinstance(dtype, CategoricalDtype)]
+
+    @staticmethod
+    def _digest(values: Series) -> str:
+        value_hashes: np.ndarray = pd.util.hash_pandas_object(values, index=False).to_numpy()
+        # Weighting each hash by its position makes the digest depend on the order of the values
+        weights: np.ndarray = np.arange(1, len(value_hashes) + 1, dtype=np.uint64)
+        return f"{int(np.bitwise_xor.reduce(value_hashes * weights, initial=np.uint64(0))):016x}"
+
+    def get_fingerprint(self, column: str) -> str:
+        """
+        Returns a hexadecimal digest of the values of the column in corpus order, which identifies the version of the
+        corpus for caches stored on disk. The digest reads the whole column, so should be computed off the UI thread.
+        It is computed once for each column.
+        """
+        fingerprint: Optional[str] = self._fingerprints.get(column)
+        if fingerprint is None:
+            fingerprint = self._digest(self.get_column(column))
+            self._fingerprints[column] = fingerprint
+        return fingerprint
+
+    def get_sample_fingerprint(self, column: str) -> str:
+        """
+        Returns a hexadecimal digest of at most SAMPLE_SIZE evenly spaced values of the column, including the first
+        and last. Only the sampled cells are read, so it is cheap enough to compute whenever a corpus is selected,
+        but only detects changes to the sampled values or the length of the column.
+        """
+        fingerprint: Optional[str] = self._sample_fingerprints.get(column)
+        if fingerprint is None:
+            positions: np.ndarray = np.unique(np.linspace(0, len(self) - 1, min(len(self), self.SAMPLE_SIZE),
+                                                          dtype=np.int64))
+            root_positions: Optional[np.ndarray] = self._get_root_positions()
+            if root_positions is not None:
+                positions = root_positions[positions]
+            fingerprint = self._digest(self._get_root_df()[column].iloc[positions])
+            self._sample_fingerprints[column] = fingerprint
+        return fingerprint
@@ -0,0 +1,45 @@
+from io import StringIO
+
+from panel import Row, Column
+from panel.pane import DataFrame as DataFramePane, Markdown
+from panel.widgets import Button, FileDownload
+
+
+class DiagnosticsPanel:
+    """
+    Shows the recent latency percentiles of the annotator's display updates and corpus operations, and provides them
+    as a JSON download. The table is only refreshed on request so viewing it does not add to the measured latency.
+    """
+    DUMP_FILENAME: str = 'annotator_latency.json'
+
+    def __init__(self, controller):
+        self.controller = controller
+
+        self.refresh_button = Button(name='Refresh', button_type='primary', button_style='outline')
+        self.reset_button = Button(name='Reset', button_type='primary', button_style='outline')
+        self.download_button = FileDownload(callback=self._get_dump, filename=self.DUMP_FILENAME,
+                                            label='Download JSON', button_type='primary', button_style='outline')
+        self.stats_table = DataFramePane(sizing_mode='stretch_width')
+
+        self.panel = Column(
+            Markdown("Latency of the most recent calls, in milliseconds"),
+            Row(self.refresh_button, self.reset_button, self.download_button),
+            self.stats_table,
+            sizing_mode='stretch_width'
+        )
+
+        self.refresh_button.on_click(self.update_display)
+        self.reset_button.on_click(self._reset)
+
+    def __panel__(self):
+        return self.panel
+
+    def update_display(self, *_):
+        self.stats_table.object = self.controller.latency.get_stats_df()
+
+    def _reset(self, *_):
+        self.controller.latency.reset()
+        self.update_display()
+
+    def _get_dump(self) -> StringIO:
+        return StringIO(self.controller.latency.to_json())
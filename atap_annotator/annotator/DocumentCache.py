@@ -0,0 +1,106 @@
+import logging
+import threading
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+DocumentPayload = dict[str, str]
+
+
+class DocumentCache:
+    """
+    A bounded LRU cache of rendered document payloads, each mapping a meta name to its display string.
+    Whenever a document is requested, a background worker prefetches the following prefetch_next and the preceding
+    prefetch_prev documents so sequential navigation is served from memory.
+    The cache is invalidated with a new loader whenever the corpus or the displayed metas change.
+    """
+    def __init__(self, logger_name: str, prefetch_next: int, prefetch_prev: int, max_size: int):
+        self.logger_name: str = logger_name
+        self.prefetch_next: int = max(prefetch_next, 0)
+        self.prefetch_prev: int = max(prefetch_prev, 0)
+        self.max_size: int = max(max_size, 1 + self.prefetch_next + self.prefetch_prev)
+
+        self.loader: Optional[Callable[[int], DocumentPayload]] = None
+        self.min_document_idx: int = 0
+        self.max_document_idx: int = -1
+        # Incremented on invalidation so that prefetches started for a previous loader are discarded
+        self.generation: int = 0
+
+        self.lock = threading.Lock()
+        self.payloads: OrderedDict[int, DocumentPayload] = OrderedDict()
+        self.pending: set[int] = set()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='document-prefetch')
+
+    def log(self, msg: str, level: int):
+        logger = logging.getLogger(self.logger_name)
+        logger.log(level, msg)
+
+    def close(self):
+        """
+        Stops the prefetch worker. Documents are still loaded on request, but are no longer prefetched
+        """
+        self.invalidate()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def invalidate(self, loader: Optional[Callable[[int], DocumentPayload]] = None,
+                   min_document_idx: int = 0, max_document_idx: int = -1):
+        with self.lock:
+            self.generation += 1
+            self.loader = loader
+            self.min_document_idx = min_document_idx
+            self.max_document_idx = max_document_idx
+            self.payloads.clear()
+            self.pending.clear()
+
+    def get(self, document_idx: int) -> DocumentPayload:
+        with self.lock:
+            generation: int = self.generation
+            loader = self.loader
+            payload: Optional[DocumentPayload] = self.payloads.get(document_idx)
+            if payload is not None:
+                self.payloads.move_to_end(document_idx)
+        if loader is None:
+            return {}
+        if payload is None:
+            payload = loader(document_idx)
+            self._store(generation, document_idx, payload)
+        self._schedule_prefetch(document_idx)
+
+        return payload
+
+    def _store(self, generation: int, document_idx: int, payload: DocumentPayload):
+        with self.lock:
+            if generation != self.generation:
+                return
+            self.pending.discard(document_idx)
+            self.payloads[document_idx] = payload
+            self.payloads.move_to_end(document_idx)
+            while len(self.payloads) > self.max_size:
+                self.payloads.popitem(last=False)
+
+    def _schedule_prefetch(self, document_idx: int):
+        candidates: list[int] = list(range(document_idx + 1, document_idx + self.prefetch_next + 1))
+        candidates += list(range(document_idx - 1, document_idx - self.prefetch_prev - 1, -1))
+        with self.lock:
+            generation: int = self.generation
+            targets: list[int] = [idx for idx in candidates
+                                  if (self.min_document_idx <= idx <= self.max_document_idx)
+                                  and (idx not in self.payloads) and (idx not in self.pending)]
+            self.pending.update(targets)
+            loader = self.loader
+        if (loader is not None) and len(targets):
+            self.executor.submit(self._prefetch, generation, loader, targets)
+
+    def _prefetch(self, generation: int, loader: Callable[[int], DocumentPayload], targets: list[int]):
+        for document_idx in targets:
+            if generation != self.generation:
+                return
+            try:
+                payload: DocumentPayload = loader(document_idx)
+            except Exception:
+                self.log(traceback.format_exc(), logging.DEBUG)
+                with self.lock:
+                    self.pending.discard(document_idx)
+                continue
+            self._store(generation, document_idx, payload)
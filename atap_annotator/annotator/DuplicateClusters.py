@@ -0,0 +1,185 @@
+import logging
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from os.path import join, exists
+from typing import Optional
+
+import numpy as np
+from pandas import Series
+
+
+class DuplicateClusters:
+    """
+    Groups near-duplicate documents using MinHash signatures and locality sensitive hashing.
+    Documents are lowercased with whitespace collapsed and shingled into overlapping character SHINGLE_SIZE-grams.
+    Signatures are computed over chunks of documents in a process pool and cached to disk for each corpus, keyed by a
+    fingerprint of the documents, so changing the similarity threshold does not recompute them.
+    Documents sharing a band of their signature are candidates, and candidates whose signatures agree in at least
+    the threshold fraction of positions, an estimate of their Jaccard similarity, are clustered together.
+    """
+    SHINGLE_SIZE: int = 5
+    NUM_PERMUTATIONS: int = 64
+    NUM_BANDS: int = 16
+    DEFAULT_THRESHOLD: float = 0.8
+    SEED: int = 42
+    CHUNK_CHARS: int = 2000000
+    MIN_PARALLEL_DOCUMENTS: int = 5000
+    CACHE_VERSION: int = 1
+    CACHE_SUBDIR: str = 'minhash'
+
+    def __init__(self, cache_dir: Optional[str], logger_name: str):
+        self.cache_dir: Optional[str] = cache_dir
+        self.logger_name: str = logger_name
+
+    def log(self, msg: str, level: int):
+        logger = logging.getLogger(self.logger_name)
+        logger.log(level, msg)
+
+    @classmethod
+    def _get_permutations(cls) -> tuple[np.ndarray, np.ndarray]:
+        rng: np.random.Generator = np.random.default_rng(cls.SEED)
+        max_value: np.uint64 = np.iinfo(np.uint64).max
+        multipliers: np.ndarray = rng.integers(1, max_value, cls.NUM_PERMUTATIONS, dtype=np.uint64) | np.uint64(1)
+        offsets: np.ndarray = rng.integers(0, max_value, cls.NUM_PERMUTATIONS, dtype=np.uint64)
+        return multipliers, offsets
+
+    @classmethod
+    def compute_chunk_signatures(cls, docs: list[str]) -> np.ndarray:
+        """
+        Computes the MinHash signatures of a chunk of documents. Run in the worker processes.
+        :return: an array of shape (len(docs), NUM_PERMUTATIONS)
+        """
+        encoded_docs: list[bytes] = []
+        for doc in docs:
+            encoded_doc: bytes = re.sub(r'\s+', ' ', str(doc).lower()).strip().encode('utf-8')
+            encoded_docs.append(encoded_doc.ljust(cls.SHINGLE_SIZE))
+        lengths: np.ndarray = np.fromiter((len(d) for d in encoded_docs), dtype=np.int64, count=len(encoded_docs))
+        buffer: np.ndarray = np.frombuffer(b''.join(encoded_docs), dtype=np.uint8)
+
+        # Each shingle of up to 8 bytes is packed into a single integer, so distinct shingles never collide
+        num_positions: int = len(buffer) - cls.SHINGLE_SIZE + 1
+        shingles: np.ndarray = np.zeros(num_positions, dtype=np.uint64)
+        for offset in range(cls.SHINGLE_SIZE):
+            shingles = (shingles << np.uint64(8)) | buffer[offset:offset + num_positions].astype(np.uint64)
+        # Shingles crossing the boundary between two documents are excluded
+        doc_starts: np.ndarray = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        shingle_counts: np.ndarray = lengths - cls.SHINGLE_SIZE + 1
+        valid: np.ndarray = np.zeros(num_positions + cls.SHINGLE_SIZE, dtype=np.int8)
+        np.add.at(valid, doc_starts, 1)
+        np.add.at(valid, doc_starts + shingle_counts, -1)
+        shingles = shingles[np.cumsum(valid[:num_positions]) > 0]
+        shingle_starts: np.ndarray = np.concatenate(([0], np.cumsum(shingle_counts)[:-1]))
+
+        multipliers, offsets = cls._get_permutations()
+        signatures: np.ndarray = np.empty((len(docs), cls.NUM_PERMUTATIONS), dtype=np.uint32)
+        permuted: np.ndarray = np.empty_like(shingles)
+        for i in range(cls.NUM_PERMUTATIONS):
+            # Multiply-shift hashing, wrapping on overflow, with the top 32 bits as the permuted value. The shift is
+            # monotonic, so it is applied after taking the minimum of each document
+            np.multiply(shingles, multipliers[i], out=permuted)
+            np.add(permuted, offsets[i], out=permuted)
+            signatures[:, i] = np.minimum.reduceat(permuted, shingle_starts) >> np.uint64(32)
+        return signatures
+
+    @classmethod
+    def _split_chunks(cls, docs: list[str]) -> list[list[str]]:
+        chunks: list[list[str]] = []
+        chunk_start: int = 0
+        chunk_chars: int = 0
+        for i, doc in enumerate(docs):
+            chunk_chars += len(doc)
+            if chunk_chars >= cls.CHUNK_CHARS:
+                chunks.append(docs[chunk_start:i + 1])
+                chunk_start = i + 1
+                chunk_chars = 0
+        if chunk_start < len(docs):
+            chunks.append(docs[chunk_start:])
+        return chunks
+
+    def _get_cache_path(self, corpus_name: str, corpus_size: int, fingerprint: str) -> Optional[str]:
+        if self.cache_dir is None:
+            return None
+        safe_name: str = re.sub(r'[^\w.-]', '_', corpus_name)
+        file_name: str = (f"{safe_name}-{corpus_size}-{fingerprint}-v{self.CACHE_VERSION}-"
+                          f"{self.SHINGLE_SIZE}-{self.NUM_PERMUTATIONS}.npy")
+        return join(self.cache_dir, self.CACHE_SUBDIR, file_name)
+
+    def compute_signatures(self, docs: Series, corpus_name: str, fingerprint: str,
+                           num_workers: Optional[int] = None) -> np.ndarray:
+        """
+        Computes the MinHash signatures of the documents, or loads them from the cache.
+        :param docs: the documents in corpus order
+        :param fingerprint: identifies the version of the documents in the cache, as returned by
+        CorpusView.get_fingerprint()
+        :param num_workers: the number of worker processes. Defaults to the number of CPUs
+        :return: an array of shape (len(docs), NUM_PERMUTATIONS)
+        """
+        docs = docs.reset_index(drop=True)
+        cache_path: Optional[str] = self._get_cache_path(corpus_name, len(docs), fingerprint)
+        if (cache_path is not None) and exists(cache_path):
+            self.log(f"Loaded MinHash signatures from {cache_path}", logging.DEBUG)
+            return np.load(cache_path)
+
+        doc_list: list[str] = docs.astype(str).tolist()
+        if len(doc_list) == 0:
+            return np.empty((0, self.NUM_PERMUTATIONS), dtype=np.uint32)
+        chunks: list[list[str]] = self._split_chunks(doc_list)
+        if (len(doc_list) < self.MIN_PARALLEL_DOCUMENTS) or (len(chunks) == 1) or (num_workers == 1):
+            chunk_signatures: list[np.ndarray] = [self.compute_chunk_signatures(chunk) for chunk in chunks]
+        else:
+            # Worker processes are spawned rather than forked as the server process runs other threads
+            mp_context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=num_workers, mp_context=mp_context) as executor:
+                chunk_signatures = list(executor.map(self.compute_chunk_signatures, chunks))
+        signatures: np.ndarray = np.concatenate(chunk_signatures)
+
+        if cache_path is not None:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            tmp_path: str = cache_path + '.tmp'
+            with open(tmp_path, 'wb') as cache_file:
+                np.save(cache_file, signatures)
+            os.replace(tmp_path, cache_path)
+            self.log(f"Cached MinHash signatures to {cache_path}", logging.DEBUG)
+        return signatures
+
+    @classmethod
+    def cluster(cls, signatures: np.ndarray, threshold: float = DEFAULT_THRESHOLD) -> np.ndarray:
+        """
+        Clusters documents whose estimated Jaccard similarity is at least the threshold.
+        :return: the cluster of each document. Clusters are numbered in order of their first document
+        """
+        from scipy.sparse import coo_matrix
+        from scipy.sparse.csgraph import connected_components
+
+        num_documents: int = len(signatures)
+        rows_per_band: int = cls.NUM_PERMUTATIONS // cls.NUM_BANDS
+        edge_sources: list[np.ndarray] = []
+        edge_targets: list[np.ndarray] = []
+        for band in range(cls.NUM_BANDS):
+            band_values: np.ndarray = signatures[:, band * rows_per_band:(band + 1) * rows_per_band]
+            band_dtype = np.dtype((np.void, band_values.shape[1] * band_values.itemsize))
+            band_keys: np.ndarray = np.ascontiguousarray(band_values).view(band_dtype)
+            _, buckets = np.unique(band_keys.ravel(), return_inverse=True)
+            # Each document is compared with the first document in its bucket
+            bucket_firsts: np.ndarray = np.full(buckets.max() + 1, num_documents, dtype=np.int64)
+            np.minimum.at(bucket_firsts, buckets, np.arange(num_documents))
+            firsts: np.ndarray = bucket_firsts[buckets]
+            candidates: np.ndarray = np.flatnonzero(firsts != np.arange(num_documents))
+            if len(candidates) == 0:
+                continue
+            similarity: np.ndarray = (signatures[candidates] == signatures[firsts[candidates]]).mean(axis=1)
+            similar: np.ndarray = candidates[similarity >= threshold]
+            edge_sources.append(similar)
+            edge_targets.append(firsts[similar])
+
+        sources: np.ndarray = np.concatenate(edge_sources) if len(edge_sources) else np.empty(0, dtype=np.int64)
+        targets: np.ndarray = np.concatenate(edge_targets) if len(edge_targets) else np.empty(0, dtype=np.int64)
+        graph = coo_matrix((np.ones(len(sources), dtype=np.int8), (sources, targets)),
+                           shape=(num_documents, num_documents))
+        _, labels = connected_components(graph, directed=False)
+        # Renumbers the clusters so they are ordered by their first document
+        _, first_positions, ordered_labels = np.unique(labels, return_index=True, return_inverse=True)
+        cluster_order: np.ndarray = np.argsort(np.argsort(first_positions))
+        return cluster_order[ordered_labels].astype(np.int32)
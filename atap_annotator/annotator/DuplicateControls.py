@@ -0,0 +1,46 @@
+from panel import Row, Column
+from panel.widgets import Button, Checkbox, FloatInput
+
+from atap_annotator.annotator.DuplicateClusters import DuplicateClusters
+
+
+class DuplicateControls:
+    """
+    Clusters near-duplicate documents so only one document of each cluster is navigated, with the category chosen for
+    it applied to the whole cluster.
+    """
+    STANDARD_WIDTH: int = 150
+
+    def __init__(self, controller):
+        self.controller = controller
+
+        self.threshold_input = FloatInput(name='Similarity threshold', width=self.STANDARD_WIDTH,
+                                          value=DuplicateClusters.DEFAULT_THRESHOLD, start=0.05, end=1.0, step=0.05)
+        self.find_button = Button(name='Find near-duplicates', button_type='primary', button_style='outline')
+        self.clear_button = Button(name='Clear clusters', button_type='primary', button_style='outline',
+                                   disabled=True)
+        self.propagate_checkbox = Checkbox(name='Apply category to whole cluster', value=True)
+
+        self.panel = Column(
+            Row(self.threshold_input, self.find_button, self.clear_button),
+            Row(self.propagate_checkbox)
+        )
+
+        self.find_button.on_click(self._find_duplicates)
+        self.clear_button.on_click(self._clear_duplicates)
+        self.propagate_checkbox.param.watch(self._set_propagate, ['value'])
+
+    def __panel__(self):
+        return self.panel
+
+    def update_display(self):
+        self.clear_button.disabled = not self.controller.has_duplicate_clusters()
+
+    def _find_duplicates(self, *_):
+        self.controller.find_duplicates(self.threshold_input.value)
+
+    def _clear_duplicates(self, *_):
+        self.controller.clear_duplicates()
+
+    def _set_propagate(self, *_):
+        self.controller.set_propagate_to_clusters(self.propagate_checkbox.value)
@@ -0,0 +1,90 @@
+import param
+from panel.reactive import ReactiveHTML
+
+
+class KeyboardShortcuts(ReactiveHTML):
+    """
+    Listens for annotation shortcuts in the browser and sends them to the server in batches.
+    Key presses are queued on the client and coalesced, so consecutive moves are summed and a category chosen for a
+    document replaces one chosen before it. The queue is sent as a single update once no key has been pressed for
+    debounce_ms milliseconds, so rapid annotation does not make a server round-trip per key.
+    Keys are ignored while a text input, select or editable element has focus.
+
+    Each batch is a dict of a sequence number and a list of actions, where each action is one of
+    ['set', category number], ['clear'], ['move', steps], ['label', category number, steps], ['undo'] or ['redo'].
+    Category numbers are one-based positions in the category selector.
+    """
+    batch = param.Dict(default={}, doc="The most recent batch of actions sent from the client")
+    debounce_ms = param.Integer(default=150, bounds=(0, None))
+
+    HELP_TEXT: str = ("Keys: 1\N{EN DASH}9 choose category \N{MIDDLE DOT} 0 clear \N{MIDDLE DOT} "
+                      "\N{LEFTWARDS ARROW}/\N{RIGHTWARDS ARROW} or J/K previous/next \N{MIDDLE DOT} "
+                      "Shift+1\N{EN DASH}9 label and next \N{MIDDLE DOT} U undo \N{MIDDLE DOT} R redo")
+
+    _template = f'<div id="help" style="font-size: 0.85em; color: grey;">{HELP_TEXT}</div>'
+
+    _scripts = {
+        'render': """
+            state.pending = [];
+            state.sequence = 0;
+            state.timer = null;
+            state.flush = () => {
+                state.timer = null;
+                if (state.pending.length === 0) {
+                    return;
+                }
+                state.sequence += 1;
+                data.batch = {sequence: state.sequence, actions: state.pending};
+                state.pending = [];
+            };
+            state.push = (action) => {
+                const last = state.pending.length ? state.pending[state.pending.length - 1] : null;
+                if (last && (last[0] === 'move') && (action[0] === 'move')) {
+                    last[1] += action[1];
+                } else if (last && (['set', 'clear'].includes(last[0])) && (['set', 'clear'].includes(action[0]))) {
+                    state.pending[state.pending.length - 1] = action;
+                } else {
+                    state.pending.push(action);
+                }
+                clearTimeout(state.timer);
+                state.timer = setTimeout(state.flush, data.debounce_ms);
+            };
+            state.handler = (event) => {
+                if (event.ctrlKey || event.metaKey || event.altKey) {
+                    return;
+                }
+                const target = event.composedPath()[0];
+                if (target && (['INPUT', 'TEXTAREA', 'SELECT'].includes(target.tagName) || target.isContentEditable)) {
+                    return;
+                }
+                let action = null;
+                const digit = event.code.startsWith('Digit') ? parseInt(event.code.slice(5)) : NaN;
+                if (!isNaN(digit)) {
+                    if (digit === 0) {
+                        action = ['clear'];
+                    } else {
+                        action = event.shiftKey ? ['label', digit, 1] : ['set', digit];
+                    }
+                } else if ((event.key === 'ArrowRight') || (event.key.toLowerCase() === 'k')) {
+                    action = ['move', 1];
+                } else if ((event.key === 'ArrowLeft') || (event.key.toLowerCase() === 'j')) {
+                    action = ['move', -1];
+                } else if (event.key.toLowerCase() === 'u') {
+                    action = ['undo'];
+                } else if (event.key.toLowerCase() === 'r') {
+                    action = ['redo'];
+                }
+                if (action === null) {
+                    return;
+                }
+                event.preventDefault();
+                state.push(action);
+            };
+            document.addEventListener('keydown', state.handler);
+        """,
+        'remove': """
+            document.removeEventListener('keydown', state.handler);
+            clearTimeout(state.timer);
+            state.flush();
+        """
+    }
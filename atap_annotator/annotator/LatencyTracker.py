@@ -0,0 +1,95 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+import numpy as np
+from pandas import DataFrame
+
+
+class LatencyTracker:
+    """
+    Records how long named operations take, keeping the most recent WINDOW_SIZE durations of each operation in a
+    fixed size ring buffer so the percentiles reflect recent interaction rather than the whole session.
+    Recording is a clock read and an array write, so it is cheap enough to leave enabled on every interaction.
+    Durations may be recorded from any thread.
+    """
+    WINDOW_SIZE: int = 1000
+    PERCENTILES: tuple[int, ...] = (50, 95, 99)
+    STATS_COLUMNS: list[str] = ['count', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms', 'total_ms']
+
+    def __init__(self, window_size: int = WINDOW_SIZE):
+        self.window_size: int = max(window_size, 1)
+        self.lock = threading.Lock()
+        # Each operation has a ring buffer of durations in seconds, the number of durations ever recorded,
+        # and their total
+        self.durations: dict[str, np.ndarray] = {}
+        self.counts: dict[str, int] = {}
+        self.totals: dict[str, float] = {}
+
+    def record(self, operation: str, duration: float):
+        """
+        :param duration: the duration of the operation in seconds
+        """
+        with self.lock:
+            durations: np.ndarray = self.durations.get(operation)
+            if durations is None:
+                durations = np.empty(self.window_size, dtype=np.float64)
+                self.durations[operation] = durations
+                self.counts[operation] = 0
+                self.totals[operation] = 0.0
+            count: int = self.counts[operation]
+            durations[count % self.window_size] = duration
+            self.counts[operation] = count + 1
+            self.totals[operation] += duration
+
+    @contextmanager
+    def time(self, operation: str) -> Iterator[None]:
+        start: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(operation, time.perf_counter() - start)
+
+    def reset(self):
+        with self.lock:
+            self.durations.clear()
+            self.counts.clear()
+            self.totals.clear()
+
+    def get_stats(self) -> dict[str, dict[str, float]]:
+        """
+        :return: for each operation, the number of times it was recorded, the percentiles and maximum of its recent
+        durations, and the total of all its durations, all in milliseconds
+        """
+        with self.lock:
+            windows: dict[str, np.ndarray] = {
+                operation: durations[:min(self.counts[operation], self.window_size)].copy()
+                for operation, durations in self.durations.items()
+            }
+            counts: dict[str, int] = dict(self.counts)
+            totals: dict[str, float] = dict(self.totals)
+        stats: dict[str, dict[str, float]] = {}
+        for operation in sorted(windows):
+            window_ms: np.ndarray = windows[operation] * 1000
+            percentiles: np.ndarray = np.percentile(window_ms, self.PERCENTILES)
+            operation_stats: dict[str, float] = {'count': counts[operation]}
+            for percentile, value in zip(self.PERCENTILES, percentiles):
+                operation_stats[f'p{percentile}_ms'] = round(float(value), 3)
+            operation_stats['max_ms'] = round(float(window_ms.max()), 3)
+            operation_stats['total_ms'] = round(totals[operation] * 1000, 3)
+            stats[operation] = operation_stats
+        return stats
+
+    def get_stats_df(self) -> DataFrame:
+        stats_df = DataFrame.from_dict(self.get_stats(), orient='index', columns=self.STATS_COLUMNS)
+        stats_df.index.name = 'operation'
+        return stats_df
+
+    def to_json(self) -> str:
+        return json.dumps({'window_size': self.window_size, 'operations': self.get_stats()}, indent=2)
+
+    def dump(self, file_path: str):
+        with open(file_path, 'w', encoding='utf-8') as dump_file:
+            dump_file.write(self.to_json())
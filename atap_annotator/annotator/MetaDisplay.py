@@ -1,24 +1,125 @@
+from typing import Optional
+
 from panel import Column, Tabs
+from panel.pane import Markdown, Str
+from panel.widgets import Button
+
+
+class MetaTab:
+    """
+    A scrollable view of a single meta. The text is rendered in pages that are appended as the user scrolls towards
+    the end of the loaded text, so only the start of a long document is sent to the browser.
+    """
+    PAGE_SIZE: int = 10000
+    # Used to estimate the rendered height of the loaded pages
+    CHARS_PER_LINE: int = 110
+    LINE_HEIGHT: int = 24
+
+    def __init__(self, meta_name: str, height: int):
+        self.height: int = height
+        self.text: str = ''
+        self.loaded_length: int = 0
+        self.estimated_height: int = 0
+
+        self.size_indicator = Str(margin=(0, 10))
+        self.pages = Column(height=height, scroll=True, sizing_mode='stretch_width')
+        self.load_more_button = Button(name='Load more', button_type='primary', button_style='outline',
+                                       visible=False)
+        self.panel = Column(self.size_indicator, self.pages, self.load_more_button, name=meta_name)
+
+        self.load_more_button.on_click(self.load_next_page)
+        self.pages.param.watch(self._load_on_scroll, ['scroll_position'])
+
+    def __panel__(self):
+        return self.panel
+
+    def set_text(self, text: str):
+        # The text is cleared before scrolling back to the top so the scroll watcher doesn't load stale pages
+        self.text = ''
+        self.loaded_length = 0
+        self.estimated_height = 0
+        self.pages.objects = []
+        self.pages.scroll_position = 0
+
+        self.text = text
+        self.load_next_page()
+        self._load_on_scroll()
+
+    def is_fully_loaded(self) -> bool:
+        return self.loaded_length >= len(self.text)
+
+    def load_next_page(self, *_):
+        if self.is_fully_loaded() and (len(self.pages.objects) > 0):
+            return
+        page_end: int = min(self.loaded_length + self.PAGE_SIZE, len(self.text))
+        if page_end < len(self.text):
+            # Break pages on a line boundary where possible to avoid splitting paragraphs
+            newline_idx: int = self.text.rfind('\n', self.loaded_length, page_end)
+            if newline_idx > self.loaded_length:
+                page_end = newline_idx + 1
+        page: str = self.text[self.loaded_length:page_end]
+        self.loaded_length = page_end
+        line_count: int = max(page.count('\n'), len(page) // self.CHARS_PER_LINE) + 1
+        self.estimated_height += line_count * self.LINE_HEIGHT
+
+        self.pages.append(Markdown(page, sizing_mode='stretch_width'))
+        self._update_size_indicator()
+
+    def _load_on_scroll(self, *_):
+        # Keep at least two screens of text loaded below the current scroll position
+        while (not self.is_fully_loaded()) and \
+                (self.pages.scroll_position + (2 * self.height) >= self.estimated_height):
+            self.load_next_page()
+
+    def _update_size_indicator(self):
+        total_length: int = len(self.text)
+        if self.is_fully_loaded():
+            self.size_indicator.object = f"{total_length:,} characters"
+        else:
+            self.size_indicator.object = f"Showing {self.loaded_length:,} of {total_length:,} characters"
+        self.load_more_button.visible = not self.is_fully_loaded()
 
 
 class MetaDisplay:
     """
-    Controls the document view and rendering
+    Controls the document view and rendering.
+    The tabs are only rebuilt when the metas change. When the document changes, only the text of the active tab is
+    re-rendered and the other tabs are refreshed when they are next selected.
     """
     TAB_WIDTH: int = 900
     COL_HEIGHT: int = 500
 
     def __init__(self, controller):
         self.controller = controller
+        self.meta_tabs: dict[str, MetaTab] = {}
+        self.stale_metas: set[str] = set()
 
-        self.panel = Tabs(tabs_location='left', width=self.TAB_WIDTH)
+        self.panel = Tabs(tabs_location='left', width=self.TAB_WIDTH, dynamic=True)
+        self.panel.param.watch(self._update_active_meta, ['active'])
 
     def __panel__(self):
         return self.panel
 
     def update_display(self):
-        col_objs: list[Column] = []
-        for meta_name in self.controller.get_all_metas():
-            meta_text: str = self.controller.get_curr_meta_str(meta_name)
-            col_objs.append(Column(meta_text, height=self.COL_HEIGHT, name=meta_name, scroll=True))
-        self.panel.objects = col_objs
+        all_metas: list[str] = self.controller.get_all_metas()
+        if all_metas != list(self.meta_tabs.keys()):
+            self.meta_tabs = {meta_name: MetaTab(meta_name, self.COL_HEIGHT) for meta_name in all_metas}
+            self.panel.objects = [meta_tab.panel for meta_tab in self.meta_tabs.values()]
+        self.update_document()
+
+    def update_document(self):
+        self.stale_metas = set(self.meta_tabs.keys())
+        self._update_active_meta()
+
+    def _get_active_meta(self) -> Optional[str]:
+        if len(self.panel.objects) == 0:
+            return None
+        active_idx: int = min(self.panel.active, len(self.panel.objects) - 1)
+        return self.panel.objects[active_idx].name
+
+    def _update_active_meta(self, *_):
+        meta_name: Optional[str] = self._get_active_meta()
+        if meta_name not in self.stale_metas:
+            return
+        self.meta_tabs[meta_name].set_text(self.controller.get_curr_meta_str(meta_name))
+        self.stale_metas.discard(meta_name)
@@ -1,11 +1,15 @@
+from typing import Optional
+
 from panel import Row, Column
-from panel.widgets import Button, IntInput, RadioButtonGroup
+from panel.widgets import Button, IntInput, RadioButtonGroup, Select
 from panel.pane import Str
 
 
 class Navigator:
     def __init__(self, controller):
         self.controller = controller
+        # Set while the widgets are updated from the controller state so the watchers don't echo the values back
+        self.updating: bool = False
 
         self.document_idx_control = IntInput(value=self.controller.get_min_document_idx(), width=70, step=1,
                                              start=self.controller.get_min_document_idx(),
@@ -22,12 +26,31 @@ class Navigator:
         self.reset_button.on_click(self.reset_to_default)
         self.set_default_button = Button(name="Set as default", button_type="warning", button_style="outline")
         self.set_default_button.on_click(self.set_as_default)
+        self.undo_button = Button(name="\N{ANTICLOCKWISE OPEN CIRCLE ARROW} Undo", button_type="primary",
+                                  button_style="outline", disabled=True)
+        self.undo_button.on_click(self.undo)
+        self.redo_button = Button(name="Redo \N{CLOCKWISE OPEN CIRCLE ARROW}", button_type="primary",
+                                  button_style="outline", disabled=True)
+        self.redo_button.on_click(self.redo)
         self.category_selector = RadioButtonGroup(
             options=self.controller.get_all_categories(),
             value=None,
             button_type="primary", button_style="outline"
         )
         self.clear_category_button = Button(name='Clear', button_type="primary")
+        self.suggestion_info = Str()
+        self.accept_suggestion_button = Button(name="Accept suggestion", button_type="success",
+                                               button_style="outline", visible=False)
+        self.accept_suggestion_button.on_click(self.accept_suggestion)
+
+        self.next_unannotated_button = Button(name="Next unannotated", button_type="primary", button_style="outline")
+        self.next_unannotated_button.on_click(self.next_unannotated)
+        self.jump_category_selector = Select(options=self.controller.get_all_categories(), width=120)
+        self.next_with_category_button = Button(name="Next with category", button_type="primary",
+                                                button_style="outline")
+        self.next_with_category_button.on_click(self.next_with_category)
+        self.category_counts = Str()
+        self.navigation_info = Str()
 
         self.panel = Column(
             Row(self.prev_document_button,
@@ -35,8 +58,13 @@ class Navigator:
                 self.document_idx_control,
                 self.next_document_button,
                 align="center"),
-            Row(self.reset_button, self.set_default_button, align="center"),
+            Row(self.reset_button, self.set_default_button, self.undo_button, self.redo_button, align="center"),
             Row(self.category_selector, self.clear_category_button, align="center"),
+            Row(self.suggestion_info, self.accept_suggestion_button, align="center"),
+            Row(self.next_unannotated_button, self.jump_category_selector, self.next_with_category_button,
+                align="center"),
+            Row(self.category_counts, align="center"),
+            Row(self.navigation_info, align="center"),
             sizing_mode="stretch_width"
         )
 
@@ -48,13 +76,70 @@ class Navigator:
         return self.panel
 
     def update_display(self):
-        self.document_idx_control.value = self.controller.get_curr_document_idx()
-        self.document_idx_control.start = self.controller.get_min_document_idx()
-        self.document_idx_control.end = self.controller.get_max_document_idx()
-
-        self.category_selector.options = self.controller.get_all_categories()
-        self.category_selector.value = self.controller.get_curr_category()
-        self._set_default_buttons()
+        self.updating = True
+        try:
+            self.document_idx_control.start = self.controller.get_min_document_idx()
+            self.document_idx_control.end = self.controller.get_max_document_idx()
+            all_categories: list[str] = self.controller.get_all_categories()
+            if self.category_selector.options != all_categories:
+                self.category_selector.options = all_categories
+                self.jump_category_selector.options = all_categories
+        finally:
+            self.updating = False
+        self.update_document()
+
+    def update_document(self):
+        self.updating = True
+        try:
+            self.document_idx_control.value = self.controller.get_curr_document_idx()
+            self.category_selector.value = self.controller.get_curr_category()
+            self._set_default_buttons()
+            self._update_category_counts()
+            self.navigation_info.object = self.controller.get_navigation_str()
+            self._update_suggestion()
+            self._update_history_buttons()
+        finally:
+            self.updating = False
+
+    def _update_suggestion(self):
+        suggestion: Optional[tuple[str, float]] = self.controller.get_curr_suggestion()
+        self.accept_suggestion_button.visible = suggestion is not None
+        if suggestion is None:
+            self.suggestion_info.object = ''
+            return
+        category, confidence = suggestion
+        self.suggestion_info.object = f"Suggested: {category} ({confidence:.0%} confident)"
+
+    def _update_history_buttons(self):
+        self.undo_button.disabled = not self.controller.can_undo()
+        self.redo_button.disabled = not self.controller.can_redo()
+
+    def undo(self, *_):
+        self.controller.undo()
+
+    def redo(self, *_):
+        self.controller.redo()
+
+    def accept_suggestion(self, *_):
+        suggestion: Optional[tuple[str, float]] = self.controller.get_curr_suggestion()
+        if suggestion is None:
+            return
+        # The category is set directly, as a suggestion matching the displayed category would not change the selector
+        # value and so would not be recorded
+        self.controller.set_curr_category(suggestion[0])
+        self.update_document()
+
+    def _update_category_counts(self):
+        counts: dict[str, int] = self.controller.get_category_counts()
+        self.category_counts.object = ' | '.join([f"{state}: {count:,}" for state, count in counts.items()])
+
+    def next_unannotated(self, *_):
+        self.controller.next_unannotated_document()
+
+    def next_with_category(self, *_):
+        category: str = self.jump_category_selector.value
+        if category is not None:
+            self.controller.next_document_with_category(category)
 
     def _clear_categories(self, *_):
         self.category_selector.value = None
@@ -66,9 +151,11 @@ class Navigator:
         self.controller.prev_document()
 
     def set_document_idx(self, *_):
+        if self.updating:
+            return
         document_idx: int = self.document_idx_control.value
+        # The controller updates the document displays, including this view
         self.controller.set_curr_document_idx(document_idx)
-        self.update_display()
 
     def _set_default_buttons(self):
         classes_are_default = self.category_selector.value == self.controller.get_default_category()
@@ -85,7 +172,13 @@ class Navigator:
     def set_as_default(self, *_):
         self.controller.set_default_category(self.category_selector.value)
         self._set_default_buttons()
+        self._update_history_buttons()
 
     def set_category(self, *_):
+        if self.updating:
+            return
         self.controller.set_curr_category(self.category_selector.value)
         self._set_default_buttons()
+        self._update_category_counts()
+        self._update_suggestion()
+        self._update_history_buttons()
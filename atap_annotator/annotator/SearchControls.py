@@ -0,0 +1,63 @@
+from typing import Optional
+
+from panel import Row, Column
+from panel.pane import Str
+from panel.widgets import Button, Checkbox, TextInput
+
+
+class SearchControls:
+    """
+    Indexes the documents of the selected corpus for full-text search and restricts navigation to the documents
+    matching a query.
+    Queries combine words and quoted phrases with AND, OR, NOT and parentheses, e.g. "climate change" -policy.
+    """
+    STANDARD_WIDTH: int = 150
+
+    def __init__(self, controller):
+        self.controller = controller
+
+        self.enable_checkbox = Checkbox(name='Index documents for search', value=False)
+        self.query_input = TextInput(name='Search', width=2 * self.STANDARD_WIDTH, disabled=True,
+                                     placeholder='"exact phrase" word OR other -excluded')
+        self.search_button = Button(name='Search', button_type='primary', button_style='outline', disabled=True,
+                                    align='end')
+        self.clear_button = Button(name='Clear search', button_type='primary', button_style='outline', align='end')
+        self.status = Str()
+
+        self.panel = Column(
+            Row(self.enable_checkbox, self.status),
+            Row(self.query_input, self.search_button, self.clear_button)
+        )
+
+        self.enable_checkbox.param.watch(self._set_enabled, ['value'])
+        # The query is also searched when enter is pressed
+        self.query_input.param.watch(self._search, ['value'])
+        self.search_button.on_click(self._search)
+        self.clear_button.on_click(self._clear_search)
+
+    def __panel__(self):
+        return self.panel
+
+    def update_display(self):
+        indexed_count: Optional[int] = self.controller.get_indexed_count()
+        searchable: bool = indexed_count is not None
+        self.query_input.disabled = not searchable
+        self.search_button.disabled = not searchable
+        if searchable:
+            self.set_status(f"Indexed {indexed_count:,} documents")
+        elif not self.controller.indexing:
+            self.set_status('')
+
+    def set_status(self, status: str):
+        self.status.object = status
+
+    def _set_enabled(self, *_):
+        self.controller.set_search_enabled(self.enable_checkbox.value)
+
+    def _search(self, *_):
+        query: str = self.query_input.value_input or self.query_input.value
+        if len(query.strip()):
+            self.controller.search(query)
+
+    def _clear_search(self, *_):
+        self.controller.clear_search()
@@ -0,0 +1,244 @@
+import re
+from itertools import chain
+from typing import Callable, Optional, Union
+
+import numpy as np
+import pandas as pd
+from pandas import Series
+
+# A parsed query is a nested tuple, e.g. ('and', [('term', 'cat'), ('not', ('phrase', ['hot', 'dog']))])
+QueryNode = tuple
+
+
+class SearchIndex:
+    """
+    An inverted index from the lowercased word tokens of the documents to the positions of the documents containing
+    them. The postings of every token are stored in one array, sorted by token and then position, with an offsets
+    array marking where the postings of each token begin. Positions use the smallest unsigned integer type that fits
+    the corpus.
+    Word positions are not stored. Phrase queries are answered by intersecting the postings of their tokens and then
+    matching the phrase against the text of the candidate documents.
+
+    Queries are made of terms, quoted phrases and parentheses, combined with AND, which is implied between adjacent
+    terms, OR and NOT, which may also be written as a leading '-'. A term ending in '*' matches every token beginning
+    with it. Operators must be uppercase.
+    """
+    TOKEN_PATTERN: re.Pattern = re.compile(r'\w+')
+    QUERY_PATTERN: re.Pattern = re.compile(r'-?"[^"]*"?|-?\(|\)|[^\s()"]+')
+    CHUNK_DOCUMENTS: int = 20000
+    PREFIX_WILDCARD: str = '*'
+
+    def __init__(self, docs: Series, vocabulary: dict[str, int], postings: np.ndarray, offsets: np.ndarray):
+        """
+        Use build() to index documents
+        """
+        self.docs: Series = docs
+        self.vocabulary: dict[str, int] = vocabulary
+        self.postings: np.ndarray = postings
+        self.offsets: np.ndarray = offsets
+        self.sorted_terms: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    @classmethod
+    def tokenize(cls, text: str) -> list[str]:
+        return cls.TOKEN_PATTERN.findall(text.lower())
+
+    @classmethod
+    def build(cls, docs: Series, on_progress: Optional[Callable[[int], bool]] = None) -> Optional['SearchIndex']:
+        """
+        Indexes the documents a chunk at a time.
+        :param docs: the documents in corpus order
+        :param on_progress: called with the number of documents indexed after each chunk. Indexing stops if it
+        returns False
+        :return: the index, or None if indexing was stopped
+        """
+        docs = docs.reset_index(drop=True)
+        vocabulary: dict[str, int] = {}
+        chunk_token_ids: list[np.ndarray] = []
+        chunk_positions: list[np.ndarray] = []
+        for chunk_start in range(0, len(docs), cls.CHUNK_DOCUMENTS):
+            chunk: list = docs.iloc[chunk_start:chunk_start + cls.CHUNK_DOCUMENTS].tolist()
+            doc_tokens: list[set[str]] = [set(cls.TOKEN_PATTERN.findall(str(doc).lower())) for doc in chunk]
+            token_counts: np.ndarray = np.fromiter((len(tokens) for tokens in doc_tokens), dtype=np.int64,
+                                                   count=len(doc_tokens))
+            # Tokens are factorised in bulk so the vocabulary is only consulted once per distinct token in the chunk
+            chunk_codes, chunk_terms = pd.factorize(np.fromiter(chain.from_iterable(doc_tokens), dtype=object,
+                                                                count=int(token_counts.sum())))
+            term_ids: np.ndarray = np.fromiter((vocabulary.setdefault(term, len(vocabulary)) for term in chunk_terms),
+                                               dtype=np.int32, count=len(chunk_terms))
+            chunk_token_ids.append(term_ids[chunk_codes])
+            chunk_positions.append(np.repeat(np.arange(chunk_start, chunk_start + len(chunk), dtype=np.int64),
+                                             token_counts))
+            if (on_progress is not None) and (on_progress(chunk_start + len(chunk)) is False):
+                return None
+
+        position_dtype: np.dtype = np.min_scalar_type(max(len(docs) - 1, 0))
+        token_ids: np.ndarray = np.concatenate(chunk_token_ids) if chunk_token_ids else np.empty(0, dtype=np.int32)
+        positions: np.ndarray = (np.concatenate(chunk_positions) if chunk_positions else np.empty(0, dtype=np.int64))
+        # The sort is stable, so the postings of each token remain in position order
+        order: np.ndarray = np.argsort(token_ids, kind='stable')
+        postings: np.ndarray = positions[order].astype(position_dtype)
+        offsets: np.ndarray = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(token_ids, minlength=len(vocabulary)), out=offsets[1:])
+        return cls(docs, vocabulary, postings, offsets)
+
+    def get_term_count(self) -> int:
+        return len(self.vocabulary)
+
+    def _get_postings(self, token: str) -> np.ndarray:
+        token_id: Optional[int] = self.vocabulary.get(token)
+        if token_id is None:
+            return np.empty(0, dtype=np.int64)
+        return self.postings[self.offsets[token_id]:self.offsets[token_id + 1]]
+
+    def _get_prefix_postings(self, prefix: str) -> np.ndarray:
+        if self.sorted_terms is None:
+            self.sorted_terms = np.array(sorted(self.vocabulary), dtype=object)
+        start: int = int(np.searchsorted(self.sorted_terms, prefix, side='left'))
+        # Every token with the prefix sorts before the prefix followed by the greatest code point
+        end: int = int(np.searchsorted(self.sorted_terms, prefix + '\U0010FFFF', side='left'))
+        return self._union([self._get_postings(term) for term in self.sorted_terms[start:end]])
+
+    def _match_phrase(self, tokens: list[str]) -> np.ndarray:
+        candidates: np.ndarray = self._intersect([self._get_postings(token) for token in tokens])
+        if (len(tokens) < 2) or (len(candidates) == 0):
+            return candidates
+        phrase_pattern: re.Pattern = re.compile(r'(?<!\w)' + r'\W+'.join(re.escape(t) for t in tokens) + r'(?!\w)')
+        candidate_docs: list = self.docs.iloc[candidates].tolist()
+        matched: np.ndarray = np.fromiter((phrase_pattern.search(str(doc).lower()) is not None
+                                           for doc in candidate_docs), dtype=bool, count=len(candidates))
+        return candidates[matched]
+
+    # Set operations mark positions in a boolean array over the corpus rather than sorting, so their cost is linear
+    # in the size of the postings and the corpus
+
+    def _get_mask(self, positions: np.ndarray) -> np.ndarray:
+        mask: np.ndarray = np.zeros(len(self), dtype=bool)
+        mask[positions] = True
+        return mask
+
+    def _intersect(self, postings: list[np.ndarray]) -> np.ndarray:
+        if len(postings) == 0:
+            return np.empty(0, dtype=np.int64)
+        # Intersecting from the shortest postings keeps every intermediate result small
+        postings = sorted(postings, key=len)
+        result: np.ndarray = postings[0]
+        for other in postings[1:]:
+            if len(result) == 0:
+                break
+            result = result[self._get_mask(other)[result]]
+        return result
+
+    def _union(self, postings: list[np.ndarray]) -> np.ndarray:
+        mask: np.ndarray = np.zeros(len(self), dtype=bool)
+        for positions in postings:
+            mask[positions] = True
+        return np.flatnonzero(mask)
+
+    def _difference(self, positions: np.ndarray, excluded: np.ndarray) -> np.ndarray:
+        return positions[~self._get_mask(excluded)[positions]]
+
+    @classmethod
+    def parse(cls, query: str) -> QueryNode:
+        """
+        :raises ValueError: if the query is empty or malformed
+        """
+        parts: list[str] = cls.QUERY_PATTERN.findall(query)
+        if len(parts) == 0:
+            raise ValueError("The search query is empty")
+        node, end = cls._parse_or(parts, 0)
+        if end != len(parts):
+            raise ValueError(f"Unexpected '{parts[end]}' in the search query")
+        return node
+
+    @classmethod
+    def _parse_or(cls, parts: list[str], start: int) -> tuple[QueryNode, int]:
+        children: list[QueryNode] = []
+        node, position = cls._parse_and(parts, start)
+        children.append(node)
+        while (position < len(parts)) and (parts[position] == 'OR'):
+            node, position = cls._parse_and(parts, position + 1)
+            children.append(node)
+        return (children[0] if len(children) == 1 else ('or', children)), position
+
+    @classmethod
+    def _parse_and(cls, parts: list[str], start: int) -> tuple[QueryNode, int]:
+        children: list[QueryNode] = []
+        position: int = start
+        while (position < len(parts)) and (parts[position] not in ('OR', ')')):
+            if parts[position] == 'AND':
+                position += 1
+                continue
+            node, position = cls._parse_unary(parts, position)
+            children.append(node)
+        if len(children) == 0:
+            raise ValueError("Missing search term in the search query")
+        return (children[0] if len(children) == 1 else ('and', children)), position
+
+    @classmethod
+    def _parse_unary(cls, parts: list[str], start: int) -> tuple[QueryNode, int]:
+        part: str = parts[start]
+        if part == 'NOT':
+            if start + 1 >= len(parts):
+                raise ValueError("Missing search term after NOT")
+            node, position = cls._parse_unary(parts, start + 1)
+            return ('not', node), position
+        if part == '-(':
+            node, position = cls._parse_unary(parts[:start] + ['('] + parts[start + 1:], start)
+            return ('not', node), position
+        if part.startswith('-') and (len(part) > 1):
+            node, position = cls._parse_unary([part[1:]], 0)
+            return ('not', node), start + 1
+        if part == '(':
+            node, position = cls._parse_or(parts, start + 1)
+            if (position >= len(parts)) or (parts[position] != ')'):
+                raise ValueError("Missing ')' in the search query")
+            return node, position + 1
+        if part.startswith('"'):
+            tokens: list[str] = cls.tokenize(part.strip('"'))
+            if len(tokens) == 0:
+                raise ValueError("Empty phrase in the search query")
+            return ('phrase', tokens), start + 1
+        if part.endswith(cls.PREFIX_WILDCARD) and (len(part) > 1):
+            prefix_tokens: list[str] = cls.tokenize(part)
+            if len(prefix_tokens) == 1:
+                return ('prefix', prefix_tokens[0]), start + 1
+        tokens = cls.tokenize(part)
+        if len(tokens) == 0:
+            raise ValueError(f"'{part}' contains no searchable words")
+        # A term such as "don't" is split into several tokens, which must appear together
+        return (('term', tokens[0]) if len(tokens) == 1 else ('phrase', tokens)), start + 1
+
+    def _evaluate(self, node: QueryNode) -> np.ndarray:
+        node_type: str = node[0]
+        if node_type == 'term':
+            return self._get_postings(node[1])
+        if node_type == 'prefix':
+            return self._get_prefix_postings(node[1])
+        if node_type == 'phrase':
+            return self._match_phrase(node[1])
+        if node_type == 'not':
+            return np.flatnonzero(~self._get_mask(self._evaluate(node[1])))
+        if node_type == 'or':
+            return self._union([self._evaluate(child) for child in node[1]])
+        # Negated children of AND are subtracted rather than evaluated against every document
+        included: list[np.ndarray] = [self._evaluate(c) for c in node[1] if c[0] != 'not']
+        excluded: list[np.ndarray] = [self._evaluate(c[1]) for c in node[1] if c[0] == 'not']
+        if len(included):
+            result: np.ndarray = self._intersect(included)
+        else:
+            result = np.arange(len(self), dtype=np.int64)
+        for other in excluded:
+            result = self._difference(result, other)
+        return result
+
+    def search(self, query: Union[str, QueryNode]) -> np.ndarray:
+        """
+        :return: the ascending zero-based positions of the documents matching the query
+        :raises ValueError: if the query is empty or malformed
+        """
+        if isinstance(query, str):
+            query = self.parse(query)
+        return self._evaluate(query).astype(np.int64)
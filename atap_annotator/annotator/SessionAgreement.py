@@ -0,0 +1,63 @@
+from typing import Optional, TYPE_CHECKING
+
+import numpy as np
+from pandas import Series, DataFrame
+
+from atap_annotator.annotator.Agreement import Agreement
+from atap_annotator.annotator.CorpusView import CorpusView
+
+if TYPE_CHECKING:
+    from atap_annotator.annotator.AnnotationSession import AnnotationSession
+
+
+class SessionAgreement:
+    """
+    Measures the agreement between categorical metas of the selected corpus of an AnnotationSession, such as
+    annotations saved by different annotators. Created by the session on first use.
+    """
+
+    def __init__(self, session: 'AnnotationSession'):
+        self.session: 'AnnotationSession' = session
+
+    def _get_annotation_cols(self, metas: list[str]) -> dict[str, Series]:
+        corpus_view: Optional[CorpusView] = self.session.corpus_view
+        if corpus_view is None:
+            raise ValueError("No corpus selected")
+        categorical_metas: list[str] = self.session.get_categorical_metas()
+        for meta in metas:
+            if meta not in categorical_metas:
+                raise ValueError(f"Metadata {meta} is not categorical")
+        return {meta: corpus_view.get_column(meta) for meta in metas}
+
+    def get_agreement(self, metas: list[str]) -> tuple[float, DataFrame]:
+        """
+        :return: Fleiss' kappa over all the metas, and Cohen's kappa for each pair of metas
+        :raises ValueError: if fewer than two metas are provided, or a meta is not categorical
+        """
+        if len(metas) < 2:
+            raise ValueError("At least two annotation metadata are required to measure agreement")
+        annotation_cols: dict[str, Series] = self._get_annotation_cols(metas)
+        fleiss_kappa: float = Agreement.fleiss_kappa(list(annotation_cols.values()))
+        return fleiss_kappa, Agreement.pairwise_cohen_kappa(annotation_cols)
+
+    def get_confusion_matrix(self, meta_a: str, meta_b: str) -> DataFrame:
+        """
+        :return: the confusion matrix between two categorical metas of the selected corpus
+        :raises ValueError: if a meta is not categorical
+        """
+        annotation_cols: dict[str, Series] = self._get_annotation_cols([meta_a, meta_b])
+        return Agreement.confusion_matrix(annotation_cols[meta_a], annotation_cols[meta_b])
+
+    def set_disagreement_sequence(self, metas: list[str]) -> int:
+        """
+        Restricts navigation to the documents given different categories by the categorical metas, so they can be
+        adjudicated.
+        :return: the number of disagreeing documents. Navigation is unchanged if there are none
+        :raises ValueError: if fewer than two metas are provided, or a meta is not categorical
+        """
+        if len(metas) < 2:
+            raise ValueError("At least two annotation metadata are required to find disagreements")
+        disagreements: np.ndarray = Agreement.disagreements(list(self._get_annotation_cols(metas).values()))
+        if len(disagreements):
+            self.session.set_navigation_sequence(disagreements, f"{len(disagreements):,} disagreements")
+        return len(disagreements)
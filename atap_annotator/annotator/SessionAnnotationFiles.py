@@ -0,0 +1,60 @@
+import logging
+import re
+from typing import Optional, TYPE_CHECKING
+
+from atap_annotator.annotator.AnnotationSidecar import AnnotationSidecar
+from atap_annotator.annotator.AnnotationStore import AnnotationStore
+
+if TYPE_CHECKING:
+    from atap_annotator.annotator.AnnotationSession import AnnotationSession
+
+
+class SessionAnnotationFiles:
+    """
+    Exports the annotations of an AnnotationSession to an annotations file without the documents, and reads them back
+    for the same corpus. Created by the session on first use.
+    """
+
+    def __init__(self, session: 'AnnotationSession'):
+        self.session: 'AnnotationSession' = session
+
+    def get_default_path(self) -> str:
+        """
+        :return: a file name for the annotations of the selected corpus, or an empty string if no corpus is selected
+        """
+        if self.session.corpus is None:
+            return ''
+        return re.sub(r'[^\w.-]', '_', self.session.corpus.name) + AnnotationSidecar.FILE_EXTENSION
+
+    def export_annotations(self, file_path: str, key_meta: Optional[str] = None,
+                           annotations: Optional[AnnotationStore] = None) -> int:
+        """
+        Writes the annotations, categories and default category to an annotations file, without the documents.
+        :param key_meta: the meta that identifies each document. Documents are identified by their text if None
+        :param annotations: the annotations to export, such as a copy taken before exporting on a background thread.
+        Taken from the current annotations if not provided
+        :return: the number of documents written
+        :raises ValueError: if no corpus is selected or key_meta is not in the corpus
+        """
+        if self.session.corpus is None:
+            raise ValueError("No corpus selected")
+        if annotations is None:
+            annotations = self.session.annotations
+        exported_count: int = AnnotationSidecar.write(file_path, self.session.corpus_view, annotations,
+                                                      self.session.get_all_categories(),
+                                                      self.session.get_default_category(), key_meta)
+        self.session.log(f"Exported {exported_count} annotations to {file_path}", logging.DEBUG)
+        return exported_count
+
+    def read_annotations(self, file_path: str) -> tuple[AnnotationStore, list[str], Optional[str], int, int]:
+        """
+        Reads an annotations file written by export_annotations() and matches it to the selected corpus without
+        changing the session state, so it can be run on a background thread. The result is applied with
+        AnnotationSession.set_imported_annotations()
+        :return: the matched annotations, the categories, the default category, the number of documents matched and
+        the number of documents in the file
+        :raises ValueError: if no corpus is selected or the file cannot be matched to the corpus
+        """
+        if self.session.corpus is None:
+            raise ValueError("No corpus selected")
+        return AnnotationSidecar.read(file_path, self.session.corpus_view)
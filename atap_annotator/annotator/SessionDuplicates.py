@@ -0,0 +1,92 @@
+import logging
+from typing import Optional, TYPE_CHECKING
+
+import numpy as np
+from pandas import Series
+
+from atap_annotator.annotator.CorpusView import CorpusView
+from atap_annotator.annotator.DuplicateClusters import DuplicateClusters
+
+if TYPE_CHECKING:
+    from atap_annotator.annotator.AnnotationSession import AnnotationSession
+
+
+class SessionDuplicates:
+    """
+    Groups the near-duplicate documents of the selected corpus of an AnnotationSession into clusters, so a category
+    can be set for a whole cluster at once. Created by the session on first use.
+    """
+
+    def __init__(self, session: 'AnnotationSession'):
+        self.session: 'AnnotationSession' = session
+        self.duplicate_clusters = DuplicateClusters(session.cache_dir, session.logger_name)
+        # Positions of the documents sorted by cluster, and the offset of each cluster within them
+        self.cluster_labels: Optional[np.ndarray] = None
+        self.cluster_positions: Optional[np.ndarray] = None
+        self.cluster_offsets: Optional[np.ndarray] = None
+        self.propagate: bool = True
+
+    def reset(self):
+        self.clear_clusters()
+
+    def compute_clusters(self, threshold: float = DuplicateClusters.DEFAULT_THRESHOLD,
+                         num_workers: Optional[int] = None) -> np.ndarray:
+        """
+        Clusters the near-duplicate documents of the selected corpus without changing the session state, so it can be
+        run on a background thread. The result is applied with set_clusters()
+        :param threshold: the minimum estimated Jaccard similarity of the character shingles of clustered documents
+        :param num_workers: the number of worker processes used to compute the MinHash signatures
+        :return: the cluster of each document in corpus order
+        :raises ValueError: if no corpus is selected or the threshold is not between 0 and 1
+        """
+        corpus_view: Optional[CorpusView] = self.session.corpus_view
+        if corpus_view is None:
+            raise ValueError("No corpus selected")
+        if not (0 < threshold <= 1):
+            raise ValueError("The similarity threshold must be greater than 0 and at most 1")
+        corpus = self.session.corpus
+        docs: Series = corpus_view.get_column(corpus._COL_DOC)
+        fingerprint: str = self.session.get_document_fingerprint()
+        signatures: np.ndarray = self.duplicate_clusters.compute_signatures(docs, corpus.name, fingerprint,
+                                                                            num_workers)
+        return DuplicateClusters.cluster(signatures, threshold)
+
+    def set_clusters(self, cluster_labels: np.ndarray) -> int:
+        """
+        Groups the documents into the clusters provided and restricts navigation to the first document of each
+        cluster. While propagate is True, setting the category of a document sets it for its whole cluster.
+        :param cluster_labels: the cluster of each document in corpus order, as returned by compute_clusters()
+        :return: the number of clusters
+        :raises ValueError: if the labels do not match the selected corpus
+        """
+        annotations = self.session.annotations
+        if (annotations is None) or (len(cluster_labels) != len(annotations)):
+            raise ValueError("The clusters do not match the selected corpus")
+        self.cluster_labels = np.asarray(cluster_labels, dtype=np.int32)
+        self.cluster_positions = np.argsort(self.cluster_labels, kind='stable')
+        cluster_sizes: np.ndarray = np.bincount(self.cluster_labels)
+        self.cluster_offsets = np.concatenate(([0], np.cumsum(cluster_sizes)))
+        representatives: np.ndarray = self.cluster_positions[self.cluster_offsets[:-1]] + self.session.MIN_DOCUMENT_IDX
+        self.session.set_navigation_sequence(np.sort(representatives), f"{len(cluster_sizes):,} clusters")
+        self.session.log(f"Set {len(cluster_sizes)} near-duplicate clusters", logging.DEBUG)
+        return len(cluster_sizes)
+
+    def clear_clusters(self):
+        self.cluster_labels = None
+        self.cluster_positions = None
+        self.cluster_offsets = None
+
+    def has_clusters(self) -> bool:
+        return self.cluster_labels is not None
+
+    def get_members(self, document_idx: int) -> np.ndarray:
+        """
+        :return: the indices of the documents in the same near-duplicate cluster as the document, including itself
+        """
+        if self.cluster_labels is None:
+            return np.array([document_idx], dtype=np.int64)
+        min_document_idx: int = self.session.MIN_DOCUMENT_IDX
+        cluster: int = int(self.cluster_labels[document_idx - min_document_idx])
+        cluster_start: int = int(self.cluster_offsets[cluster])
+        cluster_end: int = int(self.cluster_offsets[cluster + 1])
+        return self.cluster_positions[cluster_start:cluster_end] + min_document_idx
@@ -0,0 +1,82 @@
+import logging
+from typing import Callable, Optional, TYPE_CHECKING
+
+import numpy as np
+from pandas import Series
+
+from atap_annotator.annotator.CorpusView import CorpusView
+from atap_annotator.annotator.SearchIndex import SearchIndex
+
+if TYPE_CHECKING:
+    from atap_annotator.annotator.AnnotationSession import AnnotationSession
+
+
+class SessionSearch:
+    """
+    Indexes the documents of the selected corpus of an AnnotationSession and restricts navigation to the documents
+    matching a query. See SearchIndex for the query syntax. Created by the session on first use.
+    """
+
+    def __init__(self, session: 'AnnotationSession'):
+        self.session: 'AnnotationSession' = session
+        self.index: Optional[SearchIndex] = None
+
+    def reset(self):
+        self.clear_index()
+
+    def compute_index(self, on_progress: Optional[Callable[[int], bool]] = None) -> Optional[SearchIndex]:
+        """
+        Indexes the documents of the selected corpus for search without changing the session state, so it can be run
+        on a background thread. The result is applied with set_index()
+        :param on_progress: called with the number of documents indexed so far. Indexing stops if it returns False
+        :return: the index, or None if indexing was stopped
+        :raises ValueError: if no corpus is selected
+        """
+        corpus_view: Optional[CorpusView] = self.session.corpus_view
+        if corpus_view is None:
+            raise ValueError("No corpus selected")
+        docs: Series = corpus_view.get_column(self.session.corpus._COL_DOC)
+        return SearchIndex.build(docs, on_progress)
+
+    def set_index(self, search_index: SearchIndex):
+        """
+        :raises ValueError: if the index does not match the selected corpus
+        """
+        annotations = self.session.annotations
+        if (annotations is None) or (len(search_index) != len(annotations)):
+            raise ValueError("The search index does not match the selected corpus")
+        self.index = search_index
+        self.session.log(f"Indexed {len(search_index)} documents with {search_index.get_term_count()} terms",
+                         logging.DEBUG)
+
+    def clear_index(self):
+        self.index = None
+
+    def get_indexed_count(self) -> Optional[int]:
+        """
+        :return: the number of documents indexed, or None if the documents have not been indexed
+        """
+        if self.index is None:
+            return None
+        return len(self.index)
+
+    def get_matches(self, query: str) -> np.ndarray:
+        """
+        :return: the ascending indices of the documents matching the query
+        :raises ValueError: if the documents have not been indexed or the query is malformed
+        """
+        if self.index is None:
+            raise ValueError("The documents have not been indexed for search")
+        return self.index.search(query) + self.session.MIN_DOCUMENT_IDX
+
+    def set_search_sequence(self, query: str) -> int:
+        """
+        Restricts navigation to the documents matching the query, in corpus order.
+        :return: the number of matching documents
+        :raises ValueError: if the documents have not been indexed, the query is malformed, or no document matches
+        """
+        matches: np.ndarray = self.get_matches(query)
+        if len(matches) == 0:
+            raise ValueError(f"No documents match {query}")
+        self.session.set_navigation_sequence(matches, f"Search {query}")
+        return len(matches)
@@ -0,0 +1,125 @@
+from typing import Optional, TYPE_CHECKING
+
+import numpy as np
+from pandas import Series
+
+from atap_annotator.annotator.CategoryModel import CategoryModel
+from atap_annotator.annotator.CorpusView import CorpusView
+
+if TYPE_CHECKING:
+    from atap_annotator.annotator.AnnotationSession import AnnotationSession
+
+
+class SessionSuggestions:
+    """
+    Suggests categories for the documents of the selected corpus of an AnnotationSession that have not been annotated,
+    using a category model trained on the annotated documents. Created by the session on first use.
+    """
+    # The category model is retrained once this many more documents have been annotated
+    RETRAIN_INTERVAL: int = 25
+
+    def __init__(self, session: 'AnnotationSession'):
+        self.session: 'AnnotationSession' = session
+        self.category_model = CategoryModel(session.cache_dir, session.logger_name)
+        self.suggested_codes: Optional[np.ndarray] = None
+        self.confidence: Optional[np.ndarray] = None
+        self.category_table: list[str] = []
+        self.trained_annotation_count: int = 0
+        # The annotated count when training was last attempted, whether or not it succeeded
+        self.attempted_annotation_count: int = 0
+
+    def close(self):
+        self.category_model.shutdown()
+
+    def reset(self):
+        self.clear_suggestions()
+
+    def needs_training(self) -> bool:
+        """
+        :return: True if RETRAIN_INTERVAL documents have been annotated since training was last attempted. Attempts
+        that fail, such as before two categories have been annotated, are counted so they are not retried on every
+        annotation
+        """
+        return abs(self.session.get_annotated_count() - self.attempted_annotation_count) >= self.RETRAIN_INTERVAL
+
+    def record_attempt(self):
+        """
+        Records the number of annotated documents when training is started, for needs_training()
+        """
+        self.attempted_annotation_count = self.session.get_annotated_count()
+
+    def compute_suggestions(self) -> tuple[np.ndarray, np.ndarray, list[str], int]:
+        """
+        Trains the category model on the annotated documents and scores every document without changing the session
+        state, so it can be run on a background thread. The result is applied with set_suggestions()
+        :return: the suggested code of each document and its probability, the category table the codes refer to, and
+        the number of annotated documents the model was trained on
+        :raises ValueError: if no corpus is selected or fewer than two categories have been annotated
+        """
+        corpus_view: Optional[CorpusView] = self.session.corpus_view
+        if corpus_view is None:
+            raise ValueError("No corpus selected")
+        corpus = self.session.corpus
+        codes: np.ndarray = self.session.annotations.codes.copy()
+        category_table: list[str] = self.session.annotations.category_table.copy()
+        positions: np.ndarray = np.flatnonzero(codes >= 0)
+        docs: Series = corpus_view.get_column(corpus._COL_DOC)
+        fingerprint: str = self.session.get_document_fingerprint()
+        suggested_codes, confidence = self.category_model.fit_and_score(docs, corpus.name, fingerprint,
+                                                                        positions, codes[positions])
+        return suggested_codes, confidence, category_table, len(positions)
+
+    def set_suggestions(self, suggested_codes: np.ndarray, confidence: np.ndarray, category_table: list[str],
+                        annotated_count: int):
+        """
+        :raises ValueError: if the suggestions do not match the selected corpus
+        """
+        annotations = self.session.annotations
+        if (annotations is None) or (len(suggested_codes) != len(annotations)):
+            raise ValueError("The suggestions do not match the selected corpus")
+        self.suggested_codes = suggested_codes
+        self.confidence = confidence
+        self.category_table = category_table
+        self.trained_annotation_count = annotated_count
+
+    def clear_suggestions(self):
+        self.suggested_codes = None
+        self.confidence = None
+        self.category_table = []
+        self.trained_annotation_count = 0
+        self.attempted_annotation_count = 0
+
+    def has_suggestions(self) -> bool:
+        return self.suggested_codes is not None
+
+    def get_suggestion(self, document_idx: int) -> Optional[tuple[str, float]]:
+        """
+        :return: the suggested category of a document that has not been explicitly annotated and the probability the
+        model gives it, or None if there is no suggestion
+        """
+        annotations = self.session.annotations
+        if (self.suggested_codes is None) or (annotations is None):
+            return None
+        position: int = document_idx - self.session.MIN_DOCUMENT_IDX
+        if annotations.codes[position] >= 0:
+            return None
+        category: str = self.category_table[int(self.suggested_codes[position])]
+        if category not in self.session.categories:
+            return None
+        return category, float(self.confidence[position])
+
+    def set_uncertainty_sequence(self) -> int:
+        """
+        Restricts navigation to the documents that have not been explicitly annotated, ordered from the least
+        confident suggestion to the most, as annotating these first improves the model the most.
+        :return: the number of documents in the sequence
+        :raises ValueError: if there are no suggestions or every document is annotated
+        """
+        if self.confidence is None:
+            raise ValueError("No suggestions have been computed")
+        unannotated: np.ndarray = np.flatnonzero(self.session.annotations.codes < 0)
+        if len(unannotated) == 0:
+            raise ValueError("Every document has been annotated")
+        ordered: np.ndarray = unannotated[np.argsort(self.confidence[unannotated], kind='stable')]
+        self.session.set_navigation_sequence(ordered + self.session.MIN_DOCUMENT_IDX, "Most uncertain")
+        return len(ordered)
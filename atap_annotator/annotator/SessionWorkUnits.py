@@ -0,0 +1,125 @@
+import logging
+from typing import Optional, TYPE_CHECKING
+
+import numpy as np
+from pandas import Series, DataFrame
+
+from atap_annotator.annotator.CorpusView import CorpusView
+from atap_annotator.annotator.WorkPartition import WorkPartition
+
+if TYPE_CHECKING:
+    from atap_corpus.corpus.corpus import DataFrameCorpus
+
+    from atap_annotator.annotator.AnnotationSession import AnnotationSession
+
+
+class SessionWorkUnits:
+    """
+    Partitions the selected corpus of an AnnotationSession into work units, restricts navigation to a single unit,
+    and merges the annotations saved by the annotators of each unit. Created by the session on first use.
+    """
+
+    def __init__(self, session: 'AnnotationSession'):
+        self.session: 'AnnotationSession' = session
+        self.units: list[np.ndarray] = []
+
+    def reset(self):
+        self.units = []
+
+    def partition(self, method: str, num_units: int, key_meta: Optional[str] = None, seed: int = 0) -> list[int]:
+        """
+        Partitions the documents of the selected corpus into work units using one of WorkPartition.METHODS.
+        :param key_meta: the meta to stratify or hash by
+        :return: the number of documents in each work unit
+        :raises ValueError: if no corpus is selected or the partition arguments are invalid
+        """
+        corpus_view: Optional[CorpusView] = self.session.corpus_view
+        if corpus_view is None:
+            raise ValueError("No corpus selected")
+        key_col: Optional[Series] = None
+        if key_meta is not None:
+            if key_meta not in self.session.get_all_metas():
+                raise ValueError(f"Metadata {key_meta} does not exist")
+            key_col = corpus_view.get_column(key_meta)
+        self.units = WorkPartition.partition(method, len(corpus_view), num_units, key_col, seed)
+        return [len(unit) for unit in self.units]
+
+    def get_unit_name(self, unit_idx: int) -> str:
+        return f"Unit {unit_idx + 1} of {len(self.units)}"
+
+    def set_unit(self, unit_idx: int):
+        """
+        Restricts navigation to the documents of the work unit at the zero-based unit_idx
+        :raises ValueError: if the work unit does not exist or is empty
+        """
+        if not (0 <= unit_idx < len(self.units)):
+            raise ValueError(f"Work unit {unit_idx + 1} does not exist")
+        self.session.set_navigation_sequence(self.units[unit_idx], self.get_unit_name(unit_idx))
+
+    def merge(self, unit_corpora: list['DataFrameCorpus'], unit_meta: str, merged_meta: str,
+              new_name: Optional[str] = None) -> tuple['DataFrameCorpus', str, DataFrame]:
+        """
+        Merges the annotation meta of corpora saved by the annotators of each work unit into a copy of the selected
+        corpus, as described in build_merged_corpus(). If any conflicts are found, navigation is restricted to the
+        conflicting documents so they can be reviewed.
+        :raises ValueError: if no corpus is selected, a unit corpus lacks the meta or does not match the selected corpus
+        """
+        merged_corpus, meta_name, conflicts = self.build_merged_corpus(self.session.corpus, unit_corpora, unit_meta,
+                                                                       merged_meta, new_name)
+        self.set_conflict_sequence(conflicts)
+        return merged_corpus, meta_name, conflicts
+
+    def build_merged_corpus(self, source_corpus: Optional['DataFrameCorpus'], unit_corpora: list['DataFrameCorpus'],
+                            unit_meta: str, merged_meta: str,
+                            new_name: Optional[str] = None) -> tuple['DataFrameCorpus', str, DataFrame]:
+        """
+        Merges the annotation meta of corpora saved by the annotators of each work unit into a categorical meta of
+        a copy of source_corpus. Each unit corpus must be a saved copy of source_corpus. The source corpus is not
+        modified, as it may be shared with other sessions. Conflicting documents are left unset in the merged meta.
+        The session state is not changed, so it can be run on a background thread. Navigation can then be restricted
+        to the conflicts with set_conflict_sequence()
+        :param new_name: the name of the merged corpus. Generated from the name of source_corpus if None
+        :return: the merged corpus, the name the merged meta was added with, and the conflicts as returned by
+        WorkPartition.merge()
+        :raises ValueError: if source_corpus is None, a unit corpus lacks the meta or does not match source_corpus
+        """
+        if source_corpus is None:
+            raise ValueError("No corpus selected")
+        corpus_size: int = len(CorpusView(source_corpus))
+        unit_cols: list[Series] = []
+        for unit_corpus in unit_corpora:
+            if unit_meta not in unit_corpus.metas:
+                raise ValueError(f"Corpus {unit_corpus.name} has no metadata {unit_meta}")
+            unit_view: CorpusView = CorpusView(unit_corpus)
+            if len(unit_view) != corpus_size:
+                raise ValueError(f"Corpus {unit_corpus.name} does not have the same documents as {source_corpus.name}")
+            unit_cols.append(unit_view.get_column(unit_meta))
+        unit_names: list[str] = self._get_unique_names([unit_corpus.name for unit_corpus in unit_corpora])
+        merged_col, conflicts = WorkPartition.merge(unit_cols, unit_names)
+
+        merged_corpus: 'DataFrameCorpus' = self.session.copy_corpus(source_corpus, corpus_size, new_name)
+        merged_meta = self.session.get_new_column_name(merged_meta, set(merged_corpus.metas))
+        meta_name: str = self.session.replace_meta(merged_corpus, None, merged_col, merged_meta)
+        self.session.log(f"Merged {len(unit_corpora)} work units into {meta_name} of {merged_corpus.name} with "
+                         f"{len(conflicts)} conflicts", logging.INFO)
+
+        return merged_corpus, meta_name, conflicts
+
+    def set_conflict_sequence(self, conflicts: DataFrame):
+        """
+        Restricts navigation to the conflicting documents returned by build_merged_corpus(), if there are any
+        """
+        if len(conflicts):
+            self.session.set_navigation_sequence(conflicts.index.to_numpy(), f"{len(conflicts):,} merge conflicts")
+
+    @staticmethod
+    def _get_unique_names(names: list[str]) -> list[str]:
+        unique_names: list[str] = []
+        for name in names:
+            unique_name: str = name
+            iteration: int = 0
+            while unique_name in unique_names:
+                unique_name = f"{name}_{iteration}"
+                iteration += 1
+            unique_names.append(unique_name)
+        return unique_names
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from atap_corpus.corpus.corpus import DataFrameCorpus
 from panel import Row, Column, FlexBox
 from panel.widgets import Button, TextInput, Select, Checkbox
@@ -9,14 +11,17 @@ class SettingsControls:
     def __init__(self, controller):
         self.controller = controller
         self.show_controls: bool = False
+        self.displayed_categories: Optional[list[str]] = None
 
         # Corpus controls
         self.corpus_selector = Select(name='Selected corpus', width=self.STANDARD_WIDTH)
         self.corpus_name_input = TextInput(name='New corpus name', width=self.STANDARD_WIDTH)
         self.save_corpus_button = Button(name='Save as corpus', button_type='success', button_style='solid')
+        self.update_saved_checkbox = Checkbox(name='Update saved corpus', value=False)
         corpus_controls = Column(self.corpus_selector,
                                  self.corpus_name_input,
-                                 self.save_corpus_button)
+                                 self.save_corpus_button,
+                                 self.update_saved_checkbox)
 
         # Column controls
         self.new_meta_col: str = '<New metadata>'
@@ -47,24 +52,30 @@ class SettingsControls:
         self.save_corpus_button.on_click(self._save_corpus)
         self.corpus_selector.param.watch(self._update_selected_corpus, ['value'])
         self.meta_col_select.param.watch(self._update_selected_meta_col, ['value'])
-        self.update_display()
 
     def __panel__(self):
         return self.panel
 
     def update_display(self, *_):
-        remove_buttons = []
         curr_categories: list[str] = self.controller.get_all_categories()
+        if curr_categories != self.displayed_categories:
+            self._update_remove_buttons(curr_categories)
+        self._update_corpus_list()
+
+    def _update_remove_buttons(self, curr_categories: list[str]):
+        remove_buttons = []
         for category in curr_categories:
             label = f'{category} \U00002A09'
             remove_button = Button(name=label, button_style="solid")
             remove_button.on_click(lambda *_, term=category: self._remove_category(term))
             remove_buttons.append(remove_button)
         self.remove_category_buttons.objects = remove_buttons
-        self._update_corpus_list()
+        self.displayed_categories = curr_categories
 
     def _update_corpus_list(self):
         corpus_options: dict[str, DataFrameCorpus] = self.controller.get_corpus_dict()
+        if corpus_options == self.corpus_selector.options:
+            return
         self.corpus_selector.options = corpus_options
         if len(corpus_options) == 1:
             self.corpus_selector.value = list(self.corpus_selector.options.values())[0]
@@ -104,4 +115,5 @@ class SettingsControls:
         if selected_col == self.new_meta_col:
             selected_col = self.meta_col_name_input.value
 
-        self.controller.save_as_corpus(corpus_name, selected_col, keep_original_meta)
+        update_saved: bool = self.update_saved_checkbox.value
+        self.controller.save_as_corpus(corpus_name, selected_col, keep_original_meta, update_saved)
@@ -0,0 +1,55 @@
+from typing import Optional
+
+from panel import Row, Column
+from panel.pane import Str
+from panel.widgets import Button, Checkbox
+
+
+class SuggestionControls:
+    """
+    Enables category suggestions from a model trained on the annotated documents, and navigation of the documents
+    in order of the uncertainty of their suggestions.
+    The model is retrained in the background as more documents are annotated.
+    """
+    def __init__(self, controller):
+        self.controller = controller
+
+        self.enable_checkbox = Checkbox(name='Suggest categories', value=False)
+        self.train_button = Button(name='Train now', button_type='primary', button_style='outline')
+        self.uncertain_button = Button(name='Navigate most uncertain', button_type='primary', button_style='outline',
+                                       disabled=True)
+        self.status = Str()
+
+        self.panel = Column(
+            Row(self.enable_checkbox, self.status),
+            Row(self.train_button, self.uncertain_button)
+        )
+
+        self.enable_checkbox.param.watch(self._set_enabled, ['value'])
+        self.train_button.on_click(self._train)
+        self.uncertain_button.on_click(self._navigate_uncertain)
+
+    def __panel__(self):
+        return self.panel
+
+    def update_display(self):
+        trained_count: Optional[int] = self.controller.get_trained_count()
+        self.uncertain_button.disabled = trained_count is None
+        if self.controller.training:
+            self.set_status("Training")
+        elif trained_count is not None:
+            self.set_status(f"Trained on {trained_count:,} documents")
+        else:
+            self.set_status('')
+
+    def set_status(self, status: str):
+        self.status.object = status
+
+    def _set_enabled(self, *_):
+        self.controller.set_suggestions_enabled(self.enable_checkbox.value)
+
+    def _train(self, *_):
+        self.controller.train_suggestions()
+
+    def _navigate_uncertain(self, *_):
+        self.controller.navigate_uncertain()
@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+from pandas import Series, DataFrame
+
+from atap_annotator.annotator.Agreement import Agreement
+from atap_annotator.annotator.AnnotationStore import AnnotationStore
+
+
+class WorkPartition:
+    """
+    Splits the documents of a corpus into work units for parallel annotation, and merges the annotations of the
+    units back into a single column.
+    Work units are arrays of one-based document indices in ascending order. Every document belongs to exactly one unit.
+    """
+    MIN_DOCUMENT_IDX: int = 1
+    CONTIGUOUS: str = 'Contiguous'
+    STRATIFIED: str = 'Stratified'
+    HASHED: str = 'Hashed'
+    METHODS: list[str] = [CONTIGUOUS, STRATIFIED, HASHED]
+    DEFAULT_LABEL: str = AnnotationStore.DEFAULT_LABEL
+
+    @classmethod
+    def partition(cls, method: str, num_documents: int, num_units: int, key_col: Series = None,
+                  seed: int = 0) -> list[np.ndarray]:
+        """
+        :param method: one of METHODS
+        :param key_col: the meta to stratify or hash by, in corpus order. Required for the stratified and hashed methods
+        :raises ValueError: if the method is unknown, num_units is less than one, or the key column is missing
+        """
+        if num_units < 1:
+            raise ValueError("The number of work units must be at least 1")
+        if method == cls.CONTIGUOUS:
+            return cls.contiguous(num_documents, num_units)
+        if method not in (cls.STRATIFIED, cls.HASHED):
+            raise ValueError(f"Unknown partition method: {method}")
+        if key_col is None:
+            raise ValueError(f"The {method.lower()} partition method requires a metadata column")
+        if len(key_col) != num_documents:
+            raise ValueError("The metadata column does not match the number of documents")
+        if method == cls.STRATIFIED:
+            return cls.stratified(key_col, num_units, seed)
+        return cls.hashed(key_col, num_units)
+
+    @classmethod
+    def contiguous(cls, num_documents: int, num_units: int) -> list[np.ndarray]:
+        """
+        Splits the documents into consecutive ranges whose sizes differ by at most one.
+        """
+        document_indices: np.ndarray = np.arange(cls.MIN_DOCUMENT_IDX, num_documents + cls.MIN_DOCUMENT_IDX)
+        return np.array_split(document_indices, num_units)
+
+    @classmethod
+    def stratified(cls, strata_col: Series, num_units: int, seed: int = 0) -> list[np.ndarray]:
+        """
+        Splits the documents so each unit receives the same share of every value of strata_col, with the documents of
+        each value assigned in a random order. Missing values form their own stratum. Unit sizes differ by at most one.
+        """
+        strata: np.ndarray = pd.factorize(strata_col.reset_index(drop=True), use_na_sentinel=False)[0]
+        rng: np.random.Generator = np.random.default_rng(seed)
+        # Sorting by stratum, then randomly within each stratum, and dealing the sorted documents out in turn gives
+        # each unit an even share of every stratum. The deal continues across strata so unit sizes stay balanced
+        order: np.ndarray = np.lexsort((rng.random(len(strata)), strata))
+        units: np.ndarray = np.empty(len(strata), dtype=np.int64)
+        units[order] = np.arange(len(strata)) % num_units
+        return cls._group_by_unit(units, num_units)
+
+    @classmethod
+    def hashed(cls, key_col: Series, num_units: int) -> list[np.ndarray]:
+        """
+        Assigns each document to a unit by the hash of its key_col value. The assignment of a document depends only
+        on its key, so it is stable across sessions and when documents are added to the corpus.
+        """
+        hashes: np.ndarray = pd.util.hash_pandas_object(key_col.reset_index(drop=True), index=False).to_numpy()
+        units: np.ndarray = (hashes % np.uint64(num_units)).astype(np.int64)
+        return cls._group_by_unit(units, num_units)
+
+    @classmethod
+    def _group_by_unit(cls, units: np.ndarray, num_units: int) -> list[np.ndarray]:
+        order: np.ndarray = np.argsort(units, kind='stable')
+        boundaries: np.ndarray = np.searchsorted(units[order], np.arange(1, num_units))
+        return [unit_positions + cls.MIN_DOCUMENT_IDX for unit_positions in np.split(order, boundaries)]
+
+    @classmethod
+    def merge(cls, unit_cols: list[Series], unit_names: list[str]) -> tuple[Series, DataFrame]:
+        """
+        Merges the annotation columns of the work units into one categorical column.
+        Each column covers the whole corpus in the same order, using the labels of
+        AnnotationSession.get_annotations_col(), where an empty string is the default category and a missing value
+        is unset.
+        A document annotated with the same category by every unit that annotated it takes that category.
+        A document given different categories by different units is a conflict and is unset. A document no unit
+        annotated is unset if it is unset in every unit, otherwise it has the default category.
+        :param unit_names: the names of the units, used as the columns of the conflict report
+        :return: the merged categorical column, and a dataframe of the conflicting documents indexed by document
+        index with the category given by each unit
+        :raises ValueError: if no columns are provided or the columns differ in length
+        """
+        if len(unit_cols) == 0:
+            raise ValueError("No annotations to merge")
+        codes, categories = Agreement.get_code_matrix(unit_cols)
+        num_documents: int = codes.shape[1]
+        has_default: np.ndarray = np.zeros(num_documents, dtype=bool)
+        for col in unit_cols:
+            col = Series(col).reset_index(drop=True).astype('category')
+            has_default |= col.eq(cls.DEFAULT_LABEL).to_numpy(dtype=bool)
+
+        conflict_indices: np.ndarray = Agreement.disagreements(unit_cols)
+        conflict_positions: np.ndarray = conflict_indices - cls.MIN_DOCUMENT_IDX
+        # Where the units agree, every annotated code equals the maximum code
+        max_codes: np.ndarray = codes.max(axis=0)
+        # The default label is appended as the final category so it can be selected by code
+        merged_categories: pd.Index = categories.append(pd.Index([cls.DEFAULT_LABEL], dtype=object))
+        merged_codes: np.ndarray = np.where(max_codes >= 0, max_codes, np.where(has_default, len(categories), -1))
+        merged_codes[conflict_positions] = -1
+        merged_col: Series = Series(pd.Categorical.from_codes(merged_codes, categories=merged_categories))
+        merged_col = merged_col.cat.remove_unused_categories()
+
+        conflicts_df: DataFrame = DataFrame(
+            {name: col.reset_index(drop=True).iloc[conflict_positions].to_numpy()
+             for name, col in zip(unit_names, unit_cols)},
+            index=pd.Index(conflict_indices, name='document_idx')
+        )
+        return merged_col, conflicts_df
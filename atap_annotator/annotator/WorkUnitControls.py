@@ -0,0 +1,106 @@
+from typing import Optional
+
+from panel import Row, Column
+from panel.pane import Str
+from panel.widgets import Button, IntInput, MultiChoice, Select, TextInput
+
+from atap_annotator.annotator.WorkPartition import WorkPartition
+
+
+class WorkUnitControls:
+    """
+    Partitions the selected corpus into work units, restricts navigation to a single unit, and merges the annotations
+    saved by the annotators of each unit into a copy of the selected corpus.
+    """
+    STANDARD_WIDTH: int = 150
+    ALL_DOCUMENTS: str = 'All documents'
+    MERGED_META: str = 'merged_annotation'
+
+    def __init__(self, controller):
+        self.controller = controller
+
+        self.method_selector = Select(name='Partition', width=self.STANDARD_WIDTH, options=WorkPartition.METHODS)
+        self.key_meta_selector = Select(name='Metadata', width=self.STANDARD_WIDTH, visible=False)
+        self.num_units_input = IntInput(name='Work units', width=self.STANDARD_WIDTH, value=2, start=1)
+        self.partition_button = Button(name='Partition', button_type='primary', button_style='outline')
+        self.unit_selector = Select(name='Navigate', width=self.STANDARD_WIDTH, options={self.ALL_DOCUMENTS: None})
+        self.partition_info = Str()
+
+        self.merge_corpora_selector = MultiChoice(name='Unit corpora to merge', width=2 * self.STANDARD_WIDTH)
+        self.merge_meta_selector = Select(name='Annotation metadata', width=self.STANDARD_WIDTH)
+        self.merged_meta_input = TextInput(name='Merged metadata name', width=self.STANDARD_WIDTH,
+                                           placeholder=self.MERGED_META)
+        self.merge_button = Button(name='Merge work units', button_type='warning', button_style='solid')
+
+        self.panel = Column(
+            Row(self.method_selector, self.key_meta_selector, self.num_units_input),
+            Row(self.partition_button, self.unit_selector, self.partition_info),
+            Row(self.merge_corpora_selector, self.merge_meta_selector),
+            Row(self.merged_meta_input, self.merge_button)
+        )
+
+        self.method_selector.param.watch(self._update_method_inputs, ['value'])
+        self.partition_button.on_click(self._partition)
+        self.unit_selector.param.watch(self._set_work_unit, ['value'])
+        self.merge_corpora_selector.param.watch(self._update_merge_metas, ['value'])
+        self.merge_button.on_click(self._merge)
+
+    def __panel__(self):
+        return self.panel
+
+    def update_display(self):
+        all_metas: list[str] = self.controller.get_all_metas()
+        if self.key_meta_selector.options != all_metas:
+            self.key_meta_selector.options = all_metas
+        corpora_names: list[str] = list(self.controller.get_corpora_with_meta().keys())
+        if self.merge_corpora_selector.options != corpora_names:
+            self.merge_corpora_selector.value = [n for n in self.merge_corpora_selector.value if n in corpora_names]
+            self.merge_corpora_selector.options = corpora_names
+        if not self.controller.has_navigation_sequence():
+            self.unit_selector.value = None
+        self._update_merge_metas()
+
+    def _update_method_inputs(self, *_):
+        self.key_meta_selector.visible = self.method_selector.value != WorkPartition.CONTIGUOUS
+
+    def _partition(self, *_):
+        method: str = self.method_selector.value
+        key_meta: Optional[str] = None
+        if method != WorkPartition.CONTIGUOUS:
+            key_meta = self.key_meta_selector.value
+        unit_sizes: list[int] = self.controller.partition_work(method, self.num_units_input.value, key_meta)
+        unit_options: dict[str, Optional[int]] = {self.ALL_DOCUMENTS: None}
+        for unit_idx, unit_size in enumerate(unit_sizes):
+            unit_options[f"Unit {unit_idx + 1} ({unit_size:,} documents)"] = unit_idx
+        self.unit_selector.value = None
+        self.unit_selector.options = unit_options
+        if len(unit_sizes):
+            self.partition_info.object = f"{len(unit_sizes)} work units"
+        else:
+            self.partition_info.object = ''
+
+    def _set_work_unit(self, *_):
+        self.controller.set_work_unit(self.unit_selector.value)
+
+    def _update_merge_metas(self, *_):
+        corpora_metas: dict[str, list[str]] = self.controller.get_corpora_with_meta()
+        selected: list[str] = [name for name in self.merge_corpora_selector.value if name in corpora_metas]
+        shared_metas: list[str] = []
+        if len(selected):
+            shared_metas = [m for m in corpora_metas[selected[0]] if all(m in corpora_metas[n] for n in selected)]
+        if self.merge_meta_selector.options != shared_metas:
+            self.merge_meta_selector.options = shared_metas
+            if self.merge_meta_selector.value not in shared_metas:
+                self.merge_meta_selector.value = shared_metas[0] if len(shared_metas) else None
+
+    def _merge(self, *_):
+        corpus_names: list[str] = self.merge_corpora_selector.value
+        unit_meta: Optional[str] = self.merge_meta_selector.value
+        if len(corpus_names) == 0:
+            self.controller.display_warning("No unit corpora selected")
+            return
+        if unit_meta is None:
+            self.controller.display_warning("The selected corpora share no annotation metadata")
+            return
+        merged_meta: str = self.merged_meta_input.value_input or self.MERGED_META
+        self.controller.merge_annotations(corpus_names, unit_meta, merged_meta)
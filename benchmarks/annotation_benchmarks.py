@@ -0,0 +1,286 @@
+"""
+Benchmarks the annotation workflow on synthetic corpora by driving an Annotator headlessly through corpus selection,
+navigation, labelling, loading an annotation meta and saving. The wall time and the peak memory of each operation
+are written as JSON, and a previous results file can be given to report regressions.
+
+Usage, from the repository root:
+    python benchmarks/annotation_benchmarks.py --sizes 10000 100000 --output results.json
+    python benchmarks/annotation_benchmarks.py --sizes 10000 100000 --compare results.json
+
+Wall times are measured in a first pass and peak memory in a second pass with tracemalloc, as tracing allocations
+slows the operations down. Peak memory is the peak traced Python and NumPy memory above that held before the
+operation, so memory allocated by Arrow is not included.
+Results are only comparable between runs with the same configuration on the same machine.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from importlib.metadata import version, PackageNotFoundError
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from atap_corpus.corpus.corpus import DataFrameCorpus
+from atap_corpus_loader import CorpusLoader
+
+from atap_annotator.annotator.Annotator import Annotator
+
+FORMAT_VERSION: int = 1
+LOGGER_NAME: str = 'annotator-benchmarks'
+DEFAULT_SIZES: list[int] = [10000, 100000]
+DEFAULT_NAVIGATIONS: int = 1000
+DEFAULT_MEAN_WORDS: int = 60
+DEFAULT_NUM_METAS: int = 4
+DEFAULT_TOLERANCE: float = 0.2
+# Differences smaller than these are treated as noise when comparing results
+MIN_SECONDS_DIFFERENCE: float = 0.005
+MIN_MB_DIFFERENCE: float = 1.0
+ANNOTATION_META: str = 'label'
+CATEGORIES: list[str] = ['positive', 'negative', 'neutral']
+VOCABULARY_SIZE: int = 5000
+POOL_SIZE: int = 10000
+SEED: int = 42
+
+
+def generate_corpus(num_documents: int, mean_words: int, num_metas: int, seed: int = SEED) -> DataFrameCorpus:
+    """
+    Generates a corpus of random words, with document lengths drawn from a log-normal distribution.
+    Documents are drawn from a pool of random documents and suffixed with their position, so every document is
+    distinct. The first meta is the categorical ANNOTATION_META, partly annotated, and the others alternate between
+    integer and string metas.
+    """
+    rng: np.random.Generator = np.random.default_rng(seed)
+    letters: np.ndarray = np.array(list('abcdefghijklmnopqrstuvwxyz'))
+    word_lengths: np.ndarray = rng.integers(2, 10, VOCABULARY_SIZE)
+    vocabulary: np.ndarray = np.array([''.join(rng.choice(letters, length)) for length in word_lengths])
+
+    pool_size: int = min(num_documents, POOL_SIZE)
+    doc_lengths: np.ndarray = np.maximum(rng.lognormal(np.log(mean_words), 0.75, pool_size).astype(int), 1)
+    pool: pd.Series = pd.Series([' '.join(vocabulary[rng.integers(0, VOCABULARY_SIZE, length)])
+                                 for length in doc_lengths], dtype=object)
+    pool_choices: np.ndarray = rng.integers(0, pool_size, num_documents)
+    docs: pd.Series = (pool.take(pool_choices).reset_index(drop=True) + ' ' +
+                       pd.Series(np.arange(num_documents)).astype(str).astype(object))
+
+    corpus_df = pd.DataFrame({DataFrameCorpus._COL_DOC: docs})
+    if num_metas > 0:
+        # A third of the documents are left with the default category, marked by an empty string
+        label_codes: np.ndarray = rng.integers(-1, len(CATEGORIES), num_documents)
+        labels = pd.Categorical.from_codes(np.where(label_codes < 0, len(CATEGORIES), label_codes),
+                                           categories=CATEGORIES + [''])
+        corpus_df[ANNOTATION_META] = labels
+    for i in range(1, num_metas):
+        if i % 2:
+            corpus_df[f'meta_{i}'] = rng.integers(0, 1000, num_documents)
+        else:
+            corpus_df[f'meta_{i}'] = pd.Series(rng.integers(0, 50, num_documents)).map('group {}'.format)
+    return DataFrameCorpus(corpus_df, name=f'synthetic-{num_documents}')
+
+
+class WorkflowRunner:
+    """
+    Runs the workflow operations in order on a new Annotator, measuring the wall time or, if measure_memory is
+    True, the peak traced memory of each.
+    """
+    def __init__(self, corpus: DataFrameCorpus, navigations: int, measure_memory: bool):
+        self.corpus: DataFrameCorpus = corpus
+        self.navigations: int = min(navigations, len(corpus) - 1)
+        self.measure_memory: bool = measure_memory
+
+        self.corpus_loader = CorpusLoader(root_directory='.')
+        self.annotator = Annotator(self.corpus_loader, LOGGER_NAME, journal_dir=None, cache_dir=None)
+        self.corpus_loader.get_mutable_corpora().add(corpus)
+
+    def _wait_for_background(self):
+        # The background worker runs one task at a time, so this returns once all earlier tasks are done
+        self.annotator.background_executor.submit(lambda: None).result()
+
+    def select_corpus(self):
+        self.annotator.set_selected_corpus(self.corpus)
+
+    def navigate(self):
+        self.annotator.set_curr_document_idx(self.annotator.get_min_document_idx())
+        for _ in range(self.navigations):
+            self.annotator.next_document()
+
+    def label(self):
+        self.annotator.set_curr_document_idx(self.annotator.get_min_document_idx())
+        categories: list[str] = self.annotator.get_all_categories()
+        for i in range(self.navigations):
+            self.annotator.set_curr_category(categories[i % len(categories)])
+            self.annotator.next_document()
+
+    def load_annotated_meta(self):
+        self.annotator.set_annotated_meta_col(ANNOTATION_META)
+
+    def save(self):
+        self.annotator.save_as_corpus(f'{self.corpus.name}-annotated', ANNOTATION_META, overwrite_meta=True)
+        self._wait_for_background()
+
+    def run(self) -> dict[str, dict]:
+        """
+        :return: for each operation, the number of calls and either its wall time, with the latency percentiles of
+        each call, or its peak memory
+        """
+        # Each operation is given with the instrumented annotator operation timed on each of its calls
+        operations: list[tuple[str, Callable, Optional[str]]] = [
+            ('set_selected_corpus', self.select_corpus, None),
+            ('set_annotated_meta_col', self.load_annotated_meta, None),
+            ('navigate', self.navigate, 'set_curr_document_idx'),
+            ('label', self.label, 'set_curr_category'),
+            ('save_as_corpus', self.save, None),
+        ]
+        for category in CATEGORIES:
+            if category not in self.annotator.get_all_categories():
+                self.annotator.add_category(category)
+
+        results: dict[str, dict] = {}
+        for operation_name, operation, call_operation in operations:
+            self.annotator.latency.reset()
+            if self.measure_memory:
+                start_memory: int = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                operation()
+                peak_memory: int = tracemalloc.get_traced_memory()[1]
+                results[operation_name] = {'peak_mb': round((peak_memory - start_memory) / 2 ** 20, 3)}
+                continue
+
+            start_time: float = time.perf_counter()
+            operation()
+            operation_result: dict = {'wall_s': round(time.perf_counter() - start_time, 6)}
+            call_stats: Optional[dict] = self.annotator.latency.get_stats().get(call_operation)
+            if call_stats is not None:
+                operation_result['calls'] = call_stats['count']
+                for stat in ('p50_ms', 'p95_ms', 'p99_ms', 'max_ms'):
+                    operation_result[stat] = call_stats[stat]
+            results[operation_name] = operation_result
+        return results
+
+
+def run_benchmarks(sizes: list[int], navigations: int, mean_words: int, num_metas: int,
+                   measure_memory: bool) -> list[dict]:
+    results: list[dict] = []
+    for num_documents in sizes:
+        print(f"Benchmarking {num_documents:,} documents", file=sys.stderr)
+        start_time: float = time.perf_counter()
+        corpus: DataFrameCorpus = generate_corpus(num_documents, mean_words, num_metas)
+        size_results: dict[str, dict] = {'generate_corpus': {'wall_s': round(time.perf_counter() - start_time, 6)}}
+        size_results.update(WorkflowRunner(corpus, navigations, measure_memory=False).run())
+
+        if measure_memory:
+            tracemalloc.start()
+            try:
+                memory_results: dict[str, dict] = WorkflowRunner(corpus, navigations, measure_memory=True).run()
+            finally:
+                tracemalloc.stop()
+            for operation_name, operation_result in memory_results.items():
+                size_results[operation_name].update(operation_result)
+
+        for operation_name, operation_result in size_results.items():
+            results.append({'documents': num_documents, 'operation': operation_name, **operation_result})
+    return results
+
+
+def get_environment() -> dict:
+    packages: dict[str, Optional[str]] = {}
+    for package in ('atap-annotator', 'atap-corpus', 'atap-corpus-loader', 'pandas', 'numpy', 'panel'):
+        try:
+            packages[package] = version(package)
+        except PackageNotFoundError:
+            packages[package] = None
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'packages': packages
+    }
+
+
+def compare_results(results: list[dict], baseline: list[dict], tolerance: float) -> list[str]:
+    """
+    :return: a description of each operation whose wall time or peak memory increased by more than the tolerance
+    fraction of the baseline
+    """
+    baseline_results: dict[tuple[int, str], dict] = {(r['documents'], r['operation']): r for r in baseline}
+    regressions: list[str] = []
+    for result in results:
+        baseline_result: Optional[dict] = baseline_results.get((result['documents'], result['operation']))
+        if baseline_result is None:
+            continue
+        for measure, min_difference in (('wall_s', MIN_SECONDS_DIFFERENCE), ('peak_mb', MIN_MB_DIFFERENCE)):
+            if (measure not in result) or (measure not in baseline_result):
+                continue
+            value: float = result[measure]
+            baseline_value: float = baseline_result[measure]
+            if (value - baseline_value > min_difference) and (value > baseline_value * (1 + tolerance)):
+                regressions.append(f"{result['operation']} on {result['documents']:,} documents: "
+                                   f"{measure} {baseline_value} -> {value}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the annotation workflow on synthetic corpora")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="the numbers of documents of the synthetic corpora")
+    parser.add_argument('--navigations', type=int, default=DEFAULT_NAVIGATIONS,
+                        help="the number of documents navigated and labelled")
+    parser.add_argument('--mean-words', type=int, default=DEFAULT_MEAN_WORDS,
+                        help="the mean number of words of each document")
+    parser.add_argument('--metas', type=int, default=DEFAULT_NUM_METAS, help="the number of metas of each corpus")
+    parser.add_argument('--skip-memory', action='store_true', help="do not measure peak memory")
+    parser.add_argument('--output', help="the file to write the results to. Written to stdout if not provided")
+    parser.add_argument('--compare', help="a previous results file to compare against")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="the fraction an operation may increase by before it is reported as a regression")
+    args = parser.parse_args()
+
+    logging.getLogger(LOGGER_NAME).addHandler(logging.NullHandler())
+    logging.getLogger(LOGGER_NAME).propagate = False
+
+    results: list[dict] = run_benchmarks(args.sizes, args.navigations, args.mean_words, args.metas,
+                                         not args.skip_memory)
+    report: dict = {
+        'format_version': FORMAT_VERSION,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'environment': get_environment(),
+        'config': {
+            'sizes': args.sizes,
+            'navigations': args.navigations,
+            'mean_words': args.mean_words,
+            'metas': args.metas,
+            'memory': not args.skip_memory
+        },
+        'results': results
+    }
+    report_json: str = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            output_file.write(report_json)
+    else:
+        print(report_json)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as baseline_file:
+            baseline: dict = json.load(baseline_file)
+        if baseline.get('config') != report['config']:
+            print("Warning: the baseline was run with a different configuration", file=sys.stderr)
+        regressions: list[str] = compare_results(results, baseline.get('results', []), args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+        print("No regressions found", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,32 @@
+from typing import Callable, Optional
+
+import pandas as pd
+import pytest
+from atap_corpus.corpus.corpus import DataFrameCorpus
+
+from atap_annotator.annotator.AnnotationStore import AnnotationStore
+
+
+@pytest.fixture
+def make_store() -> Callable[[int, dict[int, Optional[str]]], AnnotationStore]:
+    def make(size: int, assignments: dict[int, Optional[str]]) -> AnnotationStore:
+        store = AnnotationStore(size)
+        for position, category in assignments.items():
+            store.set_category(position, category)
+        return store
+
+    return make
+
+
+@pytest.fixture
+def make_corpus() -> Callable[..., DataFrameCorpus]:
+    def make(docs: list[str], name: str = 'corpus', key_meta: Optional[str] = None) -> DataFrameCorpus:
+        """
+        :param key_meta: if provided, a meta of this name is added holding a unique key derived from each document
+        """
+        corpus = DataFrameCorpus(pd.DataFrame({'document_': docs}), name=name)
+        if key_meta is not None:
+            corpus.add_meta(pd.Series([f"id-{doc}" for doc in docs]), name=key_meta)
+        return corpus
+
+    return make
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from atap_annotator.annotator.Agreement import Agreement
+
+
+def make_col(labels: list) -> pd.Series:
+    return pd.Series(labels, dtype='category')
+
+
+def test_code_matrix_shares_categories_and_excludes_unannotated():
+    codes, categories = Agreement.get_code_matrix([make_col(['b', '', np.nan]), make_col(['a', 'b', 'c'])])
+    assert categories.tolist() == ['a', 'b', 'c']
+    assert codes.tolist() == [[1, Agreement.MISSING_CODE, Agreement.MISSING_CODE], [0, 1, 2]]
+
+
+def test_code_matrix_requires_equal_lengths():
+    with pytest.raises(ValueError):
+        Agreement.get_code_matrix([make_col(['a']), make_col(['a', 'b'])])
+
+
+def test_confusion_matrix():
+    matrix = Agreement.confusion_matrix(make_col(['x', 'x', 'y', 'y', np.nan]), make_col(['x', 'y', 'y', 'y', 'x']))
+    assert matrix.loc['x'].tolist() == [1, 1]
+    assert matrix.loc['y'].tolist() == [0, 2]
+
+
+def test_cohen_kappa():
+    # Observed agreement of 3/4 against 1/2 expected by chance
+    kappa = Agreement.cohen_kappa(make_col(['x', 'x', 'y', 'y']), make_col(['x', 'y', 'y', 'y']))
+    assert kappa == pytest.approx(0.5)
+
+
+def test_cohen_kappa_without_shared_annotations():
+    assert np.isnan(Agreement.cohen_kappa(make_col(['x', np.nan]), make_col([np.nan, 'x'])))
+
+
+def test_perfect_agreement_on_one_category():
+    assert Agreement.cohen_kappa(make_col(['x', 'x']), make_col(['x', 'x'])) == 1.0
+    assert Agreement.fleiss_kappa([make_col(['x', 'x']), make_col(['x', 'x'])]) == 1.0
+
+
+def test_pairwise_cohen_kappa_is_symmetric():
+    cols = {'a': make_col(['x', 'x', 'y', 'y']),
+            'b': make_col(['x', 'y', 'y', 'y']),
+            'c': make_col(['x', 'x', 'y', 'y'])}
+    kappas = Agreement.pairwise_cohen_kappa(cols)
+    assert (kappas.to_numpy() == kappas.to_numpy().T).all()
+    assert kappas.loc['a', 'c'] == pytest.approx(1.0)
+    assert kappas.loc['a', 'b'] == pytest.approx(0.5)
+
+
+def test_fleiss_kappa():
+    # Per-document agreement averages 3/4, and the category shares of 3/8 and 5/8 give 34/64 expected by chance
+    kappa = Agreement.fleiss_kappa([make_col(['x', 'x', 'y', 'y']), make_col(['x', 'y', 'y', 'y'])])
+    assert kappa == pytest.approx((0.75 - 34 / 64) / (1 - 34 / 64))
+
+
+def test_fleiss_kappa_skips_documents_with_one_annotation():
+    with_partial = Agreement.fleiss_kappa([make_col(['x', 'x', 'y', 'y', 'x']), make_col(['x', 'y', 'y', 'y', ''])])
+    without_partial = Agreement.fleiss_kappa([make_col(['x', 'x', 'y', 'y']), make_col(['x', 'y', 'y', 'y'])])
+    assert with_partial == pytest.approx(without_partial)
+
+
+def test_disagreements():
+    cols = [make_col(['x', 'x', np.nan, 'y', '']),
+            make_col(['x', 'y', 'y', np.nan, 'x']),
+            make_col(['x', 'x', 'z', 'y', 'y'])]
+    assert Agreement.disagreements(cols).tolist() == [2, 3, 5]
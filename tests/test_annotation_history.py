@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+from atap_corpus.corpus.corpus import DataFrameCorpus
+
+from atap_annotator.annotator.AnnotationHistory import AnnotationHistory
+from atap_annotator.annotator.AnnotationSession import AnnotationSession
+
+
+def make_session(size: int = 5, history_size: int = AnnotationHistory.DEFAULT_MAX_SIZE) -> AnnotationSession:
+    corpus = DataFrameCorpus(pd.DataFrame({'document_': [f"doc {i}" for i in range(size)]}), name='history')
+    session = AnnotationSession(corpus, history_size=history_size)
+    session.add_category('a')
+    session.add_category('b')
+    return session
+
+
+def test_unchanged_values_are_not_recorded():
+    history = AnnotationHistory()
+    history.record_set(0, 1, 1)
+    history.record_bulk(np.array([0, 1]), np.array([2, 2]), 2)
+    history.record_default('a', 'a')
+    assert not history.can_undo()
+
+
+def test_bulk_change_keeps_only_changed_documents():
+    history = AnnotationHistory()
+    history.record_bulk(np.array([3, 4, 5]), np.array([1, 0, 1]), 1)
+    op, positions, old_codes, new_code = history.pop_undo()
+    assert op == AnnotationHistory.BULK_OP
+    assert positions.tolist() == [4]
+    assert old_codes.tolist() == [0]
+    assert new_code == 1
+
+
+def test_undo_stack_is_capped():
+    history = AnnotationHistory(max_size=2)
+    for position in range(3):
+        history.record_set(position, -1, 0)
+    assert [history.pop_undo()[1] for _ in range(2)] == [2, 1]
+    assert history.pop_undo() is None
+
+
+def test_new_change_clears_redo():
+    history = AnnotationHistory()
+    history.record_set(0, -1, 0)
+    history.pop_undo()
+    assert history.can_redo()
+    history.record_set(1, -1, 0)
+    assert not history.can_redo()
+
+
+def test_disabled_history_records_nothing():
+    history = AnnotationHistory(max_size=0)
+    history.record_set(0, -1, 0)
+    assert not history.can_undo()
+
+
+def test_session_undo_and_redo_single_change():
+    session = make_session()
+    session.set_document_category(2, 'a')
+    session.set_document_category(2, 'b')
+    assert session.undo() == 2
+    assert session.get_document_category(2) == 'a'
+    assert session.undo() == 2
+    assert session.get_document_category(2) is None
+    assert session.undo() is None
+    assert session.redo() == 2
+    assert session.get_document_category(2) == 'a'
+
+
+def test_session_undo_bulk_change_updates_counts():
+    session = make_session()
+    session.set_document_category(1, 'b')
+    session.assign_category(np.array([1, 2, 3]), 'a')
+    assert session.get_category_counts()['a'] == 3
+    assert session.undo() == 1
+    assert [session.get_document_category(i) for i in range(1, 5)] == ['b', None, None, None]
+    assert session.get_category_counts()['a'] == 0
+    assert session.get_category_counts()['b'] == 1
+
+
+def test_session_undo_default_category():
+    session = make_session()
+    session.set_default_category('a')
+    session.set_default_category('b')
+    session.undo()
+    assert session.get_default_category() == 'a'
+    session.redo()
+    assert session.get_default_category() == 'b'
+
+
+def test_session_undo_restores_removed_category():
+    session = make_session()
+    session.set_document_category(1, 'b')
+    session.set_document_category(1, 'a')
+    session.remove_category('b')
+    session.undo()
+    assert 'b' in session.get_all_categories()
@@ -0,0 +1,137 @@
+from os.path import join
+
+import numpy as np
+
+from atap_annotator.annotator.AnnotationJournal import AnnotationJournal
+from atap_annotator.annotator.AnnotationSession import AnnotationSession
+from atap_annotator.annotator.AnnotationStore import AnnotationStore
+from atap_annotator.annotator.CorpusView import CorpusView
+
+LOGGER_NAME: str = 'test-journal'
+
+
+def attach_store(journal: AnnotationJournal, size: int = 4, fingerprint: str = 'f') -> AnnotationStore:
+    store = AnnotationStore(size)
+    journal.attach('corpus', size, fingerprint, store, None)
+    # The snapshot is taken by the writer thread, so it is written before any change is made
+    journal.flush()
+    return store
+
+
+def set_category(journal: AnnotationJournal, store: AnnotationStore, position: int, category):
+    store.set_category(position, category)
+    journal.record_category(position)
+
+
+def test_replay_after_close(tmp_path):
+    journal = AnnotationJournal(str(tmp_path), LOGGER_NAME)
+    store = attach_store(journal)
+    set_category(journal, store, 0, 'x')
+    set_category(journal, store, 2, 'y')
+    set_category(journal, store, 0, None)
+    store.get_code('y')
+    journal.record_default('y')
+    journal.close()
+
+    restored_journal = AnnotationJournal(str(tmp_path), LOGGER_NAME)
+    restored_store, default_category, generation = restored_journal.restore('corpus', 4, 'f')
+    assert restored_store.codes.tolist() == store.codes.tolist()
+    assert restored_store.category_table == ['x', 'y']
+    assert default_category == 'y'
+    assert generation == 1
+
+
+def test_restore_reads_records_not_yet_synced(tmp_path):
+    journal = AnnotationJournal(str(tmp_path), LOGGER_NAME)
+    journal.FSYNC_INTERVAL = 60.0
+    store = attach_store(journal)
+    set_category(journal, store, 3, 'x')
+    restored_store, _, _ = journal.restore('corpus', 4, 'f')
+    assert restored_store.get_category(3, None) == 'x'
+    journal.close()
+
+
+def test_restore_requires_matching_corpus(tmp_path):
+    journal = AnnotationJournal(str(tmp_path), LOGGER_NAME)
+    store = attach_store(journal)
+    set_category(journal, store, 1, 'x')
+    journal.close()
+    assert journal.restore('corpus', 4, 'other fingerprint') is None
+    assert journal.restore('corpus', 5, 'f') is None
+    assert journal.restore('other', 4, 'f') is None
+
+
+def test_partial_record_is_discarded(tmp_path):
+    journal = AnnotationJournal(str(tmp_path), LOGGER_NAME)
+    store = attach_store(journal)
+    set_category(journal, store, 1, 'x')
+    journal.close()
+    journal_path: str = join(journal.get_corpus_dir('corpus', 4, 'f'), AnnotationJournal.JOURNAL_FILE)
+    with open(journal_path, 'ab') as journal_file:
+        journal_file.write(AnnotationJournal.RECORD.pack(AnnotationJournal.SET_OP, 2, 0)[:-1])
+
+    restored_store, _, _ = journal.restore('corpus', 4, 'f')
+    assert restored_store.codes.tolist() == store.codes.tolist()
+
+
+def test_stale_journal_is_ignored(tmp_path):
+    journal = AnnotationJournal(str(tmp_path), LOGGER_NAME)
+    store = attach_store(journal)
+    set_category(journal, store, 1, 'x')
+    journal.close()
+    journal_path: str = join(journal.get_corpus_dir('corpus', 4, 'f'), AnnotationJournal.JOURNAL_FILE)
+    with open(journal_path, 'r+b') as journal_file:
+        journal_file.write(AnnotationJournal.HEADER.pack(AnnotationJournal.MAGIC, 99))
+
+    restored_store, _, _ = journal.restore('corpus', 4, 'f')
+    assert (restored_store.codes == AnnotationStore.DEFAULT_CODE).all()
+
+
+def test_snapshot_replaces_records(tmp_path):
+    journal = AnnotationJournal(str(tmp_path), LOGGER_NAME)
+    store = attach_store(journal)
+    store.set_categories(np.arange(4), 'x')
+    journal.snapshot()
+    journal.close()
+
+    restored_store, _, generation = journal.restore('corpus', 4, 'f')
+    assert restored_store.get_used_categories() == ['x']
+    assert (restored_store.codes == 0).all()
+    assert generation == 2
+
+
+def test_session_restores_annotations(tmp_path, monkeypatch, make_corpus):
+    monkeypatch.setattr(AnnotationSession, 'MAX_JOURNAL_RECORDS', 2)
+    session = AnnotationSession(make_corpus(['a', 'b', 'c', 'd']), journal_dir=str(tmp_path))
+    session.add_category('x')
+    session.add_category('y')
+    session.set_document_category(1, 'x')
+    session.assign_category(np.array([2, 3, 4]), 'y')
+    session.set_document_category(4, None)
+    session.set_default_category('x')
+    session.close()
+
+    restored_session = AnnotationSession(journal_dir=str(tmp_path))
+    # Explicitly unset documents are restored along with those annotated
+    assert restored_session.set_corpus(make_corpus(['a', 'b', 'c', 'd'])) == 4
+    assert [restored_session.get_document_category(i) for i in range(1, 5)] == ['x', 'y', 'y', None]
+    assert restored_session.get_default_category() == 'x'
+    assert restored_session.get_all_categories() == ['x', 'y']
+    assert restored_session.set_corpus(make_corpus(['a', 'b', 'c', 'changed'])) is None
+    restored_session.close()
+
+
+def test_session_does_not_read_every_document(tmp_path, monkeypatch, make_corpus):
+    def fail(*_):
+        raise AssertionError('The full fingerprint was computed')
+
+    monkeypatch.setattr(CorpusView, 'get_fingerprint', fail)
+    monkeypatch.setattr(CorpusView, 'SAMPLE_SIZE', 3)
+    session = AnnotationSession(make_corpus(['a', 'b', 'c', 'd', 'e']), journal_dir=str(tmp_path))
+    session.set_document_category(5, 'x')
+    session.close()
+
+    restored_session = AnnotationSession(journal_dir=str(tmp_path))
+    assert restored_session.set_corpus(make_corpus(['a', 'b', 'c', 'd', 'e'])) == 1
+    assert restored_session.set_corpus(make_corpus(['a', 'b', 'changed', 'd', 'e'])) is None
+    restored_session.close()
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from atap_annotator.annotator.AnnotationSession import AnnotationSession
+from atap_annotator.annotator.AnnotationSidecar import AnnotationSidecar
+from atap_annotator.annotator.AnnotationStore import AnnotationStore
+from atap_annotator.annotator.CorpusView import CorpusView
+
+KEY_META: str = 'doc_id'
+
+
+@pytest.fixture
+def file_path(tmp_path) -> str:
+    return str(tmp_path / f"corpus{AnnotationSidecar.FILE_EXTENSION}")
+
+
+@pytest.mark.parametrize('key_meta', [None, KEY_META])
+def test_round_trip(file_path: str, key_meta, make_store, make_corpus):
+    corpus_view = CorpusView(make_corpus(['a', 'b', 'c', 'd'], key_meta=KEY_META))
+    store = make_store(4, {0: 'x', 1: None, 3: 'y'})
+
+    written = AnnotationSidecar.write(file_path, corpus_view, store, ['x', 'y', 'z'], 'z', key_meta)
+    assert written == 3
+    read_store, categories, default_category, matched_count, file_count = AnnotationSidecar.read(file_path,
+                                                                                                 corpus_view)
+    assert read_store.codes.tolist() == store.codes.tolist()
+    assert read_store.category_table == store.category_table
+    assert categories == ['x', 'y', 'z']
+    assert default_category == 'z'
+    assert (matched_count, file_count) == (3, 3)
+
+
+@pytest.mark.parametrize('key_meta', [None, KEY_META])
+def test_read_into_reordered_corpus(file_path: str, key_meta, make_store, make_corpus):
+    AnnotationSidecar.write(file_path, CorpusView(make_corpus(['a', 'b', 'c'], key_meta=KEY_META)),
+                            make_store(3, {0: 'x', 2: 'y'}), ['x', 'y'], None, key_meta)
+    reordered_view = CorpusView(make_corpus(['new', 'c', 'a'], key_meta=KEY_META))
+    read_store, _, _, matched_count, file_count = AnnotationSidecar.read(file_path, reordered_view)
+    assert [read_store.get_category(i, 'default') for i in range(3)] == ['default', 'y', 'x']
+    assert (matched_count, file_count) == (2, 2)
+
+
+def test_write_without_annotations(file_path: str, make_corpus):
+    corpus_view = CorpusView(make_corpus(['a', 'b']))
+    assert AnnotationSidecar.write(file_path, corpus_view, AnnotationStore(2), [], None) == 0
+    read_store, _, _, matched_count, file_count = AnnotationSidecar.read(file_path, corpus_view)
+    assert (read_store.codes == AnnotationStore.DEFAULT_CODE).all()
+    assert (matched_count, file_count) == (0, 0)
+
+
+def test_write_in_chunks(file_path: str, monkeypatch, make_store, make_corpus):
+    monkeypatch.setattr(AnnotationSidecar, 'CHUNK_SIZE', 2)
+    docs = [f"doc {i}" for i in range(7)]
+    corpus_view = CorpusView(make_corpus(docs))
+    store = make_store(7, {i: 'x' if i % 2 else 'y' for i in range(7)})
+    assert AnnotationSidecar.write(file_path, corpus_view, store, ['x', 'y'], None) == 7
+    assert AnnotationSidecar.read(file_path, corpus_view)[0].codes.tolist() == store.codes.tolist()
+
+
+def test_write_unknown_key_meta(file_path: str, make_corpus):
+    with pytest.raises(ValueError):
+        AnnotationSidecar.write(file_path, CorpusView(make_corpus(['a'])), AnnotationStore(1), [], None, 'missing')
+
+
+def test_read_other_parquet_file(file_path: str, make_corpus):
+    pd.DataFrame({'key': [1], 'code': [0]}).to_parquet(file_path)
+    with pytest.raises(ValueError):
+        AnnotationSidecar.read(file_path, CorpusView(make_corpus(['a'])))
+
+
+def test_session_export_and_import(file_path: str, make_corpus):
+    session = AnnotationSession(make_corpus(['a', 'b', 'c'], key_meta=KEY_META))
+    session.add_category('x')
+    session.add_category('unused')
+    session.set_default_category('x')
+    session.set_document_category(2, 'x')
+    assert session.annotation_files.export_annotations(file_path, KEY_META) == 1
+
+    other_session = AnnotationSession(make_corpus(['c', 'b', 'a'], key_meta=KEY_META))
+    other_session.set_imported_annotations(*other_session.annotation_files.read_annotations(file_path)[:3])
+    assert other_session.get_all_categories() == ['x', 'unused']
+    assert other_session.get_default_category() == 'x'
+    assert other_session.get_category_counts()['x'] == 1
+    assert other_session.annotations.codes[1] == other_session.annotations.get_code('x')
+    with pytest.raises(ValueError):
+        other_session.set_imported_annotations(AnnotationStore(5), [], None)
+
+
+def test_default_path_is_sanitised(make_corpus):
+    session = AnnotationSession(make_corpus(['a'], name='my corpus/v2'))
+    assert session.annotation_files.get_default_path() == f"my_corpus_v2{AnnotationSidecar.FILE_EXTENSION}"
+    assert AnnotationSession().annotation_files.get_default_path() == ''
+
+
+def test_duplicate_keys_use_last_row(file_path: str, make_store, make_corpus):
+    corpus_view = CorpusView(make_corpus(['a', 'a']))
+    store = make_store(2, {0: 'x', 1: 'y'})
+    AnnotationSidecar.write(file_path, corpus_view, store, ['x', 'y'], None)
+    read_store = AnnotationSidecar.read(file_path, CorpusView(make_corpus(['a'])))[0]
+    assert read_store.get_category(0, None) == 'y'
+    assert np.array_equal(read_store.codes, [store.get_code('y')])
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+from atap_annotator.annotator.AnnotationStore import AnnotationStore
+
+
+def test_new_store_takes_default_category():
+    store = AnnotationStore(3)
+    assert len(store) == 3
+    assert (store.codes == AnnotationStore.DEFAULT_CODE).all()
+    assert store.get_category(0, 'fallback') == 'fallback'
+
+
+def test_set_category_adds_to_table_once():
+    store = AnnotationStore(4)
+    store.set_category(0, 'a')
+    store.set_category(2, 'b')
+    store.set_category(3, 'a')
+    assert store.category_table == ['a', 'b']
+    assert store.codes.tolist() == [0, AnnotationStore.DEFAULT_CODE, 1, 0]
+    assert store.get_category(2, None) == 'b'
+
+
+def test_unset_category_is_none():
+    store = AnnotationStore(2)
+    store.set_category(1, None)
+    assert store.codes[1] == AnnotationStore.UNSET_CODE
+    assert store.get_category(1, 'fallback') is None
+
+
+def test_set_categories():
+    store = AnnotationStore(5)
+    store.set_categories(np.array([1, 3]), 'x')
+    assert store.codes.tolist() == [-1, 0, -1, 0, -1]
+
+
+def test_used_categories_in_order_of_first_appearance():
+    store = AnnotationStore(4)
+    store.get_code('unused')
+    store.set_category(3, 'a')
+    store.set_category(1, 'b')
+    assert store.get_used_categories() == ['b', 'a']
+
+
+def test_copy_is_independent():
+    store = AnnotationStore(2)
+    store.set_category(0, 'a')
+    store_copy = store.copy()
+    store_copy.set_category(1, 'b')
+    assert store.codes.tolist() == [0, AnnotationStore.DEFAULT_CODE]
+    assert store.category_table == ['a']
+
+
+def test_categorical_round_trip():
+    store = AnnotationStore(4)
+    store.set_category(0, 'a')
+    store.set_category(1, None)
+    store.set_category(3, 'b')
+    categorical = store.to_categorical()
+    assert list(categorical.astype(object)[[0, 2, 3]]) == ['a', AnnotationStore.DEFAULT_LABEL, 'b']
+    assert pd.isna(categorical[1])
+
+    restored = AnnotationStore.from_categorical(pd.Series(categorical))
+    assert [restored.get_category(i, 'default') for i in range(4)] == ['a', None, 'default', 'b']
+
+
+def test_from_non_categorical_column():
+    restored = AnnotationStore.from_categorical(pd.Series(['x', None, '', 'y', 'x']))
+    assert restored.get_used_categories() == ['x', 'y']
+    assert restored.codes[1] == AnnotationStore.UNSET_CODE
+    assert restored.codes[2] == AnnotationStore.DEFAULT_CODE
@@ -0,0 +1,63 @@
+import threading
+
+import pandas as pd
+import pytest
+from atap_corpus.corpus.corpus import DataFrameCorpus
+from atap_corpus_loader import CorpusLoader
+
+from atap_annotator.annotator.AnnotationSession import AnnotationSession
+from atap_annotator.annotator.Annotator import Annotator
+
+
+@pytest.fixture
+def annotator() -> Annotator:
+    annotator = Annotator(CorpusLoader(root_directory='.'), 'test-annotator')
+    yield annotator
+    annotator.close()
+
+
+def wait_for_background(annotator: Annotator):
+    annotator.background_executor.submit(lambda: None).result()
+
+
+def test_save_copies_corpus_selected_when_saving(annotator: Annotator):
+    source = DataFrameCorpus(pd.DataFrame({'document_': ['a', 'b', 'c']}), name='source')
+    other = DataFrameCorpus(pd.DataFrame({'document_': ['x', 'y', 'z']}), name='other')
+    annotator.set_selected_corpus(source)
+    annotator.session.set_document_category(2, 'k')
+
+    # The save is queued behind a blocked task, so another corpus is selected before it runs
+    release = threading.Event()
+    annotator.background_executor.submit(release.wait)
+    annotator.save_as_corpus('saved', '', False)
+    annotator.set_selected_corpus(other)
+    release.set()
+    wait_for_background(annotator)
+
+    saved = annotator.get_corpus_dict()['saved']
+    assert list(saved.docs()) == ['a', 'b', 'c']
+    assert saved[AnnotationSession.DEFAULT_CATEGORIES_COL].tolist()[1] == 'k'
+
+
+def test_merge_adds_corpus_in_background(annotator: Annotator):
+    docs = pd.DataFrame({'document_': ['a', 'b', 'c']})
+    corpus = DataFrameCorpus(docs.copy(), name='selected')
+    annotator.corpus_loader.get_mutable_corpora().add(corpus)
+    for name, labels in [('u1', ['x', None, 'y']), ('u2', [None, 'x', 'z'])]:
+        unit_corpus = DataFrameCorpus(docs.copy(), name=name)
+        unit_corpus.add_meta(pd.Series(labels, dtype='category'), name='label')
+        annotator.corpus_loader.get_mutable_corpora().add(unit_corpus)
+    annotator.set_selected_corpus(corpus)
+
+    release = threading.Event()
+    annotator.background_executor.submit(release.wait)
+    annotator.merge_annotations(['u1', 'u2'], 'label', 'merged')
+    # The corpus is copied on the background worker, so nothing has changed until it completes
+    assert len(annotator.get_corpus_dict()) == 3
+    release.set()
+    wait_for_background(annotator)
+
+    merged = [c for name, c in annotator.get_corpus_dict().items() if name not in ('selected', 'u1', 'u2')]
+    assert len(merged) == 1
+    assert merged[0]['merged'].tolist()[:2] == ['x', 'x']
+    assert annotator.session.get_navigation_str() == "1 merge conflicts: 1 of 1"
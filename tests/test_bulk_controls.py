@@ -0,0 +1,25 @@
+import pytest
+
+from atap_annotator.annotator.BulkControls import BulkControls
+
+
+@pytest.mark.parametrize('indices_str, expected', [
+    ('1, 4, 8-10', [1, 4, 8, 9, 10]),
+    ('3', [3]),
+    ('1-1', [1]),
+    (' 10 ,, ', [10]),
+    ('', []),
+])
+def test_parse_indices(indices_str: str, expected: list[int]):
+    assert BulkControls._parse_indices(indices_str, 1, 10).tolist() == expected
+
+
+@pytest.mark.parametrize('indices_str', ['0', '11', '1-11', '0-5', '5-3', '-1', '1-', '1-2-3', 'a', '1.5', '1, x'])
+def test_parse_invalid_indices(indices_str: str):
+    with pytest.raises(ValueError):
+        BulkControls._parse_indices(indices_str, 1, 10)
+
+
+def test_large_range_is_rejected_before_expansion():
+    with pytest.raises(ValueError):
+        BulkControls._parse_indices(f"1-{10 ** 15}", 1, 10)
@@ -0,0 +1,77 @@
+import numpy as np
+
+from atap_annotator.annotator.AnnotationStore import AnnotationStore
+from atap_annotator.annotator.CategoryIndex import CategoryIndex
+
+
+def set_category(store: AnnotationStore, index: CategoryIndex, position: int, category):
+    old_code = int(store.codes[position])
+    store.set_category(position, category)
+    index.update(position, old_code, int(store.codes[position]))
+
+
+def assert_matches_store(store: AnnotationStore, index: CategoryIndex):
+    rebuilt = CategoryIndex(store)
+    assert (index.counts == rebuilt.counts).all()
+    assert (index.block_counts == rebuilt.block_counts).all()
+
+
+def test_counts_after_build(make_store):
+    store = make_store(5, {0: 'a', 1: 'b', 2: 'a', 3: None})
+    index = CategoryIndex(store)
+    assert index.get_count(store.get_code('a')) == 2
+    assert index.get_count(store.get_code('b')) == 1
+    assert index.get_count(AnnotationStore.UNSET_CODE) == 1
+    assert index.get_count(AnnotationStore.DEFAULT_CODE) == 1
+    assert index.get_count(99) == 0
+
+
+def test_update_adds_new_categories(make_store):
+    store = make_store(3, {0: 'a'})
+    index = CategoryIndex(store)
+    set_category(store, index, 1, 'new')
+    set_category(store, index, 0, None)
+    assert index.get_count(store.get_code('new')) == 1
+    assert index.get_count(store.get_code('a')) == 0
+    assert_matches_store(store, index)
+
+
+def test_update_many_across_blocks():
+    size = CategoryIndex.BLOCK_SIZE * 3 + 7
+    store = AnnotationStore(size)
+    index = CategoryIndex(store)
+    rng = np.random.default_rng(0)
+    positions = np.unique(rng.integers(0, size, 500))
+    old_codes = store.codes[positions].copy()
+    store.set_categories(positions, 'x')
+    index.update_many(positions, old_codes, store.get_code('x'))
+    assert index.get_count(store.get_code('x')) == len(positions)
+
+    old_codes = store.codes[positions].copy()
+    new_codes = rng.choice([AnnotationStore.UNSET_CODE, AnnotationStore.DEFAULT_CODE, 0], len(positions))
+    store.codes[positions] = new_codes
+    index.update_many(positions, old_codes, new_codes)
+    assert_matches_store(store, index)
+
+
+def test_find_next_wraps_around(make_store):
+    size = CategoryIndex.BLOCK_SIZE * 2 + 10
+    store = make_store(size, {5: 'a', CategoryIndex.BLOCK_SIZE + 3: 'a'})
+    index = CategoryIndex(store)
+    code = store.get_code('a')
+    assert index.find_next(0, [code]) == 5
+    assert index.find_next(6, [code]) == CategoryIndex.BLOCK_SIZE + 3
+    assert index.find_next(CategoryIndex.BLOCK_SIZE + 4, [code]) == 5
+
+
+def test_find_next_with_several_codes(make_store):
+    store = make_store(10, {2: 'a', 7: None})
+    index = CategoryIndex(store)
+    assert index.find_next(3, [store.get_code('a'), AnnotationStore.UNSET_CODE]) == 7
+
+
+def test_find_next_missing_code(make_store):
+    store = make_store(10, {2: 'a'})
+    index = CategoryIndex(store)
+    assert index.find_next(0, [AnnotationStore.UNSET_CODE]) is None
+    assert index.find_next(0, [42]) is None
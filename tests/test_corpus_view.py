@@ -0,0 +1,62 @@
+import pandas as pd
+import pytest
+
+from atap_annotator.annotator.CorpusView import CorpusView
+
+DOCS: list[str] = ['a', 'b', 'c', 'd', 'e', 'f']
+
+
+@pytest.fixture
+def corpus(make_corpus):
+    corpus = make_corpus(DOCS)
+    corpus.add_meta(pd.Series(range(len(DOCS))), name='n')
+    return corpus
+
+
+def test_root_cells(corpus):
+    corpus_view = CorpusView(corpus)
+    assert len(corpus_view) == 6
+    assert corpus_view.get_cell(1, corpus._COL_DOC) == 'a'
+    assert corpus_view.get_cell(6, 'n') == 5
+    assert corpus_view.get_column('n').tolist() == list(range(6))
+    for document_idx in [0, 7]:
+        with pytest.raises(IndexError):
+            corpus_view.get_root_position(document_idx)
+
+
+def test_cloned_cells_map_to_root_positions(corpus):
+    masked = corpus.cloned(pd.Series([False, True, True, False, True, True]))
+    # Masks are aligned with the root corpus, including those of clones of a clone
+    cloned = masked.cloned(pd.Series([False, True, False, False, True, True]))
+    assert cloned.docs().tolist() == ['b', 'e', 'f']
+    corpus_view = CorpusView(cloned)
+    assert len(corpus_view) == 3
+    assert [corpus_view.get_root_position(i) for i in range(1, 4)] == [1, 4, 5]
+    assert [corpus_view.get_cell(i, corpus._COL_DOC) for i in range(1, 4)] == ['b', 'e', 'f']
+    assert corpus_view.get_column('n').tolist() == [1, 4, 5]
+    assert corpus_view.get_column('n').index.tolist() == [0, 1, 2]
+    with pytest.raises(IndexError):
+        corpus_view.get_root_position(4)
+
+
+@pytest.mark.parametrize('sample_size', [2, CorpusView.SAMPLE_SIZE])
+def test_fingerprints_depend_only_on_documents_in_order(corpus, make_corpus, monkeypatch, sample_size: int):
+    monkeypatch.setattr(CorpusView, 'SAMPLE_SIZE', sample_size)
+    masked_view = CorpusView(corpus.cloned(pd.Series([False, True, True, False, True, True])))
+    same_view = CorpusView(make_corpus(['b', 'c', 'e', 'f'], name='other'))
+    reordered_view = CorpusView(make_corpus(['f', 'c', 'e', 'b']))
+    doc_col: str = corpus._COL_DOC
+    for get_fingerprint in [CorpusView.get_fingerprint, CorpusView.get_sample_fingerprint]:
+        assert get_fingerprint(masked_view, doc_col) == get_fingerprint(same_view, doc_col)
+        assert get_fingerprint(masked_view, doc_col) != get_fingerprint(reordered_view, doc_col)
+        assert get_fingerprint(masked_view, doc_col) != get_fingerprint(CorpusView(corpus), doc_col)
+
+
+def test_sample_fingerprint_reads_only_sampled_documents(make_corpus, monkeypatch):
+    monkeypatch.setattr(CorpusView, 'SAMPLE_SIZE', 3)
+    fingerprint: str = CorpusView(make_corpus(DOCS)).get_sample_fingerprint('document_')
+    # With 3 of 6 documents sampled, the first, last and one between are read
+    assert CorpusView(make_corpus(['a', 'x', 'c', 'd', 'e', 'f'])).get_sample_fingerprint('document_') == fingerprint
+    assert CorpusView(make_corpus(['a', 'b', 'c', 'd', 'e', 'x'])).get_sample_fingerprint('document_') != fingerprint
+    empty_view = CorpusView(make_corpus([]))
+    assert empty_view.get_sample_fingerprint('document_') == empty_view.get_fingerprint('document_')
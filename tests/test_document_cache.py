@@ -0,0 +1,81 @@
+import threading
+
+import pytest
+
+from atap_annotator.annotator.DocumentCache import DocumentCache, DocumentPayload
+
+
+class CountingLoader:
+    def __init__(self):
+        self.loaded: list[int] = []
+        self.lock = threading.Lock()
+
+    def __call__(self, document_idx: int) -> DocumentPayload:
+        with self.lock:
+            self.loaded.append(document_idx)
+        return {'document_': f"doc {document_idx}"}
+
+
+@pytest.fixture
+def loader() -> CountingLoader:
+    return CountingLoader()
+
+
+def make_cache(loader: CountingLoader, prefetch_next: int = 0, prefetch_prev: int = 0, max_size: int = 3,
+               max_document_idx: int = 20) -> DocumentCache:
+    cache = DocumentCache('test-cache', prefetch_next, prefetch_prev, max_size)
+    cache.invalidate(loader, 1, max_document_idx)
+    return cache
+
+
+def wait_for_prefetch(cache: DocumentCache):
+    cache.executor.submit(lambda: None).result()
+
+
+def test_least_recently_used_is_evicted(loader: CountingLoader):
+    cache = make_cache(loader)
+    for document_idx in [1, 2, 3, 1, 4]:
+        assert cache.get(document_idx) == {'document_': f"doc {document_idx}"}
+    assert list(cache.payloads) == [3, 1, 4]
+
+    cache.get(1)
+    cache.get(2)
+    assert loader.loaded == [1, 2, 3, 4, 2]
+    cache.close()
+
+
+def test_max_size_holds_prefetched_documents(loader: CountingLoader):
+    cache = make_cache(loader, prefetch_next=3, prefetch_prev=2, max_size=1)
+    assert cache.max_size == 6
+    cache.close()
+
+
+def test_prefetch_surrounding_documents(loader: CountingLoader):
+    cache = make_cache(loader, prefetch_next=2, prefetch_prev=1, max_size=10)
+    cache.get(5)
+    wait_for_prefetch(cache)
+    assert sorted(cache.payloads) == [4, 5, 6, 7]
+
+    for document_idx in [6, 7, 8]:
+        cache.get(document_idx)
+        wait_for_prefetch(cache)
+    # Sequential navigation is served from the prefetched documents, each of which is loaded once
+    assert loader.loaded == [5, 6, 7, 4, 8, 9, 10]
+    cache.close()
+
+
+def test_prefetch_stays_within_corpus(loader: CountingLoader):
+    cache = make_cache(loader, prefetch_next=3, prefetch_prev=3, max_size=10, max_document_idx=3)
+    cache.get(1)
+    wait_for_prefetch(cache)
+    assert sorted(cache.payloads) == [1, 2, 3]
+    cache.close()
+
+
+def test_invalidate_discards_payloads(loader: CountingLoader):
+    cache = make_cache(loader)
+    cache.get(1)
+    cache.invalidate()
+    assert cache.get(1) == {}
+    assert len(cache.payloads) == 0
+    cache.close()
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+from atap_corpus.corpus.corpus import DataFrameCorpus
+
+from atap_annotator.annotator.AnnotationSession import AnnotationSession
+from atap_annotator.annotator.DuplicateClusters import DuplicateClusters
+
+BASE_DOC = ("the committee met on tuesday to discuss the annual budget and agreed to fund the new library "
+            "extension, the community garden, and repairs to the swimming pool before the summer season begins")
+
+
+def signatures_of(docs: list[str]) -> np.ndarray:
+    return DuplicateClusters.compute_chunk_signatures(docs)
+
+
+def test_signatures_ignore_case_and_whitespace():
+    signatures = signatures_of([BASE_DOC, "  " + BASE_DOC.upper().replace(' ', '\n  ')])
+    assert signatures.shape == (2, DuplicateClusters.NUM_PERMUTATIONS)
+    assert (signatures[0] == signatures[1]).all()
+
+
+def test_signatures_of_short_documents():
+    signatures = signatures_of(['', 'ab', BASE_DOC])
+    assert signatures.shape == (3, DuplicateClusters.NUM_PERMUTATIONS)
+
+
+def test_cluster_groups_near_duplicates():
+    docs = [BASE_DOC,
+            "a completely different document about the weather forecast for the coming weekend in the mountains",
+            BASE_DOC.replace('tuesday', 'wednesday'),
+            BASE_DOC,
+            "yet another unrelated text describing a recipe for bread with flour, water, salt and a little yeast"]
+    labels = DuplicateClusters.cluster(signatures_of(docs), threshold=0.7)
+    assert labels.tolist() == [0, 1, 0, 0, 2]
+
+
+def test_cluster_threshold_one_keeps_only_exact_duplicates():
+    docs = [BASE_DOC, BASE_DOC.replace('tuesday', 'wednesday'), BASE_DOC]
+    labels = DuplicateClusters.cluster(signatures_of(docs), threshold=1.0)
+    assert labels[0] == labels[2]
+    assert labels[0] != labels[1]
+
+
+def test_cluster_distinct_documents():
+    docs = [f"document {i} " + ' '.join(str(i * j) for j in range(40)) for i in range(20)]
+    labels = DuplicateClusters.cluster(signatures_of(docs))
+    assert labels.tolist() == list(range(20))
+
+
+def test_compute_signatures_uses_cache(tmp_path):
+    docs = pd.Series([BASE_DOC, 'another document entirely'])
+    duplicate_clusters = DuplicateClusters(str(tmp_path), 'test')
+    signatures = duplicate_clusters.compute_signatures(docs, 'corpus', 'fingerprint', num_workers=1)
+    cache_files = list((tmp_path / DuplicateClusters.CACHE_SUBDIR).iterdir())
+    assert len(cache_files) == 1
+
+    cached = duplicate_clusters.compute_signatures(pd.Series(['ignored', 'ignored']), 'corpus', 'fingerprint')
+    assert (cached == signatures).all()
+
+
+def test_session_propagates_category_to_cluster():
+    corpus = DataFrameCorpus(pd.DataFrame({'document_': ['a', 'b', 'c', 'd']}), name='clusters')
+    session = AnnotationSession(corpus)
+    assert session.duplicates.set_clusters(np.array([0, 1, 0, 1])) == 2
+    assert session.navigation_sequence.tolist() == [1, 2]
+
+    session.set_document_category(3, 'x')
+    assert [session.get_document_category(i) for i in range(1, 5)] == ['x', None, 'x', None]
+    session.undo()
+    assert session.get_category_counts()[AnnotationSession.DEFAULT_STATE] == 4
+
+    session.duplicates.propagate = False
+    session.set_document_category(2, 'y')
+    assert [session.get_document_category(i) for i in range(1, 5)] == [None, 'y', None, None]
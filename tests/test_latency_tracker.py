@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+from atap_annotator.annotator.LatencyTracker import LatencyTracker
+
+
+def test_stats_of_recorded_durations():
+    tracker = LatencyTracker()
+    for duration in [0.001, 0.002, 0.003, 0.004]:
+        tracker.record('navigate', duration)
+    stats = tracker.get_stats()['navigate']
+    assert stats['count'] == 4
+    assert stats['p50_ms'] == pytest.approx(2.5)
+    assert stats['max_ms'] == pytest.approx(4.0)
+    assert stats['total_ms'] == pytest.approx(10.0)
+
+
+def test_window_keeps_most_recent_durations():
+    tracker = LatencyTracker(window_size=3)
+    for duration in [1.0, 0.001, 0.002, 0.003, 0.004]:
+        tracker.record('save', duration)
+    stats = tracker.get_stats()['save']
+    # The percentiles only cover the last three durations once the ring buffer wraps, while the count and total
+    # include every duration
+    assert stats['count'] == 5
+    assert stats['max_ms'] == pytest.approx(4.0)
+    assert stats['p50_ms'] == pytest.approx(3.0)
+    assert stats['total_ms'] == pytest.approx(1010.0)
+
+
+def test_time_records_when_operation_raises():
+    tracker = LatencyTracker()
+    with pytest.raises(ValueError):
+        with tracker.time('failing'):
+            raise ValueError()
+    assert tracker.get_stats()['failing']['count'] == 1
+
+
+def test_stats_df_and_json():
+    tracker = LatencyTracker(window_size=2)
+    tracker.record('b', 0.001)
+    tracker.record('a', 0.002)
+    stats_df = tracker.get_stats_df()
+    assert stats_df.index.tolist() == ['a', 'b']
+    assert stats_df.columns.tolist() == LatencyTracker.STATS_COLUMNS
+    dumped = json.loads(tracker.to_json())
+    assert dumped['window_size'] == 2
+    assert dumped['operations']['a']['count'] == 1
+
+    tracker.reset()
+    assert tracker.get_stats() == {}
+    assert len(tracker.get_stats_df()) == 0
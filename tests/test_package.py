@@ -0,0 +1,32 @@
+import subprocess
+import sys
+
+import pytest
+
+
+def run_fresh(code: str) -> str:
+    # The lazy exports depend on which modules have already been imported, so each case runs in a new interpreter
+    result = subprocess.run([sys.executable, '-W', 'ignore', '-c', code], capture_output=True, text=True, check=True)
+    return result.stdout.strip()
+
+
+@pytest.mark.parametrize('name', ['CorpusAnnotator', 'SharedCorpora'])
+def test_export_is_class_after_submodule_import(name: str):
+    exported = run_fresh(f"import atap_annotator.{name}\n"
+                         f"from atap_annotator import {name}\n"
+                         f"print(isinstance({name}, type), {name}.__name__)")
+    assert exported == f"True {name}"
+
+
+@pytest.mark.parametrize('name', ['CorpusAnnotator', 'SharedCorpora', 'AnnotationSession'])
+def test_export_is_class(name: str):
+    exported = run_fresh(f"from atap_annotator import {name}\n"
+                         f"print(isinstance({name}, type), {name}.__name__)")
+    assert exported == f"True {name}"
+
+
+def test_package_import_is_lazy():
+    imported = run_fresh("import sys\n"
+                         "import atap_annotator\n"
+                         "print('panel' in sys.modules, 'atap_annotator.CorpusAnnotator' in sys.modules)")
+    assert imported == "False False"
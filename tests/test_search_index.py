@@ -0,0 +1,105 @@
+import pandas as pd
+import pytest
+from atap_corpus.corpus.corpus import DataFrameCorpus
+
+from atap_annotator.annotator.AnnotationSession import AnnotationSession
+from atap_annotator.annotator.SearchIndex import SearchIndex
+
+DOCS = pd.Series([
+    "The cat sat on the mat",
+    "A hot dog stand in New York",
+    "Dogs and cats living together",
+    "The dog is hot, said the cat",
+    "Don't feed the catfish",
+])
+
+
+@pytest.fixture(scope='module')
+def search_index() -> SearchIndex:
+    return SearchIndex.build(DOCS)
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('cat', ('term', 'cat')),
+    ('cat dog', ('and', [('term', 'cat'), ('term', 'dog')])),
+    ('cat AND dog', ('and', [('term', 'cat'), ('term', 'dog')])),
+    ('cat OR dog', ('or', [('term', 'cat'), ('term', 'dog')])),
+    ('cat -dog', ('and', [('term', 'cat'), ('not', ('term', 'dog'))])),
+    ('NOT cat', ('not', ('term', 'cat'))),
+    ('"Hot Dog"', ('phrase', ['hot', 'dog'])),
+    ('cat*', ('prefix', 'cat')),
+    ("don't", ('phrase', ['don', 't'])),
+    ('cat (dog OR mat)', ('and', [('term', 'cat'), ('or', [('term', 'dog'), ('term', 'mat')])])),
+    ('-(dog OR mat)', ('not', ('or', [('term', 'dog'), ('term', 'mat')]))),
+])
+def test_parse(query: str, expected: tuple):
+    assert SearchIndex.parse(query) == expected
+
+
+@pytest.mark.parametrize('query', ['', '   ', '(cat', 'cat)', 'NOT', 'cat OR', '""', '!!!'])
+def test_parse_malformed(query: str):
+    with pytest.raises(ValueError):
+        SearchIndex.parse(query)
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('cat', [0, 3]),
+    ('CAT', [0, 3]),
+    ('cat dog', [3]),
+    ('cat OR dog', [0, 1, 3]),
+    ('cat -dog', [0]),
+    ('NOT cat', [1, 2, 4]),
+    ('-cat -dog', [2, 4]),
+    ('"hot dog"', [1]),
+    ('"dog hot"', []),
+    ('cat*', [0, 2, 3, 4]),
+    ("don't", [4]),
+    ('the (mat OR catfish)', [0, 4]),
+    ('missing', []),
+])
+def test_search(search_index: SearchIndex, query: str, expected: list[int]):
+    assert search_index.search(query).tolist() == expected
+
+
+def test_build_in_chunks_matches_single_chunk(monkeypatch):
+    docs = pd.Series([f"doc {i} word{i % 7} shared" for i in range(50)])
+    single_chunk = SearchIndex.build(docs)
+    monkeypatch.setattr(SearchIndex, 'CHUNK_DOCUMENTS', 8)
+    chunked = SearchIndex.build(docs)
+    for query in ['shared', 'word3', 'doc 12', 'word* -word1']:
+        assert chunked.search(query).tolist() == single_chunk.search(query).tolist()
+
+
+def test_build_stops_when_progress_returns_false(monkeypatch):
+    monkeypatch.setattr(SearchIndex, 'CHUNK_DOCUMENTS', 2)
+    progress: list[int] = []
+
+    def on_progress(indexed_count: int) -> bool:
+        progress.append(indexed_count)
+        return indexed_count < 4
+
+    assert SearchIndex.build(DOCS, on_progress) is None
+    assert progress == [2, 4]
+
+
+def test_empty_corpus():
+    search_index = SearchIndex.build(pd.Series([], dtype=object))
+    assert len(search_index) == 0
+    assert search_index.search('anything').tolist() == []
+
+
+def test_session_search_sequence():
+    session = AnnotationSession(DataFrameCorpus(pd.DataFrame({'document_': DOCS}), name='search'))
+    assert session.get_indexed_count() is None
+    with pytest.raises(ValueError):
+        session.search.set_search_sequence('cat')
+
+    session.search.set_index(session.search.compute_index())
+    assert session.get_indexed_count() == len(DOCS)
+    assert session.search.set_search_sequence('cat') == 2
+    assert session.navigation_sequence.tolist() == [1, 4]
+    with pytest.raises(ValueError):
+        session.search.set_search_sequence('missing')
+
+    session.set_corpus(DataFrameCorpus(pd.DataFrame({'document_': DOCS}), name='other'))
+    assert session.get_indexed_count() is None
@@ -0,0 +1,27 @@
+import pandas as pd
+from atap_corpus.corpus.corpus import DataFrameCorpus
+
+from atap_annotator.annotator.AnnotationSession import AnnotationSession
+from atap_annotator.annotator.SessionSuggestions import SessionSuggestions
+
+
+def test_failed_training_is_not_retried_until_more_annotations(monkeypatch):
+    monkeypatch.setattr(SessionSuggestions, 'RETRAIN_INTERVAL', 2)
+    session = AnnotationSession(DataFrameCorpus(pd.DataFrame({'document_': list('abcdef')}), name='suggestions'))
+    suggestions = session.suggestions
+    session.set_document_category(1, 'x')
+    assert not suggestions.needs_training()
+    session.set_document_category(2, 'x')
+    assert suggestions.needs_training()
+
+    # Training fails with a single category, which should not make every later annotation retry it
+    suggestions.record_attempt()
+    assert not suggestions.needs_training()
+    session.set_document_category(3, 'x')
+    assert not suggestions.needs_training()
+    session.set_document_category(4, 'y')
+    assert suggestions.needs_training()
+
+    suggestions.clear_suggestions()
+    assert suggestions.needs_training()
+    session.close()
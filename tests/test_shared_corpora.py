@@ -0,0 +1,15 @@
+from atap_annotator.SharedCorpora import SharedCorpora
+
+
+def test_concurrent_sessions_of_one_annotator_use_separate_journals(tmp_path):
+    first_dir, first_lock = SharedCorpora._claim_journal_dir(str(tmp_path), 'alice')
+    second_dir, second_lock = SharedCorpora._claim_journal_dir(str(tmp_path), 'alice')
+    assert first_dir == str(tmp_path / 'alice')
+    assert second_dir != first_dir
+    SharedCorpora._release_journal_dir(second_dir, second_lock)
+
+    SharedCorpora._release_journal_dir(first_dir, first_lock)
+    # A later session of the annotator restores from the annotator's directory once it is released
+    third_dir, third_lock = SharedCorpora._claim_journal_dir(str(tmp_path), 'alice')
+    assert third_dir == first_dir
+    SharedCorpora._release_journal_dir(third_dir, third_lock)
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+from atap_corpus.corpus.corpus import DataFrameCorpus
+
+from atap_annotator.annotator.AnnotationSession import AnnotationSession
+from atap_annotator.annotator.WorkPartition import WorkPartition
+
+
+def assert_covers_once(units: list[np.ndarray], num_documents: int):
+    all_indices = np.sort(np.concatenate(units))
+    assert all_indices.tolist() == list(range(1, num_documents + 1))
+    for unit in units:
+        assert (np.diff(unit) > 0).all()
+
+
+def test_contiguous_sizes_differ_by_at_most_one():
+    units = WorkPartition.partition(WorkPartition.CONTIGUOUS, 10, 3)
+    assert [len(unit) for unit in units] == [4, 3, 3]
+    assert units[0].tolist() == [1, 2, 3, 4]
+    assert_covers_once(units, 10)
+
+
+def test_stratified_shares_each_stratum():
+    strata = pd.Series(['x'] * 6 + ['y'] * 3 + [None] * 3)
+    units = WorkPartition.partition(WorkPartition.STRATIFIED, len(strata), 3, strata, seed=1)
+    assert_covers_once(units, len(strata))
+    for unit in units:
+        unit_strata = strata.iloc[unit - 1]
+        assert (unit_strata == 'x').sum() == 2
+        assert (unit_strata == 'y').sum() == 1
+        assert unit_strata.isna().sum() == 1
+
+
+def test_stratified_depends_on_seed():
+    strata = pd.Series(['x'] * 20)
+    first = WorkPartition.stratified(strata, 2, seed=0)
+    assert all((a == b).all() for a, b in zip(first, WorkPartition.stratified(strata, 2, seed=0)))
+    assert not all((a == b).all() for a, b in zip(first, WorkPartition.stratified(strata, 2, seed=5)))
+
+
+def test_hashed_assignment_depends_only_on_key():
+    keys = pd.Series([f"key {i}" for i in range(50)])
+    units = WorkPartition.partition(WorkPartition.HASHED, len(keys), 4, keys)
+    assert_covers_once(units, len(keys))
+    extended = pd.concat([pd.Series(['new key']), keys], ignore_index=True)
+    extended_units = WorkPartition.hashed(extended, 4)
+    for unit, extended_unit in zip(units, extended_units):
+        assert set(unit + 1) <= set(extended_unit)
+
+
+@pytest.mark.parametrize('method, num_units, key_col', [
+    ('Unknown', 2, None),
+    (WorkPartition.CONTIGUOUS, 0, None),
+    (WorkPartition.STRATIFIED, 2, None),
+    (WorkPartition.HASHED, 2, pd.Series(['a'])),
+])
+def test_invalid_partition(method: str, num_units: int, key_col):
+    with pytest.raises(ValueError):
+        WorkPartition.partition(method, 3, num_units, key_col)
+
+
+def test_merge_agreement_and_conflicts():
+    unit_a = pd.Series(['x', np.nan, 'y', '', np.nan, 'x'], dtype='category')
+    unit_b = pd.Series([np.nan, 'z', 'x', '', np.nan, 'x'], dtype='category')
+    merged, conflicts = WorkPartition.merge([unit_a, unit_b], ['a', 'b'])
+    assert merged.dtype == 'category'
+    assert merged.astype(object).where(merged.notna(), None).tolist() == ['x', 'z', None, '', None, 'x']
+    assert conflicts.index.tolist() == [3]
+    assert conflicts.loc[3].tolist() == ['y', 'x']
+
+
+def test_merge_without_columns():
+    with pytest.raises(ValueError):
+        WorkPartition.merge([], [])
+
+
+def test_session_merge_leaves_selected_corpus_unchanged():
+    docs = pd.DataFrame({'document_': ['a', 'b', 'c']})
+    unit_corpora = []
+    for name, labels in [('u1', ['x', np.nan, 'y']), ('u2', [np.nan, 'x', 'z'])]:
+        unit_corpus = DataFrameCorpus(docs.copy(), name=name)
+        unit_corpus.add_meta(pd.Series(labels, dtype='category'), name='label')
+        unit_corpora.append(unit_corpus)
+    corpus = DataFrameCorpus(docs.copy(), name='selected')
+    session = AnnotationSession(corpus)
+
+    merged_corpus, meta_name, conflicts = session.work_units.merge(unit_corpora, 'label', 'merged')
+    assert corpus.metas == []
+    assert merged_corpus is not corpus
+    assert meta_name in merged_corpus.metas
+    assert conflicts.index.tolist() == [3]
+    assert session.get_navigation_str() == "1 merge conflicts: 1 of 1"